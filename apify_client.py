@@ -1,20 +1,111 @@
+from typing import AsyncIterator, Iterator
+
+import httpx
 import requests
 
-BASE_URL = "https://api.apify.com/v2"
+from config import APIFY_BASE_URL, APIFY_PAGE_SIZE
+from tracing import increment, span
+from transport import get_async_client, get_session, retry_count
+
+BASE_URL = APIFY_BASE_URL
+
+
+def page_limit(page_size: int, remaining: int | None) -> int:
+    return page_size if remaining is None else min(page_size, remaining)
 
 
 class ApifyClient:
-    def __init__(self, token: str):
+    def __init__(self, token: str, session: requests.Session | None = None):
         self.token = token
+        self.session = session or get_session()
 
-    def get_dataset_items(self, dataset_id: str, limit: int = 20) -> list[dict]:
-        if not dataset_id:
-            return []
+    def _items_request(
+        self, dataset_id: str, limit: int, offset: int = 0, fields: list[str] | None = None
+    ) -> tuple[str, dict]:
         url = f"{BASE_URL}/datasets/{dataset_id}/items"
         params = {"clean": "true", "limit": limit, "token": self.token}
-        resp = requests.get(url, params=params, timeout=60)
-        resp.raise_for_status()
-        data = resp.json()
+        if offset:
+            params["offset"] = offset
+        if fields:
+            params["fields"] = ",".join(fields)
+        return url, params
+
+    def get_dataset_items(
+        self, dataset_id: str, limit: int = 20, offset: int = 0, fields: list[str] | None = None
+    ) -> list[dict]:
+        if not dataset_id:
+            return []
+        url, params = self._items_request(dataset_id, limit, offset, fields)
+        with span("upstream", upstream="apify", endpoint="dataset_items") as current:
+            resp = self.session.get(url, params=params, timeout=60)
+            retries = retry_count(resp)
+            current.set(status=resp.status_code, response_bytes=len(resp.content), retries=retries)
+            increment("upstream_retries_total", retries, upstream="apify")
+            resp.raise_for_status()
+            data = resp.json()
+        if isinstance(data, list):
+            return data
+        return []
+
+    def iter_dataset_items(
+        self,
+        dataset_id: str,
+        offset: int = 0,
+        page_size: int = APIFY_PAGE_SIZE,
+        max_items: int | None = None,
+        fields: list[str] | None = None,
+    ) -> Iterator[dict]:
+        """Yield items from `offset` on, holding one page in memory at a time."""
+        remaining = max_items
+        while remaining is None or remaining > 0:
+            limit = page_limit(page_size, remaining)
+            page = self.get_dataset_items(dataset_id, limit=limit, offset=offset, fields=fields)
+            yield from page
+            offset += len(page)
+            if remaining is not None:
+                remaining -= len(page)
+            if len(page) < limit:
+                return
+
+
+class AsyncApifyClient(ApifyClient):
+    def __init__(self, token: str, client: httpx.AsyncClient | None = None):
+        self.token = token
+        self.client = client
+
+    async def get_dataset_items(
+        self, dataset_id: str, limit: int = 20, offset: int = 0, fields: list[str] | None = None
+    ) -> list[dict]:
+        if not dataset_id:
+            return []
+        url, params = self._items_request(dataset_id, limit, offset, fields)
+        with span("upstream", upstream="apify", endpoint="dataset_items") as current:
+            resp = await (self.client or get_async_client()).get(url, params=params, timeout=60)
+            retries = retry_count(resp)
+            current.set(status=resp.status_code, response_bytes=len(resp.content), retries=retries)
+            increment("upstream_retries_total", retries, upstream="apify")
+            resp.raise_for_status()
+            data = resp.json()
         if isinstance(data, list):
             return data
         return []
+
+    async def aiter_dataset_items(
+        self,
+        dataset_id: str,
+        offset: int = 0,
+        page_size: int = APIFY_PAGE_SIZE,
+        max_items: int | None = None,
+        fields: list[str] | None = None,
+    ) -> AsyncIterator[dict]:
+        remaining = max_items
+        while remaining is None or remaining > 0:
+            limit = page_limit(page_size, remaining)
+            page = await self.get_dataset_items(dataset_id, limit=limit, offset=offset, fields=fields)
+            for item in page:
+                yield item
+            offset += len(page)
+            if remaining is not None:
+                remaining -= len(page)
+            if len(page) < limit:
+                return
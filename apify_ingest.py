@@ -0,0 +1,183 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from apify_client import ApifyClient, AsyncApifyClient
+from config import APIFY_KEYWORD_HALF_LIFE_DAYS, APIFY_MAX_ITEMS_PER_RUN, CACHE_DIR
+from keywords import KeywordCounter
+
+# Only captions feed the keyword counts, so nothing else is downloaded.
+ITEM_FIELDS = ["caption"]
+BATCH_SIZE = 200
+# Aged counts below this are dropped. Anything seen in the latest run counts
+# at least 1, so a new term always survives its first save.
+MIN_COUNT = 0.5
+
+logger = logging.getLogger(__name__)
+
+
+def captions(items: list[Any]) -> list[str]:
+    return [item["caption"] for item in items if isinstance(item, dict) and isinstance(item.get("caption"), str)]
+
+
+def ingest_result(
+    counter: KeywordCounter, offset: int, new_items: int, error: Exception | None = None
+) -> dict[str, Any]:
+    result = {"top_keywords": counter.top(10), "item_count": offset, "new_items": new_items}
+    if error is not None:
+        result.update(note="Apify read incomplete, using saved keyword counts", error=str(error))
+    return result
+
+
+def unavailable_result(note: str, error: str | None = None) -> dict[str, Any]:
+    """An ingest result for when nothing could be read, so callers see one shape."""
+    result = {"top_keywords": [], "item_count": 0, "new_items": 0, "note": note}
+    if error is not None:
+        result["error"] = error
+    return result
+
+
+class BatchCounter:
+    """
+    Counts captions in batches of BATCH_SIZE. A batch only counts once it is
+    fully read, so items of a page that failed are re-read next run.
+    """
+
+    def __init__(self, counter: KeywordCounter, offset: int):
+        self.counter = counter
+        self.offset = offset
+        self._batch: list[Any] = []
+
+    def add(self, item: Any) -> None:
+        self._batch.append(item)
+        if len(self._batch) == BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        self.counter.update(captions(self._batch))
+        self.offset += len(self._batch)
+        self._batch = []
+
+
+class ApifyCheckpoints:
+    """
+    Per-dataset read offset plus the keyword counts of everything read so far.
+
+    Each run resumes at the saved offset, so only items appended since the
+    last run are downloaded. Offset and counts are saved together, and only
+    if no other run moved the offset meanwhile, so concurrent readers never
+    count an item twice. Saved counts halve every `half_life_days`, so the
+    top keywords follow recent captions rather than the dataset's history.
+    """
+
+    def __init__(self, path: str, half_life_days: float = APIFY_KEYWORD_HALF_LIFE_DAYS):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.half_life_days = half_life_days
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "dataset_id TEXT PRIMARY KEY, item_offset INTEGER NOT NULL, keywords TEXT NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+
+    def load(self, dataset_id: str, now: float | None = None) -> tuple[int, KeywordCounter]:
+        """Saved offset and keyword counts, aged to `now`."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT item_offset, keywords, updated_at FROM checkpoints WHERE dataset_id = ?", (dataset_id,)
+            ).fetchone()
+        if row is None:
+            return 0, KeywordCounter()
+        elapsed = max(0.0, (now or time.time()) - row[2])
+        counter = KeywordCounter.from_dict(json.loads(row[1]))
+        return row[0], counter.decay(0.5 ** (elapsed / (self.half_life_days * 86400)), MIN_COUNT)
+
+    def commit(self, dataset_id: str, start: int, offset: int, counter: KeywordCounter) -> bool:
+        """Save progress made from `start`; False if another run already moved past it."""
+        keywords = json.dumps(counter.to_dict(), ensure_ascii=False)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT item_offset FROM checkpoints WHERE dataset_id = ?", (dataset_id,)
+                ).fetchone()
+                saved = (row[0] if row else 0) == start
+                if saved:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO checkpoints (dataset_id, item_offset, keywords, updated_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (dataset_id, offset, keywords, time.time()),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return saved
+
+    def ingest(self, client: ApifyClient, dataset_id: str, max_items: int = APIFY_MAX_ITEMS_PER_RUN) -> dict[str, Any]:
+        start, counter = self.load(dataset_id)
+        reader = BatchCounter(counter, start)
+        error = None
+        try:
+            for item in client.iter_dataset_items(dataset_id, offset=start, max_items=max_items, fields=ITEM_FIELDS):
+                reader.add(item)
+            reader.flush()
+        except Exception as exc:
+            error = exc
+        finally:
+            result = self._finish(dataset_id, start, reader.offset, counter, error)
+        return result
+
+    async def aingest(
+        self, client: AsyncApifyClient, dataset_id: str, max_items: int = APIFY_MAX_ITEMS_PER_RUN
+    ) -> dict[str, Any]:
+        # Loading and committing the checkpoint is SQLite work, kept off the event loop.
+        start, counter = await asyncio.to_thread(self.load, dataset_id)
+        reader = BatchCounter(counter, start)
+        error = None
+        try:
+            async for item in client.aiter_dataset_items(
+                dataset_id, offset=start, max_items=max_items, fields=ITEM_FIELDS
+            ):
+                reader.add(item)
+            reader.flush()
+        except Exception as exc:
+            error = exc
+        finally:
+            result = await asyncio.to_thread(self._finish, dataset_id, start, reader.offset, counter, error)
+        return result
+
+    def _finish(
+        self, dataset_id: str, start: int, offset: int, counter: KeywordCounter, error: Exception | None = None
+    ) -> dict[str, Any]:
+        # A failed page ends the run with what was read so far; the next run resumes there.
+        if error is not None:
+            logger.warning("Reading Apify dataset %s stopped at item %s: %s", dataset_id, offset, error)
+        if offset == start:
+            return ingest_result(counter, offset, 0, error)
+        if self.commit(dataset_id, start, offset, counter):
+            return ingest_result(counter, offset, offset - start, error)
+        logger.info("Apify dataset %s was advanced by another run; using its checkpoint", dataset_id)
+        stored_offset, stored = self.load(dataset_id)
+        return ingest_result(stored, stored_offset, 0, error)
+
+
+_checkpoints: ApifyCheckpoints | None = None
+_checkpoints_lock = threading.Lock()
+
+
+def get_apify_checkpoints() -> ApifyCheckpoints:
+    global _checkpoints
+    with _checkpoints_lock:
+        if _checkpoints is None:
+            _checkpoints = ApifyCheckpoints(os.path.join(CACHE_DIR, "apify.sqlite"))
+        return _checkpoints
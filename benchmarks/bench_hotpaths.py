@@ -0,0 +1,242 @@
+"""
+Offline micro-benchmarks for the pure-Python hot paths in utils, prompting
+and trend_history, on synthetic data from 20 to 100k media items and long reports.
+Each case reports the fastest and median wall time over at least five
+rounds and the peak traced allocation of one extra round. --check compares
+the fastest round: it is the least disturbed by other load on the machine.
+
+    python benchmarks/bench_hotpaths.py                  # run and print
+    python benchmarks/bench_hotpaths.py --check          # fail on regression vs baseline
+    python benchmarks/bench_hotpaths.py --update-baseline
+    python benchmarks/bench_hotpaths.py -k keywords      # only matching cases
+
+Times are scaled by a fixed calibration loop, timed right around each case,
+so a baseline recorded on one machine stays meaningful on another and a
+machine that slows down mid-run does not fail the later cases; memory is
+compared as-is.
+"""
+import argparse
+import copy
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from array import array
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from canned import CANNED_RESULT  # noqa: E402
+from prompting import format_report, validate_result  # noqa: E402
+from trend_history import NAN, compute_momentum  # noqa: E402
+from utils import (  # noqa: E402
+    escape_markdown_v2,
+    extract_keywords,
+    split_message,
+    summarize_media_items,
+    summarize_user_media,
+)
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+SIZES = (20, 1_000, 10_000, 100_000)
+VOCABULARY = (
+    "ootd hijab pastel kondangan tutorial makeup natural kerja outfit kampus casual review skincare "
+    "lokal favorit batik modern mix match sneakers thrift vintage linen kebaya modest wear glowing "
+    "the and untuk dengan yang ini weekend sale promo diskon koleksi baru lebaran ramadan"
+).split()
+MOMENTUM_KEYWORDS = (1_000, 10_000)
+MOMENTUM_DAYS = 15
+HASHTAGS = ["#ootd", "#hijabstyle", "#fashion", "#ootdindo", "#skincare", "#batik", "#makeup", "#thrift"]
+
+
+def make_caption(rng: random.Random) -> str:
+    words = rng.choices(VOCABULARY, k=rng.randint(8, 30))
+    return " ".join(words) + " " + " ".join(rng.sample(HASHTAGS, 3)) + " ✨"
+
+
+def make_media(count: int, seed: int = 7) -> list[dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": str(17_900_000_000 + index),
+            "caption": make_caption(rng),
+            "media_type": rng.choice(("IMAGE", "VIDEO", "CAROUSEL_ALBUM")),
+            "timestamp": f"2026-10-{1 + index % 28:02d}T08:00:00+0000",
+            "like_count": rng.randint(10, 5_000),
+            "comments_count": rng.randint(0, 300),
+            "insights": {
+                "data": [
+                    {"name": "impressions", "values": [{"value": rng.randint(500, 90_000)}]},
+                    {"name": "reach", "values": [{"value": rng.randint(400, 60_000)}]},
+                ]
+            },
+        }
+        for index in range(count)
+    ]
+
+
+def make_long_result(avoid_items: int, text_len: int) -> dict[str, Any]:
+    result = copy.deepcopy(CANNED_RESULT)
+    filler = ("Konsep konten (versi panjang) - cocok untuk Reels & carousel! " * (text_len // 60 + 1))[:text_len]
+    for idea in result["content_ideas"]:
+        idea["concept_id"] = idea["concept_en"] = filler
+    for trend in result["top_trends"]:
+        trend["evidence"] = [{"source": "instagram", "metric": "median_likes", "value": "1.2k"}] * 2
+    result["avoid"] = [
+        {"name_id": f"Hindari {i}", "name_en": f"Avoid {i}", "reason_id": filler[:200], "reason_en": filler[:200]}
+        for i in range(avoid_items)
+    ]
+    return result
+
+
+def make_history(keywords: int, days: int = MOMENTUM_DAYS, seed: int = 7) -> tuple[list, list, list]:
+    """Per-day value/rank columns as TrendHistory.columns returns them, with ~10% gaps."""
+    rng = random.Random(seed)
+    keys = [("pinterest_growing", f"keyword {index}") for index in range(keywords)]
+    values, ranks = [], []
+    for _ in range(days):
+        values.append(array("d", (NAN if rng.random() < 0.1 else rng.uniform(10, 1_000) for _ in keys)))
+        ranks.append(array("d", (NAN if rng.random() < 0.1 else rng.randint(1, keywords) for _ in keys)))
+    return keys, values, ranks
+
+
+def build_cases() -> dict[str, Callable[[], Any]]:
+    cases: dict[str, Callable[[], Any]] = {}
+    for size in SIZES:
+        media = make_media(size)
+        captions = [item["caption"] for item in media]
+        cases[f"extract_keywords[{size}]"] = lambda captions=captions: extract_keywords(captions)
+        cases[f"summarize_media_items[{size}]"] = lambda media=media: summarize_media_items(media)
+        cases[f"summarize_user_media[{size}]"] = lambda media=media: summarize_user_media({"data": media})
+    for label, avoid_items, text_len in (("short", 2, 200), ("long", 200, 4_000)):
+        result = make_long_result(avoid_items, text_len)
+        report = format_report(result)
+        escaped = escape_markdown_v2(report)
+        cases[f"validate_result[{label}]"] = lambda result=result: validate_result(result)
+        cases[f"format_report[{label}]"] = lambda result=result: format_report(result)
+        cases[f"escape_markdown_v2[{label}]"] = lambda report=report: escape_markdown_v2(report)
+        marked = "\n".join(f"*{line}*" if line.isupper() else line for line in report.split("\n"))
+        cases[f"escape_markdown_v2_entities[{label}]"] = lambda marked=marked: escape_markdown_v2(marked, entities=True)
+        cases[f"split_message[{label}]"] = lambda escaped=escaped: split_message(escaped)
+    for keywords in MOMENTUM_KEYWORDS:
+        history = make_history(keywords)
+        cases[f"trend_momentum[{keywords}]"] = lambda history=history: compute_momentum(*history)
+    return cases
+
+
+def calibrate() -> float:
+    """Fastest time of a fixed pure-Python workload, used to normalise timings across machines."""
+
+    def workload() -> int:
+        total = 0
+        for i in range(200_000):
+            total += i % 7
+        return total
+
+    return min(timed_rounds(workload, min_rounds=9, max_rounds=9, min_time=0))
+
+
+def timed_rounds(
+    fn: Callable[[], Any],
+    min_rounds: int = 5,
+    max_rounds: int = 50,
+    min_time: float = 0.2,
+) -> list[float]:
+    samples: list[float] = []
+    started = time.perf_counter()
+    while len(samples) < min_rounds or (len(samples) < max_rounds and time.perf_counter() - started < min_time):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def peak_memory(fn: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(selected: dict[str, Callable[[], Any]]) -> dict[str, dict[str, float]]:
+    results = {}
+    for name, fn in selected.items():
+        fn()  # warm-up
+        before = calibrate()
+        samples = timed_rounds(fn)
+        results[name] = {
+            "calibration_s": min(before, calibrate()),
+            "median_s": statistics.median(samples),
+            "min_s": min(samples),
+            "rounds": len(samples),
+            "peak_kib": round(peak_memory(fn) / 1024, 1),
+        }
+        print(
+            f"{name:<42} median={results[name]['median_s'] * 1000:10.3f} ms  "
+            f"min={results[name]['min_s'] * 1000:10.3f} ms  peak={results[name]['peak_kib']:10.1f} KiB  "
+            f"rounds={len(samples)}"
+        )
+    return results
+
+
+def check(
+    results: dict[str, dict[str, float]],
+    calibration: float,
+    time_tolerance: float,
+    memory_tolerance: float,
+) -> int:
+    baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+    failures = []
+    for name, current in results.items():
+        expected = baseline["cases"].get(name)
+        if expected is None:
+            continue
+        scale = current["calibration_s"] / expected["calibration_s"]
+        # The absolute slack keeps microsecond-scale cases from failing on timer noise.
+        time_limit = expected["min_s"] * scale * time_tolerance + 0.0002
+        memory_limit = expected["peak_kib"] * memory_tolerance + 64
+        if current["min_s"] > time_limit:
+            failures.append(f"{name}: {current['min_s'] * 1000:.3f} ms > {time_limit * 1000:.3f} ms")
+        if current["peak_kib"] > memory_limit:
+            failures.append(f"{name}: {current['peak_kib']:.1f} KiB > {memory_limit:.1f} KiB")
+    print(f"calibration={calibration * 1000:.2f} ms (baseline {baseline['calibration_s'] * 1000:.2f} ms)")
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-k", dest="keyword", help="only run cases whose name contains this")
+    parser.add_argument("--check", action="store_true", help="compare against benchmarks/baseline.json")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--time-tolerance", type=float, default=1.5)
+    parser.add_argument("--memory-tolerance", type=float, default=1.25)
+    args = parser.parse_args()
+
+    cases = build_cases()
+    selected = {name: fn for name, fn in cases.items() if not args.keyword or args.keyword in name}
+    calibration = calibrate()
+    results = run(selected)
+
+    if args.update_baseline:
+        # Every case carries its own calibration, so a partial (-k) update keeps the others as they are.
+        baseline = {"calibration_s": calibration, "cases": {}}
+        if BASELINE_PATH.exists():
+            baseline["cases"] = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))["cases"]
+        baseline["cases"].update(results)
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"wrote {BASELINE_PATH}")
+    if args.check:
+        sys.exit(check(results, calibration, args.time_tolerance, args.memory_tolerance))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Per-invoke overhead of the orchestration pipeline, before and after the
+process-wide runtime. Upstream calls are replaced with in-memory fakes so
+only graph compilation, client construction and node dispatch are timed.
+
+    python benchmarks/bench_runtime.py [iterations]
+"""
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from canned import CANNED_RESULT  # noqa: E402
+from mcp_adapters import LocalMCP  # noqa: E402
+from orchestrator import OrchestrationRuntime, build_graph, initial_state  # noqa: E402
+
+
+class FakeOpenRouter:
+    def analyze_trends(self, prompt: str, model: str, system_prompt: str, **kwargs) -> str:
+        return json.dumps(CANNED_RESULT)
+
+
+def make_mcp() -> LocalMCP:
+    return LocalMCP(instagram=None, pinterest=None, apify=None)
+
+
+def per_message_build(message: str) -> str:
+    """What run_orchestration did before: new clients and a fresh compile per message."""
+    openrouter = FakeOpenRouter()
+    graph = build_graph().compile()
+    final_state = graph.invoke(initial_state(message, openrouter, None, "0", make_mcp()))
+    return final_state["response_text"]
+
+
+def timed(fn, iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn("ide konten hari ini")
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label: str, samples: list[float]) -> None:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{label:<24} mean={statistics.mean(samples):8.3f} ms  p50={statistics.median(samples):8.3f} ms  p95={p95:8.3f} ms")
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    runtime = OrchestrationRuntime(FakeOpenRouter(), None, "0", make_mcp())
+    runtime.run("warm-up")
+    per_message_build("warm-up")
+
+    report("compile per message", timed(per_message_build, iterations))
+    report("shared runtime", timed(runtime.run, iterations))
+
+
+if __name__ == "__main__":
+    main()
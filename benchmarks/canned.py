@@ -0,0 +1,36 @@
+"""Canned model output shared by the benchmarks and the fake upstream server; it passes validate_result."""
+
+CANNED_RESULT = {
+    "top_trends": [
+        {
+            "name_id": "Tren",
+            "name_en": "Trend",
+            "platform": "Instagram",
+            "urgency_score": 3,
+            "urgency_label_id": "minggu ini",
+            "urgency_label_en": "this week",
+            "fit_score": 7,
+            "evidence": [],
+            "content_angle_id": "Sudut",
+            "content_angle_en": "Angle",
+        }
+    ]
+    * 3,
+    "content_ideas": [
+        {
+            "title_id": "Ide",
+            "title_en": "Idea",
+            "platform": "Instagram",
+            "hook_id": "Hook",
+            "hook_en": "Hook",
+            "concept_id": "Konsep",
+            "concept_en": "Concept",
+            "effort": "Quick",
+            "hashtags": ["#ootd"],
+        }
+    ]
+    * 5,
+    "quick_win": {},
+    "avoid": [],
+    "insights": {},
+}
@@ -0,0 +1,347 @@
+"""
+Local stand-in for every upstream the bot talks to, for load tests that must
+not spend real quota. One HTTP server answers under path prefixes that match
+the *_BASE_URL overrides in config.py:
+
+    /graph       Instagram Graph API (paginated own media, ?ids= batches, profile,
+                 hashtags, business discovery)
+    /pinterest   Pinterest trends/keywords
+    /apify       Apify dataset items (honours offset/limit)
+    /openrouter  chat completions, plain and streamed
+    /telegram    sendMessage / editMessageText / getUpdates (replies are recorded)
+
+    python benchmarks/fake_upstreams.py --port 8900 --latency-ms 80 --llm-latency-ms 1500 \\
+        --error-rate 0.02 --rate-limit-rate 0.01
+
+Point the app at it with INSTAGRAM_BASE_URL=http://127.0.0.1:8900/graph and so on.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from canned import CANNED_RESULT  # noqa: E402
+
+CAPTIONS = [
+    "OOTD hijab pastel untuk kondangan #ootd #hijabstyle",
+    "Tutorial makeup natural buat kerja #makeup #beauty",
+    "Outfit kampus casual minggu ini #fashion #kampus",
+    "Review skincare lokal favorit #skincare #review",
+    "Mix and match batik modern #batik #ootdindo",
+]
+APIFY_DATASET_SIZE = 500
+USER_MEDIA_SIZE = 300
+# Own media is newest first, one post every six hours back from this instant.
+USER_MEDIA_NEWEST = 1_792_310_400
+
+
+def media_item(index: int) -> dict[str, Any]:
+    return {
+        "id": f"1790{index:08d}",
+        "caption": CAPTIONS[index % len(CAPTIONS)],
+        "media_type": ("IMAGE", "VIDEO", "CAROUSEL_ALBUM")[index % 3],
+        "media_url": f"https://example.invalid/media/{index}.jpg",
+        "permalink": f"https://example.invalid/p/{index}",
+        "timestamp": f"2026-10-{1 + index % 28:02d}T08:00:00+0000",
+        "like_count": 100 + (index * 37) % 900,
+        "comments_count": 5 + (index * 11) % 60,
+        "insights": {
+            "data": [
+                {"name": "impressions", "values": [{"value": 1000 + index * 13}]},
+                {"name": "reach", "values": [{"value": 800 + index * 7}]},
+            ]
+        },
+    }
+
+
+def user_media_page(query: dict[str, str], limit: int) -> dict[str, Any]:
+    offset = int(query.get("after", 0))
+    since = float(query.get("since", 0))
+    end = min(offset + limit, USER_MEDIA_SIZE)
+    items = []
+    for index in range(offset, end):
+        posted = USER_MEDIA_NEWEST - index * 6 * 3600
+        if posted <= since:
+            end = index
+            break
+        item = media_item(index)
+        item["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S+0000", time.gmtime(posted))
+        items.append(item)
+    page: dict[str, Any] = {"data": items, "paging": {"cursors": {"after": str(end)}}}
+    if end < USER_MEDIA_SIZE and len(items) == limit:
+        page["paging"]["next"] = f"/media?after={end}"
+    return page
+
+
+def completion(content: str) -> dict[str, Any]:
+    return {
+        "id": "gen-fake",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 1800, "completion_tokens": 600, "total_tokens": 2400},
+    }
+
+
+class Behaviour:
+    """Latency and failure knobs shared by every request handler."""
+
+    def __init__(
+        self,
+        latency_ms: float,
+        llm_latency_ms: float,
+        jitter: float,
+        error_rate: float,
+        rate_limit_rate: float,
+    ):
+        self.latency_ms = latency_ms
+        self.llm_latency_ms = llm_latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+
+    def delay(self, llm: bool) -> None:
+        base = self.llm_latency_ms if llm else self.latency_ms
+        time.sleep(max(0.0, base * random.uniform(1 - self.jitter, 1 + self.jitter)) / 1000)
+
+    def failure(self) -> int | None:
+        roll = random.random()
+        if roll < self.rate_limit_rate:
+            return 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 500
+        return None
+
+
+class TelegramLog:
+    """Messages the fake Telegram received, so a load generator can wait for replies."""
+
+    def __init__(self) -> None:
+        self.sent: dict[int, list[tuple[float, str]]] = defaultdict(list)
+        self._cond = threading.Condition()
+        self._message_id = 0
+
+    def record(self, chat_id: int, text: str) -> int:
+        with self._cond:
+            self._message_id += 1
+            self.sent[chat_id].append((time.monotonic(), text))
+            self._cond.notify_all()
+            return self._message_id
+
+    def wait_for(self, chat_id: int, count: int, timeout: float) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self.sent[chat_id]) >= count, timeout=timeout)
+
+    def count(self, chat_id: int) -> int:
+        with self._cond:
+            return len(self.sent[chat_id])
+
+    def message(self, chat_id: int, index: int) -> tuple[float, str]:
+        with self._cond:
+            return self.sent[chat_id][index]
+
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    server: "FakeUpstreamServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send_json(self, status: int, body: Any, headers: dict[str, str] | None = None) -> None:
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _read_json(self) -> dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _maybe_fail(self) -> bool:
+        status = self.server.behaviour.failure()
+        if status == 429:
+            self._send_json(429, {"error": {"message": "rate limited (fake)"}}, {"Retry-After": "1"})
+        elif status:
+            self._send_json(status, {"error": {"message": "upstream error (fake)"}})
+        return status is not None
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        prefix, _, rest = url.path.lstrip("/").partition("/")
+        if prefix == "telegram":
+            self._telegram(rest, query)
+            return
+        self.server.behaviour.delay(llm=False)
+        if self._maybe_fail():
+            return
+        if prefix == "graph":
+            self._send_json(200, self._graph(rest, query))
+        elif prefix == "pinterest":
+            trend_type = rest.rstrip("/").rsplit("/", 1)[-1]
+            trends = [
+                {"keyword": f"{trend_type} trend {i}", "pct_growth_wow": 40 - i, "pct_growth_mom": 80 - 2 * i}
+                for i in range(int(query.get("limit", 20)))
+            ]
+            self._send_json(200, {"trends": trends})
+        elif prefix == "apify":
+            offset, limit = int(query.get("offset", 0)), int(query.get("limit", 20))
+            items = [media_item(i) for i in range(offset, min(offset + limit, APIFY_DATASET_SIZE))]
+            self._send_json(200, items, {"X-Apify-Pagination-Total": str(APIFY_DATASET_SIZE)})
+        else:
+            self._send_json(404, {"error": "unknown path"})
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        prefix, _, rest = url.path.lstrip("/").partition("/")
+        body = self._read_json()
+        if prefix == "telegram":
+            self._telegram(rest, body)
+            return
+        if prefix != "openrouter" or not rest.startswith("chat/completions"):
+            self._send_json(404, {"error": "unknown path"})
+            return
+        self.server.behaviour.delay(llm=True)
+        if self._maybe_fail():
+            return
+        content = json.dumps(CANNED_RESULT)
+        if not body.get("stream"):
+            self._send_json(200, completion(content))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for start in range(0, len(content), 200):
+            event = {"choices": [{"delta": {"content": content[start:start + 200]}}]}
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def _graph(self, path: str, query: dict[str, str]) -> dict[str, Any]:
+        parts = path.strip("/").split("/")
+        limit = int(query.get("limit", 25))
+        if "ids" in query:
+            return {
+                media_id: {key: media_item(index)[key] for key in ("like_count", "comments_count", "insights")}
+                for index, media_id in enumerate(query["ids"].split(","))
+            }
+        if parts[0] == "ig_hashtag_search":
+            return {"data": [{"id": f"1784{zlib.crc32(query.get('q', '').encode()) % 10**8:08d}"}]}
+        if len(parts) == 2 and parts[1] == "media":
+            return user_media_page(query, limit)
+        if len(parts) == 2 and parts[1] in ("top_media", "recent_media"):
+            return {"data": [media_item(i) for i in range(limit)]}
+        fields = query.get("fields", "")
+        if fields.startswith("business_discovery"):
+            username = fields[fields.find("(") + 1:fields.find(")")]
+            return {
+                "business_discovery": {
+                    "username": username,
+                    "followers_count": 120_000,
+                    "media_count": 900,
+                    "media": {"data": [media_item(i) for i in range(12)]},
+                },
+                "id": parts[0],
+            }
+        return {
+            "id": parts[0],
+            "username": "fake_brand",
+            "biography": "Fake profile",
+            "followers_count": 42_000,
+            "media_count": 310,
+        }
+
+    def _telegram(self, path: str, body: dict[str, Any]) -> None:
+        method = path.rsplit("/", 1)[-1]
+        if method == "getUpdates":
+            time.sleep(min(float(body.get("timeout", 0) or 0), 1.0))
+            self._send_json(200, {"ok": True, "result": []})
+            return
+        if method in ("sendMessage", "editMessageText"):
+            chat_id = int(body.get("chat_id", 0))
+            if method == "sendMessage":
+                message_id = self.server.telegram.record(chat_id, str(body.get("text", "")))
+            else:
+                message_id = body.get("message_id")
+            self._send_json(200, {"ok": True, "result": {"message_id": message_id, "chat": {"id": chat_id}}})
+            return
+        self._send_json(200, {"ok": True, "result": True})
+
+
+class FakeUpstreamServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], behaviour: Behaviour):
+        super().__init__(address, FakeUpstreamHandler)
+        self.behaviour = behaviour
+        self.telegram = TelegramLog()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> dict[str, str]:
+        """Environment overrides that send every client to this server (which has no quota to protect)."""
+        return {
+            "RATE_LIMIT_ENABLED": "false",
+            "INSTAGRAM_BASE_URL": f"{self.base_url}/graph",
+            "PINTEREST_BASE_URL": f"{self.base_url}/pinterest",
+            "APIFY_BASE_URL": f"{self.base_url}/apify",
+            "OPENROUTER_BASE_URL": f"{self.base_url}/openrouter",
+            "TELEGRAM_BASE_URL": f"{self.base_url}/telegram",
+        }
+
+
+def start_server(behaviour: Behaviour, host: str = "127.0.0.1", port: int = 0) -> FakeUpstreamServer:
+    server = FakeUpstreamServer((host, port), behaviour)
+    threading.Thread(target=server.serve_forever, name="fake-upstreams", daemon=True).start()
+    return server
+
+
+def add_behaviour_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=80, help="mean latency of Graph/Pinterest/Apify calls")
+    parser.add_argument("--llm-latency-ms", type=float, default=1500, help="mean latency of chat completions")
+    parser.add_argument("--jitter", type=float, default=0.3, help="relative latency jitter (0.3 = +/-30%%)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of calls answered with 429")
+
+
+def behaviour_from_args(args: argparse.Namespace) -> Behaviour:
+    return Behaviour(args.latency_ms, args.llm_latency_ms, args.jitter, args.error_rate, args.rate_limit_rate)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_behaviour_args(parser)
+    args = parser.parse_args()
+    server = FakeUpstreamServer((args.host, args.port), behaviour_from_args(args))
+    for name, value in server.env().items():
+        print(f"{name}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Drive the webhook with N concurrent chats against the fake upstreams and
+report throughput and reply latency (update POST to first sendMessage the
+fake Telegram receives for that chat).
+
+    python benchmarks/load_webhook.py --chats 20 --messages 5 --llm-latency-ms 1500
+
+By default a uvicorn worker is spawned with every *_BASE_URL pointed at an
+in-process fake server and a throwaway CACHE_DIR. Pass --webhook to target a
+server you started yourself with the printed environment.
+"""
+import argparse
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from fake_upstreams import add_behaviour_args, behaviour_from_args, start_server  # noqa: E402
+from telegram_webhook import BUSY_TEXT  # noqa: E402
+from utils import escape_markdown_v2, percentile  # noqa: E402
+
+# The webhook sends BUSY_TEXT as MarkdownV2.
+BUSY_REPLY = escape_markdown_v2(BUSY_TEXT)
+FAKE_CREDENTIALS = {
+    "OPENROUTER_API_KEY": "fake",
+    "INSTAGRAM_ACCESS_TOKEN": "fake",
+    "INSTAGRAM_USER_ID": "17841400000000000",
+    "PINTEREST_ACCESS_TOKEN": "fake",
+    "APIFY_TOKEN": "fake",
+    "APIFY_DATASET_ID": "fake-dataset",
+    "TELEGRAM_BOT_TOKEN": "123456:fake",
+    "TELEGRAM_CHAT_ID": "",
+    "TELEGRAM_WEBHOOK_SECRET": "",
+}
+MESSAGES = ["ide konten hari ini", "tren hijab minggu ini", "what should I post today", "outfit kampus"]
+
+
+def spawn_webhook(env: dict[str, str], port: int, workdir: str) -> subprocess.Popen:
+    # Run from the throwaway directory so the worker's logs/ never lands in the checkout.
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "telegram_webhook:app",
+            "--app-dir", str(ROOT), "--port", str(port), "--log-level", "warning",
+        ],
+        cwd=workdir,
+        env={**os.environ, **env},
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/healthz", timeout=1)
+            return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.kill()
+    raise SystemExit("webhook did not start")
+
+
+def run_chat(chat_id: int, args: argparse.Namespace, server, update_ids, samples: list, lock: threading.Lock) -> None:
+    session = requests.Session()
+    for n in range(args.messages):
+        expected = server.telegram.count(chat_id) + 1
+        update = {
+            "update_id": next(update_ids),
+            "message": {
+                "message_id": n + 1,
+                "chat": {"id": chat_id, "type": "private"},
+                "text": MESSAGES[(chat_id + n) % len(MESSAGES)],
+            },
+        }
+        start = time.monotonic()
+        try:
+            resp = session.post(args.webhook, json=update, timeout=10)
+            resp.raise_for_status()
+            if not server.telegram.wait_for(chat_id, expected, timeout=args.timeout):
+                outcome, latency = "timeout", None
+            else:
+                sent_at, text = server.telegram.message(chat_id, expected - 1)
+                outcome = "busy" if text == BUSY_REPLY else "ok"
+                latency = sent_at - start
+        except Exception as exc:
+            # Counted rather than fatal: a dead thread would just shrink the report.
+            print(f"chat {chat_id} message {n + 1}: {exc!r}", file=sys.stderr)
+            outcome, latency = "error", None
+        # Let trailing parts of a multi-part reply land before the next message is counted.
+        time.sleep(args.think_time)
+        with lock:
+            samples.append((outcome, latency))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chats", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=3, help="messages per chat, sent one after another")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for each reply")
+    parser.add_argument("--think-time", type=float, default=0.2, help="pause between a reply and the next message")
+    parser.add_argument("--webhook", help="existing webhook URL; by default one is spawned")
+    parser.add_argument("--port", type=int, default=8765, help="port for the spawned webhook")
+    parser.add_argument("--fake-port", type=int, default=0, help="port for the fake upstreams (0 = any free port)")
+    add_behaviour_args(parser)
+    args = parser.parse_args()
+
+    server = start_server(behaviour_from_args(args), port=args.fake_port)
+    env = {**FAKE_CREDENTIALS, **server.env()}
+    process = None
+    with tempfile.TemporaryDirectory() as cache_dir:
+        if args.webhook is None:
+            process = spawn_webhook({**env, "CACHE_DIR": cache_dir}, args.port, cache_dir)
+            args.webhook = f"http://127.0.0.1:{args.port}/telegram/webhook"
+        else:
+            print("Start the webhook with:")
+            for name, value in env.items():
+                print(f"  {name}={value}")
+
+        samples: list[tuple[str, float | None]] = []
+        lock = threading.Lock()
+        update_ids = itertools.count(1)
+        threads = [
+            threading.Thread(target=run_chat, args=(1000 + i, args, server, update_ids, samples, lock))
+            for i in range(args.chats)
+        ]
+        start = time.monotonic()
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=10)
+        elapsed = time.monotonic() - start
+
+    latencies = [latency for outcome, latency in samples if outcome == "ok"]
+    counts = {outcome: sum(1 for o, _ in samples if o == outcome) for outcome in ("ok", "busy", "timeout", "error")}
+    print(
+        f"chats={args.chats} messages={len(samples)} elapsed={elapsed:.1f}s "
+        f"throughput={len(latencies) / elapsed:.2f} replies/s"
+    )
+    print(" ".join(f"{outcome}={count}" for outcome, count in counts.items()))
+    if latencies:
+        print(
+            "latency "
+            + " ".join(f"p{pct}={percentile(latencies, pct):.2f}s" for pct in (50, 95, 99))
+            + f" max={max(latencies):.2f}s"
+        )
+    if counts["error"]:
+        raise SystemExit(f"{counts['error']} messages failed")
+
+
+if __name__ == "__main__":
+    main()
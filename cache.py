@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+_MISSING = object()
+
+
+def make_key(namespace: str, *parts: Any) -> str:
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+class ResponseCache:
+    """
+    Two-level TTL cache: a bounded in-memory LRU in front of an optional
+    SQLite file, so entries survive restarts and are shared between the bot,
+    the webhook and the daily job. Values must be JSON-serializable.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        path: str | None = None,
+        max_entries: int = 512,
+        max_disk_entries: int = 5000,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+
+            value = self._disk_get(key, now)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            self._memory_put(key, expires_at, value)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at, now),
+                )
+                self._disk_evict(now)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM entries")
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else None,
+                "memory_entries": len(self._memory),
+            }
+
+    def _memory_put(self, key: str, expires_at: float, value: Any) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str, now: float) -> Any:
+        if self._conn is None:
+            return _MISSING
+        row = self._conn.execute(
+            "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return _MISSING
+        raw, expires_at = row
+        if expires_at <= now:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            return _MISSING
+        self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        value = json.loads(raw)
+        self._memory_put(key, expires_at, value)
+        return value
+
+    def _disk_evict(self, now: float) -> None:
+        assert self._conn is not None
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        if count <= self.max_disk_entries:
+            return
+        self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM entries WHERE key IN ("
+            "SELECT key FROM entries ORDER BY accessed_at "
+            "LIMIT MAX(0, (SELECT COUNT(*) FROM entries) - ?))",
+            (self.max_disk_entries,),
+        )
+
+
+_caches: dict[str, ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str, path: str | None = None, max_entries: int = 512) -> ResponseCache:
+    """Return the process-wide cache registered under `name`, creating it once."""
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = ResponseCache(name, path=path, max_entries=max_entries)
+            _caches[name] = cache
+        return cache
+
+
+def all_caches() -> list[ResponseCache]:
+    with _caches_lock:
+        return list(_caches.values())
@@ -8,16 +8,99 @@ TIMEZONE = ZoneInfo("Asia/Jakarta")
 DEFAULT_OPENROUTER_MODEL = "deepseek/deepseek-chat"
 FALLBACK_OPENROUTER_MODEL = "meta-llama/llama-3.1-8b-instruct:free"
 
+# sequential | hedge | race. Hedging starts the fallback once the primary is slower than its p95.
+MODEL_ROUTING_MODE = os.getenv("MODEL_ROUTING_MODE", "sequential").lower()
+MODEL_HEDGE_DELAY = float(os.getenv("MODEL_HEDGE_DELAY", "12"))
+MODEL_CIRCUIT_FAILURES = int(os.getenv("MODEL_CIRCUIT_FAILURES", "3"))
+MODEL_CIRCUIT_COOLDOWN = float(os.getenv("MODEL_CIRCUIT_COOLDOWN", "120"))
+
+# Estimated-token budget for the data section of summary/strategy prompts, per model.
+DEFAULT_PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+PROMPT_TOKEN_BUDGETS = {
+    DEFAULT_OPENROUTER_MODEL: DEFAULT_PROMPT_TOKEN_BUDGET,
+    FALLBACK_OPENROUTER_MODEL: min(DEFAULT_PROMPT_TOKEN_BUDGET, 4000),
+}
+
 PINTEREST_REGION = os.getenv("PINTEREST_REGION", "ID")
 INSTAGRAM_ACCOUNT_COUNTRY = os.getenv("INSTAGRAM_ACCOUNT_COUNTRY", "ID")
 USE_MCP = os.getenv("USE_MCP", "true").lower() == "true"
 GRAPH_API_VERSION = os.getenv("GRAPH_API_VERSION", "v19.0")
 
+# Upstream base URLs; override to point every client at a local stand-in (benchmarks/fake_upstreams.py).
+INSTAGRAM_BASE_URL = os.getenv("INSTAGRAM_BASE_URL", f"https://graph.facebook.com/{GRAPH_API_VERSION}").rstrip("/")
+PINTEREST_BASE_URL = os.getenv("PINTEREST_BASE_URL", "https://api.pinterest.com/v5").rstrip("/")
+APIFY_BASE_URL = os.getenv("APIFY_BASE_URL", "https://api.apify.com/v2").rstrip("/")
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1").rstrip("/")
+TELEGRAM_BASE_URL = os.getenv("TELEGRAM_BASE_URL", "https://api.telegram.org").rstrip("/")
+
 APIFY_DATASET_ID = os.getenv("APIFY_DATASET_ID", "")
 APIFY_ACTOR_ID = os.getenv("APIFY_ACTOR_ID", "")
 APIFY_TASK_ID = os.getenv("APIFY_TASK_ID", "")
+# Datasets are read page by page from a saved offset; each run reads at most APIFY_MAX_ITEMS_PER_RUN new items.
+APIFY_PAGE_SIZE = int(os.getenv("APIFY_PAGE_SIZE", "1000"))
+APIFY_MAX_ITEMS_PER_RUN = int(os.getenv("APIFY_MAX_ITEMS_PER_RUN", "10000"))
+# Stored keyword counts halve every APIFY_KEYWORD_HALF_LIFE_DAYS, so top keywords follow recent captions.
+APIFY_KEYWORD_HALF_LIFE_DAYS = float(os.getenv("APIFY_KEYWORD_HALF_LIFE_DAYS", "7"))
 TELEGRAM_WEBHOOK_URL = os.getenv("TELEGRAM_WEBHOOK_URL", "")
 TELEGRAM_WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET", "")
+WEBHOOK_MAX_WORKERS = int(os.getenv("WEBHOOK_MAX_WORKERS", "4"))
+WEBHOOK_MAX_QUEUE = int(os.getenv("WEBHOOK_MAX_QUEUE", "32"))
+# "threads" runs the blocking pipeline on worker threads; "async" runs it on the event loop.
+WEBHOOK_MODE = os.getenv("WEBHOOK_MODE", "threads").lower()
+# Stream a plain-text answer into Telegram as it is generated instead of sending the full JSON report.
+TELEGRAM_STREAMING = os.getenv("TELEGRAM_STREAMING", "false").lower() == "true"
+
+DATA_FETCH_WORKERS = int(os.getenv("DATA_FETCH_WORKERS", "8"))
+DATA_FETCH_TIMEOUT = float(os.getenv("DATA_FETCH_TIMEOUT", "45"))
+
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+INSTAGRAM_CACHE_ENABLED = os.getenv("INSTAGRAM_CACHE_ENABLED", "true").lower() == "true"
+INSTAGRAM_CACHE_MAX_ENTRIES = int(os.getenv("INSTAGRAM_CACHE_MAX_ENTRIES", "512"))
+INSTAGRAM_HASHTAG_WEEKLY_LIMIT = int(os.getenv("INSTAGRAM_HASHTAG_WEEKLY_LIMIT", "30"))
+# Own media is synced into a local store: the first run walks up to MAX_PAGES pages,
+# later runs only fetch newer posts and refresh insights of posts from the last few days.
+INSTAGRAM_MEDIA_PAGE_SIZE = int(os.getenv("INSTAGRAM_MEDIA_PAGE_SIZE", "50"))
+INSTAGRAM_MEDIA_MAX_PAGES = int(os.getenv("INSTAGRAM_MEDIA_MAX_PAGES", "20"))
+INSTAGRAM_MEDIA_SUMMARY_LIMIT = int(os.getenv("INSTAGRAM_MEDIA_SUMMARY_LIMIT", "200"))
+INSTAGRAM_INSIGHTS_REFRESH_DAYS = float(os.getenv("INSTAGRAM_INSIGHTS_REFRESH_DAYS", "7"))
+INSTAGRAM_INSIGHTS_REFRESH_TTL = int(os.getenv("INSTAGRAM_INSIGHTS_REFRESH_TTL", str(6 * 3600)))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(6 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "256"))
+
+# Token buckets shared by every process using CACHE_DIR; calls wait for a token
+# (at most RATE_LIMIT_MAX_WAIT seconds) instead of sleeping a fixed interval.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "30"))
+INSTAGRAM_CALLS_PER_HOUR = int(os.getenv("INSTAGRAM_CALLS_PER_HOUR", "200"))
+PINTEREST_CALLS_PER_HOUR = int(os.getenv("PINTEREST_CALLS_PER_HOUR", "1000"))
+
+# "off" always collects live data; "auto" serves from the daily snapshot while it is fresh.
+SNAPSHOT_MODE = os.getenv("SNAPSHOT_MODE", "off").lower()
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", os.path.join(CACHE_DIR, "snapshot.json"))
+SNAPSHOT_MAX_AGE_HOURS = float(os.getenv("SNAPSHOT_MAX_AGE_HOURS", "26"))
+
+# Daily Pinterest keyword / hashtag history; growth and rank changes over this window go into the prompt.
+TREND_HISTORY_DAYS = int(os.getenv("TREND_HISTORY_DAYS", "15"))
+TREND_MOMENTUM_TOP = int(os.getenv("TREND_MOMENTUM_TOP", "30"))
+
+# Emit one JSON log line per traced span (graph nodes, tool calls, upstream requests).
+TRACE_LOG_SPANS = os.getenv("TRACE_LOG_SPANS", "false").lower() == "true"
+
+# Seconds each Graph API endpoint may be served from cache.
+INSTAGRAM_CACHE_TTLS = {
+    "user_media": 3600,
+    "user_profile": 6 * 3600,
+    "hashtag_search": 7 * 24 * 3600,
+    "hashtag_top_media": 3 * 3600,
+    "hashtag_recent_media": 3600,
+    "business_discovery": 6 * 3600,
+}
 
 TRACKED_HASHTAGS = [
     "ootd",
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Hashable
+
+from utils import percentile
+
+logger = logging.getLogger(__name__)
+
+
+class ChatDispatcher:
+    """
+    Bounded executor for incoming updates.
+
+    At most `max_workers` updates run at once and at most `max_queue` wait;
+    `submit` returns False when the queue is full so the caller can reply
+    immediately instead of piling up work. Updates for the same chat run
+    one at a time in arrival order, and chats take turns on the workers.
+    """
+
+    def __init__(self, handler: Callable[[Any], None], max_workers: int, max_queue: int):
+        self.handler = handler
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.processed = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dispatch")
+        self._lock = threading.Lock()
+        self._queues: dict[Hashable, deque[tuple[float, Any]]] = {}
+        self._pending = 0
+        self._in_flight = 0
+        self._wait_times: deque[float] = deque(maxlen=1000)
+
+    def submit(self, key: Hashable, item: Any) -> bool:
+        with self._lock:
+            if self._pending >= self.max_queue:
+                self.rejected += 1
+                return False
+            queue = self._queues.get(key)
+            schedule = queue is None
+            if schedule:
+                queue = self._queues[key] = deque()
+            queue.append((time.monotonic(), item))
+            self._pending += 1
+        if schedule:
+            self._executor.submit(self._run_next, key)
+        return True
+
+    def _run_next(self, key: Hashable) -> None:
+        with self._lock:
+            enqueued_at, item = self._queues[key].popleft()
+            self._pending -= 1
+            self._in_flight += 1
+            wait = time.monotonic() - enqueued_at
+            self._wait_times.append(wait)
+            depth = self._pending
+        logger.info("Dispatching key=%s wait=%.3fs queue_depth=%s", key, wait, depth)
+        try:
+            self.handler(item)
+        except Exception:
+            logger.exception("Dispatched handler failed key=%s", key)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self.processed += 1
+                # Keep the chat's slot while it has work, but go to the back of
+                # the executor queue so other chats get a turn.
+                if self._queues[key]:
+                    reschedule = True
+                else:
+                    del self._queues[key]
+                    reschedule = False
+            if reschedule:
+                self._executor.submit(self._run_next, key)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            waits = list(self._wait_times)
+            return {
+                "queue_depth": self._pending,
+                "in_flight": self._in_flight,
+                "active_chats": len(self._queues),
+                "processed": self.processed,
+                "rejected": self.rejected,
+                "wait_p50_seconds": percentile(waits, 50),
+                "wait_p95_seconds": percentile(waits, 95),
+                "wait_max_seconds": max(waits) if waits else None,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+class AsyncChatDispatcher:
+    """
+    Event-loop counterpart of ChatDispatcher for coroutine handlers: the same
+    queue limit, per-chat ordering and stats, with `max_workers` bounding how
+    many handlers are awaited concurrently. Must be used from a single loop.
+    """
+
+    def __init__(self, handler: Callable[[Any], Awaitable[None]], max_workers: int, max_queue: int):
+        self.handler = handler
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.processed = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self._queues: dict[Hashable, deque[tuple[float, Any]]] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._pending = 0
+        self._in_flight = 0
+        self._wait_times: deque[float] = deque(maxlen=1000)
+
+    def submit(self, key: Hashable, item: Any) -> bool:
+        if self._pending >= self.max_queue:
+            self.rejected += 1
+            return False
+        queue = self._queues.get(key)
+        schedule = queue is None
+        if schedule:
+            queue = self._queues[key] = deque()
+        queue.append((time.monotonic(), item))
+        self._pending += 1
+        if schedule:
+            task = asyncio.ensure_future(self._drain(key))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _drain(self, key: Hashable) -> None:
+        queue = self._queues[key]
+        while queue:
+            async with self._semaphore:
+                enqueued_at, item = queue.popleft()
+                self._pending -= 1
+                self._in_flight += 1
+                wait = time.monotonic() - enqueued_at
+                self._wait_times.append(wait)
+                logger.info("Dispatching key=%s wait=%.3fs queue_depth=%s", key, wait, self._pending)
+                try:
+                    await self.handler(item)
+                except Exception:
+                    logger.exception("Dispatched handler failed key=%s", key)
+                finally:
+                    self._in_flight -= 1
+                    self.processed += 1
+        del self._queues[key]
+
+    def stats(self) -> dict[str, Any]:
+        waits = list(self._wait_times)
+        return {
+            "queue_depth": self._pending,
+            "in_flight": self._in_flight,
+            "active_chats": len(self._queues),
+            "processed": self.processed,
+            "rejected": self.rejected,
+            "wait_p50_seconds": percentile(waits, 50),
+            "wait_p95_seconds": percentile(waits, 95),
+            "wait_max_seconds": max(waits) if waits else None,
+        }
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable
+
+from config import CACHE_DIR, INSTAGRAM_HASHTAG_WEEKLY_LIMIT
+
+SEARCH_WINDOW_SECONDS = 7 * 24 * 3600
+
+logger = logging.getLogger(__name__)
+
+
+class HashtagQuotaExceeded(RuntimeError):
+    pass
+
+
+def normalize_hashtag(name: str) -> str:
+    return name.strip().lstrip("#").lower()
+
+
+class HashtagIndex:
+    """
+    Durable hashtag name -> Graph API ID index.
+
+    Hashtag IDs never change, so each name is searched at most once; names
+    that were not found are retried after a week. Every search is logged to
+    enforce Instagram's rolling limit of unique hashtag searches per 7 days
+    across all processes sharing the same file.
+    """
+
+    def __init__(self, path: str, weekly_limit: int = INSTAGRAM_HASHTAG_WEEKLY_LIMIT):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.weekly_limit = weekly_limit
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashtags ("
+            "name TEXT PRIMARY KEY, hashtag_id TEXT, resolved_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS searches (name TEXT NOT NULL, searched_at REAL NOT NULL)")
+
+    def lookup(self, name: str) -> tuple[bool, str | None]:
+        """Return (known, hashtag_id); a known name may map to None (not found)."""
+        name = normalize_hashtag(name)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hashtag_id, resolved_at FROM hashtags WHERE name = ?", (name,)
+            ).fetchone()
+        if row is None:
+            return False, None
+        hashtag_id, resolved_at = row
+        if hashtag_id is None and resolved_at < time.time() - SEARCH_WINDOW_SECONDS:
+            return False, None
+        return True, hashtag_id
+
+    def searched_recently(self, now: float | None = None) -> set[str]:
+        since = (now or time.time()) - SEARCH_WINDOW_SECONDS
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT name FROM searches WHERE searched_at > ?", (since,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def remaining_budget(self) -> int:
+        return max(0, self.weekly_limit - len(self.searched_recently()))
+
+    def resolve(self, name: str, search: Callable[[str], dict[str, Any]]) -> str | None:
+        name = normalize_hashtag(name)
+        known, hashtag_id = self.lookup(name)
+        if known:
+            return hashtag_id
+
+        self._reserve_search(name)
+        return self._store(name, search(name))
+
+    async def aresolve(self, name: str, search: Callable[[str], Awaitable[dict[str, Any]]]) -> str | None:
+        # The index is SQLite and the reservation can wait on the busy timeout,
+        # so every database step runs in a worker thread.
+        name = normalize_hashtag(name)
+        known, hashtag_id = await asyncio.to_thread(self.lookup, name)
+        if known:
+            return hashtag_id
+
+        await asyncio.to_thread(self._reserve_search, name)
+        result = await search(name)
+        return await asyncio.to_thread(self._store, name, result)
+
+    def _store(self, name: str, result: dict[str, Any]) -> str | None:
+        data = result.get("data", [])
+        hashtag_id = data[0].get("id") if data else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO hashtags (name, hashtag_id, resolved_at) VALUES (?, ?, ?)",
+                (name, hashtag_id, time.time()),
+            )
+        return hashtag_id
+
+    def _reserve_search(self, name: str) -> None:
+        # Check and record in one write transaction so concurrent processes
+        # cannot both spend the last slot of the weekly budget.
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT DISTINCT name FROM searches WHERE searched_at > ?",
+                    (now - SEARCH_WINDOW_SECONDS,),
+                ).fetchall()
+                recent = {row[0] for row in rows}
+                if name not in recent and len(recent) >= self.weekly_limit:
+                    raise HashtagQuotaExceeded(
+                        f"Weekly hashtag search limit reached ({self.weekly_limit} unique per 7 days)"
+                    )
+                self._conn.execute("INSERT INTO searches (name, searched_at) VALUES (?, ?)", (name, now))
+                self._conn.execute("DELETE FROM searches WHERE searched_at <= ?", (now - SEARCH_WINDOW_SECONDS,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        logger.info("Hashtag search #%s (budget left: %s)", name, self.weekly_limit - len(recent | {name}))
+
+
+_index: HashtagIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_hashtag_index() -> HashtagIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = HashtagIndex(os.path.join(CACHE_DIR, "hashtags.sqlite"))
+        return _index
@@ -1,42 +1,137 @@
+import asyncio
+import os
+from functools import partial
+
+import httpx
 import requests
 
-from config import GRAPH_API_VERSION
+from cache import ResponseCache, get_cache, make_key
+from config import (
+    CACHE_DIR,
+    INSTAGRAM_BASE_URL,
+    INSTAGRAM_CACHE_ENABLED,
+    INSTAGRAM_CACHE_MAX_ENTRIES,
+    INSTAGRAM_CACHE_TTLS,
+)
+from rate_limit import RateLimiter, get_rate_limiter
+from singleflight import SingleFlight
+from tracing import increment, span
+from transport import get_async_client, get_session, retry_count
+
+BASE_URL = INSTAGRAM_BASE_URL
+MEDIA_FIELDS = "id,caption,media_type,timestamp,like_count,comments_count"
+INSIGHT_METRICS = "impressions,reach,saved,shares"
+
+# Identical requests in flight at the same time (e.g. several chats asking at once) share one call.
+_flights = SingleFlight("instagram")
 
-BASE_URL = f"https://graph.facebook.com/{GRAPH_API_VERSION}"
+
+def instagram_response_cache() -> ResponseCache | None:
+    if not INSTAGRAM_CACHE_ENABLED:
+        return None
+    return get_cache(
+        "instagram",
+        path=os.path.join(CACHE_DIR, "instagram.sqlite"),
+        max_entries=INSTAGRAM_CACHE_MAX_ENTRIES,
+    )
 
 
 class InstagramClient:
-    def __init__(self, access_token: str):
+    def __init__(
+        self,
+        access_token: str,
+        session: requests.Session | None = None,
+        cache: ResponseCache | None = None,
+        limiter: RateLimiter | None = None,
+    ):
         self.access_token = access_token
+        self.session = session or get_session()
+        self.cache = cache if cache is not None else instagram_response_cache()
+        self.limiter = limiter if limiter is not None else get_rate_limiter("instagram")
+
+    def _cache_lookup(self, path: str, params: dict, endpoint: str | None) -> tuple[str | None, dict | None]:
+        ttl = INSTAGRAM_CACHE_TTLS.get(endpoint) if endpoint else None
+        if self.cache is None or not ttl:
+            return None, None
+        # The token is part of the hashed key, so it never lands on disk in clear.
+        key = make_key("instagram", path, params)
+        return key, self.cache.get(key)
+
+    def _cache_store(self, key: str | None, endpoint: str | None, data: dict) -> None:
+        if key is not None and endpoint:
+            self.cache.set(key, data, INSTAGRAM_CACHE_TTLS[endpoint])
 
-    def _get(self, path: str, params: dict) -> dict:
+    def _get(self, path: str, params: dict, endpoint: str | None = None) -> dict:
         url = f"{BASE_URL}{path}"
         params = {**params, "access_token": self.access_token}
-        resp = requests.get(url, params=params, timeout=30)
-        resp.raise_for_status()
-        return resp.json()
-
-    def get_user_media(self, user_id: str, limit: int = 30) -> dict:
-        fields = (
-            "id,caption,media_type,timestamp,like_count,comments_count,"
-            "insights.metric(impressions,reach,saved,shares)"
+        # Cache hits stay out of the span, so upstream_seconds only times real calls.
+        key, cached = self._cache_lookup(path, params, endpoint)
+        if cached is not None:
+            return cached
+        data, shared = _flights.do(
+            key or make_key("instagram", path, params),
+            partial(self._fetch, url, params, endpoint or "other"),
+            endpoint=endpoint or "other",
         )
-        return self._get(f"/{user_id}/media", {"fields": fields, "limit": limit})
+        if not shared:
+            self._cache_store(key, endpoint, data)
+        return data
+
+    def _fetch(self, url: str, params: dict, endpoint: str) -> dict:
+        # Waiting for a token is exported as rate_limit_wait_seconds, not upstream latency.
+        throttled = self.limiter.acquire() if self.limiter else 0.0
+        with span("upstream", upstream="instagram", endpoint=endpoint) as current:
+            current.set(throttled=round(throttled, 3))
+            resp = self.session.get(url, params=params, timeout=30)
+            retries = retry_count(resp)
+            current.set(status=resp.status_code, response_bytes=len(resp.content), retries=retries)
+            increment("upstream_retries_total", retries, upstream="instagram")
+            if self.limiter:
+                self.limiter.observe(resp.headers, resp.status_code, extra_calls=retries)
+            resp.raise_for_status()
+            return resp.json()
+
+    def get_user_media(
+        self,
+        user_id: str,
+        limit: int = 30,
+        after: str | None = None,
+        since: int | None = None,
+    ) -> dict:
+        params: dict = {"fields": f"{MEDIA_FIELDS},insights.metric({INSIGHT_METRICS})", "limit": limit}
+        if after:
+            params["after"] = after
+        if since:
+            params["since"] = since
+        return self._get(f"/{user_id}/media", params, endpoint="user_media")
+
+    def get_media_batch(self, media_ids: list[str]) -> dict:
+        """Current counts and insights for up to 50 media objects in one request, keyed by ID."""
+        fields = f"like_count,comments_count,insights.metric({INSIGHT_METRICS})"
+        return self._get("/", {"ids": ",".join(media_ids), "fields": fields}, endpoint="media_batch")
 
     def get_user_profile(self, user_id: str) -> dict:
         fields = "username,biography,followers_count,media_count"
-        return self._get(f"/{user_id}", {"fields": fields})
+        return self._get(f"/{user_id}", {"fields": fields}, endpoint="user_profile")
 
     def hashtag_search(self, hashtag: str, user_id: str) -> dict:
-        return self._get("/ig_hashtag_search", {"q": hashtag, "user_id": user_id})
+        return self._get("/ig_hashtag_search", {"q": hashtag, "user_id": user_id}, endpoint="hashtag_search")
 
     def hashtag_top_media(self, hashtag_id: str, user_id: str, limit: int = 15) -> dict:
         fields = "id,caption,media_type,media_url,permalink,like_count,comments_count,timestamp"
-        return self._get(f"/{hashtag_id}/top_media", {"user_id": user_id, "fields": fields, "limit": limit})
+        return self._get(
+            f"/{hashtag_id}/top_media",
+            {"user_id": user_id, "fields": fields, "limit": limit},
+            endpoint="hashtag_top_media",
+        )
 
     def hashtag_recent_media(self, hashtag_id: str, user_id: str, limit: int = 15) -> dict:
         fields = "id,caption,media_type,media_url,permalink,like_count,comments_count,timestamp"
-        return self._get(f"/{hashtag_id}/recent_media", {"user_id": user_id, "fields": fields, "limit": limit})
+        return self._get(
+            f"/{hashtag_id}/recent_media",
+            {"user_id": user_id, "fields": fields, "limit": limit},
+            endpoint="hashtag_recent_media",
+        )
 
     def business_discovery(self, user_id: str, username: str) -> dict:
         fields = (
@@ -44,4 +139,48 @@ class InstagramClient:
             "{followers_count,media_count,media"
             "{caption,like_count,comments_count,media_type,permalink,timestamp}}"
         )
-        return self._get(f"/{user_id}", {"fields": fields})
+        return self._get(f"/{user_id}", {"fields": fields}, endpoint="business_discovery")
+
+
+class AsyncInstagramClient(InstagramClient):
+    """Non-blocking InstagramClient: the same endpoint methods, each returning a coroutine."""
+
+    def __init__(
+        self,
+        access_token: str,
+        client: httpx.AsyncClient | None = None,
+        cache: ResponseCache | None = None,
+        limiter: RateLimiter | None = None,
+    ):
+        super().__init__(access_token, cache=cache, limiter=limiter)
+        self.client = client
+
+    async def _get(self, path: str, params: dict, endpoint: str | None = None) -> dict:
+        url = f"{BASE_URL}{path}"
+        params = {**params, "access_token": self.access_token}
+        # Cache hits stay out of the span, so upstream_seconds only times real calls.
+        # The cache is SQLite: reads and writes go to a worker thread, off the event loop.
+        key, cached = await asyncio.to_thread(self._cache_lookup, path, params, endpoint)
+        if cached is not None:
+            return cached
+        data, shared = await _flights.ado(
+            key or make_key("instagram", path, params),
+            partial(self._fetch, url, params, endpoint or "other"),
+            endpoint=endpoint or "other",
+        )
+        if not shared and key is not None:
+            await asyncio.to_thread(self._cache_store, key, endpoint, data)
+        return data
+
+    async def _fetch(self, url: str, params: dict, endpoint: str) -> dict:
+        throttled = await self.limiter.aacquire() if self.limiter else 0.0
+        with span("upstream", upstream="instagram", endpoint=endpoint) as current:
+            current.set(throttled=round(throttled, 3))
+            resp = await (self.client or get_async_client()).get(url, params=params, timeout=30)
+            retries = retry_count(resp)
+            current.set(status=resp.status_code, response_bytes=len(resp.content), retries=retries)
+            increment("upstream_retries_total", retries, upstream="instagram")
+            if self.limiter:
+                await self.limiter.aobserve(resp.headers, resp.status_code, extra_calls=retries)
+            resp.raise_for_status()
+            return resp.json()
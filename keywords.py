@@ -0,0 +1,150 @@
+import re
+import unicodedata
+from collections import Counter
+from itertools import islice
+from typing import Any, Iterable, Iterator
+
+STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "you", "your", "are", "but", "not",
+    "have", "has", "had", "was", "were", "from", "they", "their", "our", "out", "about",
+    "into", "what", "when", "where", "why", "how", "its", "it's", "a", "an", "to", "of",
+    "in", "on", "at", "by", "as", "or", "if", "is", "be", "been", "we", "us", "me", "my",
+    "yang", "dan", "untuk", "dengan", "ini", "itu", "kamu", "kalian", "kami", "kita",
+    "mereka", "dari", "ke", "di", "pada", "oleh", "sebagai", "atau", "jika", "adalah",
+    "sudah", "belum", "akan", "bisa", "dapat", "lagi", "juga", "lebih", "kurang",
+    "baru", "lama", "saja", "aja", "nih", "yah", "ya", "nggak", "tidak",
+}
+
+MIN_TOKEN_LENGTH = 3
+BATCH_SIZE = 64
+
+# Letters and digits in any script; emoji, punctuation and underscores separate
+# tokens. Hashtags lose their "#" when counted, mentions keep their "@".
+_TOKEN_RE = re.compile(r"[#@]?[^\W_]+")
+
+
+def normalize_text(text: str) -> str:
+    # Composed and decomposed accents ("café" vs "café") count as one word.
+    if not text.isascii():
+        text = unicodedata.normalize("NFC", text)
+    return text.lower()
+
+
+def tokenize(text: str) -> list[str]:
+    return [token.lstrip("#") for token in _TOKEN_RE.findall(normalize_text(text))]
+
+
+def _keep(token: str) -> bool:
+    return len(token) >= MIN_TOKEN_LENGTH and token not in STOPWORDS
+
+
+class KeywordCounter:
+    """
+    Incremental keyword counts for captions.
+
+    Captions can be fed one at a time or in batches as pages arrive, and
+    counters built from different sources are merged instead of re-tokenized.
+    Bigrams pair adjacent words; a stopword, hashtag or mention in between
+    breaks the pair.
+    """
+
+    def __init__(self, bigrams: bool = False):
+        self.unigrams: Counter[str] = Counter()
+        self.bigrams: Counter[str] | None = Counter() if bigrams else None
+        self.documents = 0
+
+    def add(self, text: str) -> None:
+        if not isinstance(text, str):
+            return  # same as update: missing captions are skipped, not counted
+        self.documents += 1
+        self._count(_TOKEN_RE.findall(normalize_text(text)))
+        if self.bigrams is not None:
+            self.bigrams.update(_iter_bigrams(text))
+
+    def _count(self, tokens: list[str]) -> None:
+        # Counting raw tokens in C and cleaning up only the distinct ones beats
+        # a Python-level check per token.
+        unigrams = self.unigrams
+        for token, count in Counter(tokens).items():
+            token = token.lstrip("#")
+            if _keep(token):
+                unigrams[token] += count
+
+    def update(self, texts: Iterable[str]) -> "KeywordCounter":
+        iterator = iter(texts)
+        # Tokenizing a joined batch is much cheaper than one regex call per
+        # caption; bounded batches keep memory flat for streamed input.
+        while batch := list(islice(iterator, BATCH_SIZE)):
+            batch = [text for text in batch if isinstance(text, str)]
+            self.documents += len(batch)
+            self._count(_TOKEN_RE.findall(normalize_text("\n".join(batch))))
+            if self.bigrams is not None:
+                for text in batch:
+                    self.bigrams.update(_iter_bigrams(text))
+        return self
+
+    def merge(self, other: "KeywordCounter") -> "KeywordCounter":
+        self.documents += other.documents
+        self.unigrams.update(other.unigrams)
+        if self.bigrams is not None and other.bigrams is not None:
+            self.bigrams.update(other.bigrams)
+        return self
+
+    def __iadd__(self, other: "KeywordCounter") -> "KeywordCounter":
+        return self.merge(other)
+
+    def top(self, n: int = 10, bigrams: bool = False) -> list[str]:
+        if not bigrams or self.bigrams is None:
+            return [word for word, _ in self.unigrams.most_common(n)]
+        combined = self.unigrams + self.bigrams
+        return [word for word, _ in combined.most_common(n)]
+
+    def top_bigrams(self, n: int = 10) -> list[str]:
+        if self.bigrams is None:
+            return []
+        return [phrase for phrase, _ in self.bigrams.most_common(n)]
+
+    def decay(self, factor: float, min_count: float = 0.0) -> "KeywordCounter":
+        """
+        Scale every count by `factor` and drop terms that fall below
+        `min_count`, so long-lived counters favour recent captions and shed
+        words nobody uses any more.
+        """
+        self.unigrams = _decayed(self.unigrams, factor, min_count)
+        if self.bigrams is not None:
+            self.bigrams = _decayed(self.bigrams, factor, min_count)
+        return self
+
+    def to_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {"documents": self.documents, "unigrams": dict(self.unigrams)}
+        if self.bigrams is not None:
+            data["bigrams"] = dict(self.bigrams)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "KeywordCounter":
+        counter = cls(bigrams="bigrams" in data)
+        counter.documents = int(data.get("documents", 0))
+        counter.unigrams.update(data.get("unigrams", {}))
+        if counter.bigrams is not None:
+            counter.bigrams.update(data.get("bigrams", {}))
+        return counter
+
+
+def _decayed(counts: Counter[str], factor: float, min_count: float) -> Counter[str]:
+    # Rounded so stored counters do not carry 17-digit floats.
+    return Counter(
+        {term: round(count * factor, 4) for term, count in counts.items() if count * factor >= min_count}
+    )
+
+
+def _iter_bigrams(text: str) -> Iterator[str]:
+    previous = None
+    for match in _TOKEN_RE.finditer(normalize_text(text)):
+        token = match.group()
+        if token[0] in "#@" or not _keep(token):
+            previous = None
+            continue
+        if previous is not None:
+            yield f"{previous} {token}"
+        previous = token
@@ -1,27 +1,43 @@
 import json
-import time
+import logging
+from functools import partial
 from typing import Any
 
 from dotenv import load_dotenv
-import requests
 
+from apify_client import ApifyClient
+from apify_ingest import unavailable_result
 from config import (
+    APIFY_DATASET_ID,
     TRACKED_HASHTAGS,
     COMPETITOR_ACCOUNTS,
     FALLBACK_TRENDS,
-    DEFAULT_OPENROUTER_MODEL,
-    FALLBACK_OPENROUTER_MODEL,
     PINTEREST_REGION,
+    TELEGRAM_BASE_URL,
     now_wib,
     load_env_config,
 )
+from hashtag_index import HashtagQuotaExceeded, get_hashtag_index
 from instagram_api import InstagramClient
+from mcp_adapters import LocalMCP
+from media_store import get_media_store
+from model_router import ModelRouter, default_router
 from pinterest_api import PinterestClient
 from openrouter_ai import OpenRouterClient
-from utils import summarize_media_items, summarize_user_media, escape_markdown_v2, split_message
+from snapshot import save_snapshot
+from trend_history import get_trend_history
+from transport import get_session
+from utils import (
+    summarize_competitor,
+    summarize_media_items,
+    summarize_user_media,
+    escape_markdown_v2,
+    split_message,
+)
 from prompting import (
     SYSTEM_PROMPT,
     build_strategy_prompt,
+    build_summary_prompt,
     build_repair_prompt,
     validate_result,
     format_report,
@@ -29,14 +45,14 @@ from prompting import (
 
 
 def telegram_send(bot_token: str, chat_id: str, text: str) -> None:
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+    url = f"{TELEGRAM_BASE_URL}/bot{bot_token}/sendMessage"
     payload = {
         "chat_id": chat_id,
         "text": text,
         "parse_mode": "MarkdownV2",
         "disable_web_page_preview": True,
     }
-    resp = requests.post(url, json=payload, timeout=30)
+    resp = get_session().post(url, json=payload, timeout=30)
     resp.raise_for_status()
 
 
@@ -50,15 +66,15 @@ def fetch_pinterest_trends(pinterest: PinterestClient) -> dict:
     return {"trends": combined, "source": "pinterest_api"}
 
 
-def summarize_competitor(raw: dict, username: str) -> dict[str, Any]:
-    business = raw.get("business_discovery", raw)
-    media_items = business.get("media", {}).get("data", []) if isinstance(business, dict) else []
-    return {
-        "username": business.get("username", username) if isinstance(business, dict) else username,
-        "followers_count": business.get("followers_count") if isinstance(business, dict) else None,
-        "media_count": business.get("media_count") if isinstance(business, dict) else None,
-        "media_summary": summarize_media_items(media_items, top_n_keywords=6),
-    }
+def write_snapshot(router: ModelRouter, instagram_user_id: str, data: dict[str, Any]) -> None:
+    try:
+        signals = json.loads(
+            router.complete(partial(build_summary_prompt, data), system_prompt=SYSTEM_PROMPT, temperature=0)
+        )
+    except Exception:
+        logging.getLogger(__name__).warning("Snapshot summary failed; saving data only", exc_info=True)
+        signals = None
+    save_snapshot(data, signals if isinstance(signals, dict) else None, instagram_user_id)
 
 
 def main() -> None:
@@ -79,6 +95,15 @@ def main() -> None:
         except Exception as exc:
             pinterest_trends = {"trends": FALLBACK_TRENDS, "source": f"fallback: {exc}"}
 
+    apify_trends: dict = {}
+    if env.apify_token:
+        try:
+            apify = ApifyClient(env.apify_token)
+            apify_trends = LocalMCP(instagram=None, pinterest=None, apify=apify).tool_apify_trends(APIFY_DATASET_ID)
+        except Exception as exc:
+            apify_trends = unavailable_result("Apify error", str(exc))
+
+    profile: dict = {}
     hashtag_data = []
     user_stats = {"note": "Instagram data not available"}
     competitor_data = []
@@ -86,17 +111,26 @@ def main() -> None:
     if env.instagram_access_token and env.instagram_user_id:
         try:
             instagram = InstagramClient(env.instagram_access_token)
-            media = instagram.get_user_media(env.instagram_user_id)
+            try:
+                profile = instagram.get_user_profile(env.instagram_user_id)
+            except Exception as exc:
+                profile = {"note": "Instagram profile error", "error": str(exc)}
+            media = get_media_store().refresh(instagram, env.instagram_user_id)
             user_stats = summarize_user_media(media)
 
+            hashtag_index = get_hashtag_index()
             hashtags = TRACKED_HASHTAGS[:6]
             for tag in hashtags:
-                result = instagram.hashtag_search(tag, env.instagram_user_id)
-                data = result.get("data", [])
-                if not data:
+                try:
+                    hashtag_id = hashtag_index.resolve(
+                        tag, lambda name: instagram.hashtag_search(name, env.instagram_user_id)
+                    )
+                except HashtagQuotaExceeded as exc:
+                    hashtag_data.append({"hashtag": tag, "note": "hashtag quota exhausted", "error": str(exc)})
+                    continue
+                if not hashtag_id:
                     hashtag_data.append({"hashtag": tag, "note": "not found"})
                     continue
-                hashtag_id = data[0].get("id")
                 top_media = instagram.hashtag_top_media(hashtag_id, env.instagram_user_id)
                 recent_media = instagram.hashtag_recent_media(hashtag_id, env.instagram_user_id)
                 hashtag_data.append(
@@ -106,8 +140,6 @@ def main() -> None:
                         "recent_summary": summarize_media_items(recent_media.get("data", [])[:20]),
                     }
                 )
-                time.sleep(1)
-
             for username in COMPETITOR_ACCOUNTS:
                 try:
                     competitor = instagram.business_discovery(env.instagram_user_id, username)
@@ -117,30 +149,51 @@ def main() -> None:
         except Exception as exc:
             user_stats = {"note": f"Instagram error: {exc}"}
 
-    prompt = build_strategy_prompt(
-        user_request="Daily trend report",
-        profile={},
-        user_stats=user_stats,
-        hashtag_data=hashtag_data,
-        pinterest_trends=pinterest_trends,
-        apify_trends={},
-        competitor_data=competitor_data,
-    )
+    collected = {
+        "profile": profile,
+        "user_stats": user_stats,
+        "instagram_hashtags": hashtag_data,
+        "pinterest_trends": pinterest_trends,
+        "apify_trends": apify_trends,
+        "competitors": competitor_data,
+    }
+    trend_momentum = None
+    try:
+        history = get_trend_history()
+        history.record_collected(collected)
+        trend_momentum = history.momentum()
+    except Exception:
+        logging.getLogger(__name__).exception("Failed to update trend history")
 
     ai = OpenRouterClient(env.openrouter_api_key)
+    router = default_router(ai)
     try:
-        analysis = ai.analyze_trends(prompt, model=DEFAULT_OPENROUTER_MODEL, system_prompt=SYSTEM_PROMPT)
+        write_snapshot(router, env.instagram_user_id, collected)
     except Exception:
-        try:
-            analysis = ai.analyze_trends(prompt, model=FALLBACK_OPENROUTER_MODEL, system_prompt=SYSTEM_PROMPT)
-        except Exception as exc:
-            error_text = f"Trend analysis failed: {exc}"
-            telegram_send(env.telegram_bot_token, env.telegram_chat_id, escape_markdown_v2(error_text))
-            raise
+        logging.getLogger(__name__).exception("Failed to write daily snapshot")
+
+    def prompt(model: str) -> str:
+        return build_strategy_prompt(
+            user_request="Daily trend report",
+            profile={},
+            user_stats=user_stats,
+            hashtag_data=hashtag_data,
+            pinterest_trends=pinterest_trends,
+            apify_trends={},
+            competitor_data=competitor_data,
+            model=model,
+            trend_momentum=trend_momentum,
+        )
+
+    try:
+        analysis = router.complete(prompt, system_prompt=SYSTEM_PROMPT)
+    except Exception as exc:
+        error_text = f"Trend analysis failed: {exc}"
+        telegram_send(env.telegram_bot_token, env.telegram_chat_id, escape_markdown_v2(error_text))
+        raise
 
     now = now_wib()
-    header = (
-        "DAILY TREND REPORT\n"
+    header = "*DAILY TREND REPORT*\n" + escape_markdown_v2(
         f"Date: {now.strftime('%A, %B %d, %Y')}\n"
         f"Time: {now.strftime('%H:%M')} WIB\n\n"
     )
@@ -150,24 +203,24 @@ def main() -> None:
         parsed = json.loads(analysis)
         if isinstance(parsed, dict):
             validate_result(parsed)
-            body = format_report(parsed)
         else:
-            body = analysis
+            parsed = None
     except (json.JSONDecodeError, ValueError):
-        repair_prompt = build_repair_prompt(analysis)
         try:
-            repaired = ai.analyze_trends(repair_prompt, model=DEFAULT_OPENROUTER_MODEL, system_prompt=SYSTEM_PROMPT)
+            repaired = router.complete(build_repair_prompt(analysis), system_prompt=SYSTEM_PROMPT)
             parsed = json.loads(repaired)
             if isinstance(parsed, dict):
                 validate_result(parsed)
-                body = format_report(parsed)
             else:
-                body = analysis
+                parsed = None
         except Exception:
-            body = analysis
+            parsed = None
 
-    message = header + body
-    safe_message = escape_markdown_v2(message)
+    # The only formatting is our own bold titles; everything from the model is escaped as plain text.
+    if parsed is not None:
+        safe_message = header + format_report(parsed, markdown=True)
+    else:
+        safe_message = header + escape_markdown_v2(analysis)
 
     for part in split_message(safe_message):
         telegram_send(env.telegram_bot_token, env.telegram_chat_id, part)
@@ -1,11 +1,34 @@
 from typing import Any
-import time
+import asyncio
 
 from config import PINTEREST_REGION, TRACKED_HASHTAGS
-from instagram_api import InstagramClient
-from pinterest_api import PinterestClient
-from apify_client import ApifyClient
-from utils import summarize_media_items, extract_keywords
+from instagram_api import AsyncInstagramClient, InstagramClient
+from pinterest_api import AsyncPinterestClient, PinterestClient
+from apify_client import ApifyClient, AsyncApifyClient
+from apify_ingest import ApifyCheckpoints, get_apify_checkpoints, unavailable_result
+from hashtag_index import HashtagIndex, HashtagQuotaExceeded, get_hashtag_index
+from tracing import traced
+from utils import summarize_media_items
+
+
+PINTEREST_TREND_TYPES = ["growing", "monthly"]
+
+
+def hashtag_result(tag: str, top_media: dict, recent_media: dict) -> dict[str, Any]:
+    return {
+        "hashtag": tag,
+        "top_summary": summarize_media_items(top_media.get("data", [])[:20]),
+        "recent_summary": summarize_media_items(recent_media.get("data", [])[:20]),
+    }
+
+
+def pinterest_result(pages: dict[str, dict]) -> dict[str, Any]:
+    combined = []
+    for trend_type, data in pages.items():
+        for trend in data.get("trends", []):
+            trend["trend_type"] = trend_type
+        combined.extend(data.get("trends", []))
+    return {"trends": combined, "source": "pinterest_api"}
 
 
 class LocalMCP:
@@ -16,11 +39,21 @@ class LocalMCP:
     swapped later for real MCP server calls (ig-mcp, google-news-trends-mcp, etc.).
     """
 
-    def __init__(self, instagram: InstagramClient | None, pinterest: PinterestClient | None, apify: ApifyClient | None):
+    def __init__(
+        self,
+        instagram: InstagramClient | None,
+        pinterest: PinterestClient | None,
+        apify: ApifyClient | None,
+        hashtags: HashtagIndex | None = None,
+        checkpoints: ApifyCheckpoints | None = None,
+    ):
         self.instagram = instagram
         self.pinterest = pinterest
         self.apify = apify
+        self.hashtags = hashtags or get_hashtag_index()
+        self.checkpoints = checkpoints or get_apify_checkpoints()
 
+    @traced("tool", tool="instagram_profile")
     def tool_instagram_profile(self, user_id: str) -> dict[str, Any]:
         if not self.instagram:
             return {"note": "Instagram client not configured"}
@@ -29,50 +62,107 @@ class LocalMCP:
         except Exception as exc:
             return {"note": "Instagram profile error", "error": str(exc)}
 
+    @traced("tool", tool="instagram_hashtags")
     def tool_instagram_hashtags(self, user_id: str, limit: int = 6) -> list[dict[str, Any]]:
         if not self.instagram:
             return []
         results = []
         for tag in TRACKED_HASHTAGS[:limit]:
             try:
-                search = self.instagram.hashtag_search(tag, user_id)
-                data = search.get("data", [])
-                if not data:
+                hashtag_id = self.hashtags.resolve(tag, lambda name: self.instagram.hashtag_search(name, user_id))
+                if not hashtag_id:
                     results.append({"hashtag": tag, "note": "not found"})
                     continue
-                hashtag_id = data[0].get("id")
                 top_media = self.instagram.hashtag_top_media(hashtag_id, user_id)
                 recent_media = self.instagram.hashtag_recent_media(hashtag_id, user_id)
-                results.append(
-                    {
-                        "hashtag": tag,
-                        "top_summary": summarize_media_items(top_media.get("data", [])[:20]),
-                        "recent_summary": summarize_media_items(recent_media.get("data", [])[:20]),
-                    }
-                )
+                results.append(hashtag_result(tag, top_media, recent_media))
+            except HashtagQuotaExceeded as exc:
+                results.append({"hashtag": tag, "note": "hashtag quota exhausted", "error": str(exc)})
             except Exception as exc:
                 results.append({"hashtag": tag, "note": "hashtag error", "error": str(exc)})
-            time.sleep(1)
         return results
 
+    @traced("tool", tool="pinterest_trends")
     def tool_pinterest_trends(self) -> dict[str, Any]:
         if not self.pinterest:
             return {"trends": [], "note": "Pinterest client not configured"}
         try:
-            combined = []
-            for trend_type in ["growing", "monthly"]:
-                data = self.pinterest.get_trends_keywords(region=PINTEREST_REGION, trend_type=trend_type)
-                for trend in data.get("trends", []):
-                    trend["trend_type"] = trend_type
-                combined.extend(data.get("trends", []))
-            return {"trends": combined, "source": "pinterest_api"}
+            pages = {
+                trend_type: self.pinterest.get_trends_keywords(region=PINTEREST_REGION, trend_type=trend_type)
+                for trend_type in PINTEREST_TREND_TYPES
+            }
+            return pinterest_result(pages)
+        except Exception as exc:
+            return {"trends": [], "note": "Pinterest error", "error": str(exc)}
+
+    @traced("tool", tool="apify_trends")
+    def tool_apify_trends(self, dataset_id: str) -> dict[str, Any]:
+        if not self.apify:
+            return unavailable_result("Apify client not configured")
+        if not dataset_id:
+            return unavailable_result("Apify dataset not configured")
+        return self.checkpoints.ingest(self.apify, dataset_id)
+
+
+class AsyncLocalMCP(LocalMCP):
+    """LocalMCP over the async clients; every tool is a coroutine with the same result shape."""
+
+    instagram: AsyncInstagramClient | None
+    pinterest: AsyncPinterestClient | None
+    apify: AsyncApifyClient | None
+
+    @traced("tool", tool="instagram_profile")
+    async def tool_instagram_profile(self, user_id: str) -> dict[str, Any]:
+        if not self.instagram:
+            return {"note": "Instagram client not configured"}
+        try:
+            return await self.instagram.get_user_profile(user_id)
+        except Exception as exc:
+            return {"note": "Instagram profile error", "error": str(exc)}
+
+    @traced("tool", tool="instagram_hashtags")
+    async def tool_instagram_hashtags(self, user_id: str, limit: int = 6) -> list[dict[str, Any]]:
+        if not self.instagram:
+            return []
+        results = []
+        for tag in TRACKED_HASHTAGS[:limit]:
+            try:
+                hashtag_id = await self.hashtags.aresolve(
+                    tag, lambda name: self.instagram.hashtag_search(name, user_id)
+                )
+                if not hashtag_id:
+                    results.append({"hashtag": tag, "note": "not found"})
+                    continue
+                top_media, recent_media = await asyncio.gather(
+                    self.instagram.hashtag_top_media(hashtag_id, user_id),
+                    self.instagram.hashtag_recent_media(hashtag_id, user_id),
+                )
+                results.append(hashtag_result(tag, top_media, recent_media))
+            except HashtagQuotaExceeded as exc:
+                results.append({"hashtag": tag, "note": "hashtag quota exhausted", "error": str(exc)})
+            except Exception as exc:
+                results.append({"hashtag": tag, "note": "hashtag error", "error": str(exc)})
+        return results
+
+    @traced("tool", tool="pinterest_trends")
+    async def tool_pinterest_trends(self) -> dict[str, Any]:
+        if not self.pinterest:
+            return {"trends": [], "note": "Pinterest client not configured"}
+        try:
+            responses = await asyncio.gather(
+                *(
+                    self.pinterest.get_trends_keywords(region=PINTEREST_REGION, trend_type=trend_type)
+                    for trend_type in PINTEREST_TREND_TYPES
+                )
+            )
+            return pinterest_result(dict(zip(PINTEREST_TREND_TYPES, responses)))
         except Exception as exc:
             return {"trends": [], "note": "Pinterest error", "error": str(exc)}
 
-    def tool_apify_trends(self, dataset_id: str, limit: int = 20) -> dict[str, Any]:
+    @traced("tool", tool="apify_trends")
+    async def tool_apify_trends(self, dataset_id: str) -> dict[str, Any]:
         if not self.apify:
-            return {"items": [], "note": "Apify client not configured"}
-        items = self.apify.get_dataset_items(dataset_id, limit=limit)
-        captions = [str(item.get("caption", "")) for item in items if isinstance(item, dict)]
-        keywords = extract_keywords(captions, top_n=10)
-        return {"items": items, "top_keywords": keywords}
+            return unavailable_result("Apify client not configured")
+        if not dataset_id:
+            return unavailable_result("Apify dataset not configured")
+        return await self.checkpoints.aingest(self.apify, dataset_id)
@@ -0,0 +1,360 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Generator
+
+from config import (
+    CACHE_DIR,
+    INSTAGRAM_INSIGHTS_REFRESH_DAYS,
+    INSTAGRAM_INSIGHTS_REFRESH_TTL,
+    INSTAGRAM_MEDIA_MAX_PAGES,
+    INSTAGRAM_MEDIA_PAGE_SIZE,
+    INSTAGRAM_MEDIA_SUMMARY_LIMIT,
+)
+from instagram_api import AsyncInstagramClient, InstagramClient
+from tracing import span
+
+# The Graph API accepts at most 50 IDs per ?ids= request.
+BATCH_LIMIT = 50
+# Graph API error for an object that does not exist (code 100, subcode 33).
+INVALID_PARAMETER = 100
+MISSING_OBJECT_SUBCODE = 33
+
+logger = logging.getLogger(__name__)
+
+# A sync written once for both clients: it yields requests (callables taking
+# the client) and is sent back their answers, or has their errors thrown in.
+Plan = Generator[Callable[[Any], Any], Any, Any]
+
+
+def media_epoch(item: dict[str, Any]) -> float | None:
+    try:
+        return datetime.strptime(item["timestamp"], "%Y-%m-%dT%H:%M:%S%z").timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def graph_error(exc: Exception) -> tuple[int | None, int | None]:
+    """(code, error_subcode) from a Graph API error body; (None, None) if there is none."""
+    try:
+        error = exc.response.json().get("error") or {}
+    except Exception:
+        return None, None
+    return error.get("code"), error.get("error_subcode")
+
+
+def missing_object(exc: Exception) -> bool:
+    """The API says the post does not exist (typically deleted after it was synced)."""
+    return graph_error(exc) == (INVALID_PARAMETER, MISSING_OBJECT_SUBCODE)
+
+
+def _step(plan: Plan, answer: Any, error: Exception | None) -> tuple[bool, Any]:
+    # StopIteration cannot cross a thread's future, so completion is returned as a flag.
+    try:
+        return False, plan.throw(error) if error is not None else plan.send(answer)
+    except StopIteration as stop:
+        return True, stop.value
+
+
+def run_plan(plan: Plan, client: InstagramClient) -> Any:
+    answer, error = None, None
+    while True:
+        done, request = _step(plan, answer, error)
+        if done:
+            return request
+        try:
+            answer, error = request(client), None
+        except Exception as exc:
+            answer, error = None, exc
+
+
+async def arun_plan(plan: Plan, client: AsyncInstagramClient) -> Any:
+    """run_plan for the async client; the plan's own steps are SQLite work and run off the event loop."""
+    answer, error = None, None
+    while True:
+        done, request = await asyncio.to_thread(_step, plan, answer, error)
+        if done:
+            return request
+        try:
+            answer, error = await request(client), None
+        except Exception as exc:
+            answer, error = None, exc
+
+
+def next_cursor(page: dict[str, Any]) -> str | None:
+    paging = page.get("paging") or {}
+    if not paging.get("next"):
+        return None
+    return (paging.get("cursors") or {}).get("after")
+
+
+class MediaStore:
+    """
+    Local copy of an account's own media and insights.
+
+    The first sync walks the cursor-paginated media edge once; if a run
+    fails partway, the next one resumes from the last cursor. Only once the
+    walk is complete do syncs switch to asking for posts newer than the
+    newest stored one, and re-read counts and insights of recent posts in
+    batches of 50, so a summary over hundreds of posts usually costs one or
+    two small requests. Posts the API reports as non-existent are dropped;
+    any other failed insights refresh only leaves counts stale for the next
+    run.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        page_size: int = INSTAGRAM_MEDIA_PAGE_SIZE,
+        max_pages: int = INSTAGRAM_MEDIA_MAX_PAGES,
+        refresh_days: float = INSTAGRAM_INSIGHTS_REFRESH_DAYS,
+        refresh_ttl: int = INSTAGRAM_INSIGHTS_REFRESH_TTL,
+        summary_limit: int = INSTAGRAM_MEDIA_SUMMARY_LIMIT,
+    ):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.refresh_days = refresh_days
+        self.refresh_ttl = refresh_ttl
+        self.summary_limit = summary_limit
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS media ("
+            "user_id TEXT NOT NULL, media_id TEXT NOT NULL, posted_at REAL, item TEXT NOT NULL, "
+            "insights_at REAL NOT NULL, PRIMARY KEY (user_id, media_id))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS media_posted ON media (user_id, posted_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS syncs (user_id TEXT PRIMARY KEY, synced_at REAL NOT NULL)"
+        )
+        # A row here is a first full walk that has not finished yet.
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS walks (user_id TEXT PRIMARY KEY, after TEXT, pages INTEGER NOT NULL)"
+        )
+
+    def latest(self, user_id: str) -> float | None:
+        """Posting time of the newest stored post, the lower bound for the next delta."""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(posted_at) FROM media WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0]
+
+    def pending_walk(self, user_id: str) -> tuple[str | None, int] | None:
+        """Cursor and page count of an unfinished full walk, if there is one."""
+        with self._lock:
+            row = self._conn.execute("SELECT after, pages FROM walks WHERE user_id = ?", (user_id,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def save_walk(self, user_id: str, after: str | None, pages: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO walks (user_id, after, pages) VALUES (?, ?, ?)", (user_id, after, pages)
+            )
+
+    def finish_walk(self, user_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM walks WHERE user_id = ?", (user_id,))
+
+    def sync_mode(self, user_id: str) -> str:
+        if self.pending_walk(user_id) is not None:
+            return "resume"
+        return "delta" if self.latest(user_id) is not None else "full"
+
+    def last_synced(self, user_id: str) -> float | None:
+        with self._lock:
+            row = self._conn.execute("SELECT synced_at FROM syncs WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else None
+
+    def media(self, user_id: str, limit: int | None = None) -> list[dict[str, Any]]:
+        """Stored posts, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item FROM media WHERE user_id = ? ORDER BY posted_at DESC LIMIT ?",
+                (user_id, -1 if limit is None else limit),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def result(self, user_id: str) -> dict[str, Any]:
+        """The stored posts in the shape of a media edge response."""
+        return {"data": self.media(user_id, limit=self.summary_limit)}
+
+    def upsert(self, user_id: str, items: list[dict[str, Any]], now: float | None = None) -> None:
+        now = now or time.time()
+        rows = [
+            (user_id, str(item["id"]), media_epoch(item), json.dumps(item), now)
+            for item in items
+            if item.get("id")
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO media (user_id, media_id, posted_at, item, insights_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def stale(self, user_id: str, now: float | None = None) -> list[str]:
+        """IDs of recent posts whose counts and insights are older than the refresh TTL."""
+        now = now or time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT media_id FROM media WHERE user_id = ? AND posted_at > ? AND insights_at < ? "
+                "ORDER BY posted_at DESC",
+                (user_id, now - self.refresh_days * 86400, now - self.refresh_ttl),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def apply_refresh(self, user_id: str, batch: dict[str, Any], now: float | None = None) -> int:
+        now = now or time.time()
+        updated = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for media_id, fields in batch.items():
+                    row = self._conn.execute(
+                        "SELECT item FROM media WHERE user_id = ? AND media_id = ?", (user_id, media_id)
+                    ).fetchone()
+                    if row is None or not isinstance(fields, dict):
+                        continue
+                    item = {**json.loads(row[0]), **fields, "id": media_id}
+                    self._conn.execute(
+                        "UPDATE media SET item = ?, insights_at = ? WHERE user_id = ? AND media_id = ?",
+                        (json.dumps(item), now, user_id, media_id),
+                    )
+                    updated += 1
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return updated
+
+    def forget(self, user_id: str, media_id: str, reason: Exception) -> None:
+        """Drop a post the API reports as non-existent, typically one deleted after it was synced."""
+        logger.info("Dropping media %s of %s: %s", media_id, user_id, reason)
+        with self._lock:
+            self._conn.execute("DELETE FROM media WHERE user_id = ? AND media_id = ?", (user_id, media_id))
+
+    def mark_synced(self, user_id: str, now: float | None = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO syncs (user_id, synced_at) VALUES (?, ?)", (user_id, now or time.time())
+            )
+
+    def absorb(self, user_id: str, page: dict[str, Any], since: float | None) -> tuple[int, str | None]:
+        """Store the new posts of one page; return their count and the cursor to continue with, if any."""
+        items = page.get("data", [])
+        fresh = [item for item in items if since is None or (media_epoch(item) or 0) > since]
+        self.upsert(user_id, fresh)
+        # Pages are newest first: once a page reaches stored posts the delta is complete.
+        if len(fresh) < len(items):
+            return len(fresh), None
+        return len(fresh), next_cursor(page)
+
+    def refresh(self, client: InstagramClient, user_id: str) -> dict[str, Any]:
+        with span("media_sync", sync=self.sync_mode(user_id)) as current:
+            return run_plan(self._sync_plan(user_id, current), client)
+
+    async def arefresh(self, client: AsyncInstagramClient, user_id: str) -> dict[str, Any]:
+        mode = await asyncio.to_thread(self.sync_mode, user_id)
+        with span("media_sync", sync=mode) as current:
+            return await arun_plan(self._sync_plan(user_id, current), client)
+
+    def refresh_insights(self, client: InstagramClient, user_id: str) -> int:
+        """Re-read counts and insights of stale recent posts; returns how many were updated."""
+        return run_plan(self._insights_plan(user_id), client)
+
+    async def arefresh_insights(self, client: AsyncInstagramClient, user_id: str) -> int:
+        return await arun_plan(self._insights_plan(user_id), client)
+
+    def _sync_plan(self, user_id: str, current: Any) -> Plan:
+        walk = self.pending_walk(user_id)
+        since = self.latest(user_id) if walk is None else None
+        if walk is None and since is None:
+            walk = (None, 0)
+            self.save_walk(user_id, None, 0)
+        after, pages = walk or (None, 0)
+        fetched = 0
+        try:
+            while pages < self.max_pages:
+                page = yield lambda client, after=after: client.get_user_media(
+                    user_id, limit=self.page_size, after=after, since=int(since) if since else None
+                )
+                pages += 1
+                count, after = self.absorb(user_id, page, since)
+                fetched += count
+                if after is None:
+                    break
+                if walk is not None:
+                    self.save_walk(user_id, after, pages)
+        except Exception as exc:
+            return self._fallback(user_id, exc)
+        if walk is not None:
+            # Complete, or as deep as max_pages allows: from now on only deltas.
+            self.finish_walk(user_id)
+        refreshed = yield from self._insights_plan(user_id)
+        self.mark_synced(user_id)
+        current.set(pages=pages, new=fetched, refreshed=refreshed)
+        return self.result(user_id)
+
+    def _insights_plan(self, user_id: str) -> Plan:
+        stale = self.stale(user_id)
+        refreshed = 0
+        for start in range(0, len(stale), BATCH_LIMIT):
+            batch = stale[start:start + BATCH_LIMIT]
+            try:
+                refreshed += self.apply_refresh(
+                    user_id, (yield lambda client, batch=batch: client.get_media_batch(batch))
+                )
+                continue
+            except Exception as exc:
+                if graph_error(exc)[0] != INVALID_PARAMETER:
+                    logger.warning("Insights refresh for %s failed, keeping stored counts: %s", user_id, exc)
+                    return refreshed
+            # The Graph API refuses a whole ?ids= request when one ID is gone, so find it ID by ID.
+            for media_id in batch:
+                try:
+                    refreshed += self.apply_refresh(
+                        user_id, (yield lambda client, media_id=media_id: client.get_media_batch([media_id]))
+                    )
+                except Exception as exc:
+                    if not missing_object(exc):
+                        logger.warning("Insights refresh for %s failed, keeping stored counts: %s", user_id, exc)
+                        return refreshed
+                    self.forget(user_id, media_id, exc)
+        return refreshed
+
+    def _fallback(self, user_id: str, exc: Exception) -> dict[str, Any]:
+        # A failed delta still leaves a usable (slightly stale) history; only
+        # an account that was never synced has nothing to fall back on.
+        if self.latest(user_id) is None:
+            raise exc
+        logger.warning("Media sync for %s failed, serving stored media: %s", user_id, exc)
+        return self.result(user_id)
+
+
+def sync_user_media(
+    client: InstagramClient, user_id: str, store: MediaStore | None = None
+) -> dict[str, Any] | Awaitable[dict[str, Any]]:
+    """Sync and return the account's media; a coroutine when the client is async."""
+    store = store or get_media_store()
+    if isinstance(client, AsyncInstagramClient):
+        return store.arefresh(client, user_id)
+    return store.refresh(client, user_id)
+
+
+_store: MediaStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_media_store() -> MediaStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MediaStore(os.path.join(CACHE_DIR, "media.sqlite"))
+        return _store
@@ -0,0 +1,109 @@
+"""
+Prometheus text exposition of the in-process tracing registry, cache
+statistics and dispatcher gauges. Everything is read at scrape time; the
+request path only pays for the span and counter updates in tracing.py.
+"""
+from typing import Any
+
+from cache import all_caches
+from tracing import Histogram, counters, histograms
+
+PREFIX = "brand_analytics_"
+QUANTILES = (50, 95, 99)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs: tuple[tuple[str, str], ...] | list[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram_lines(name: str, labels: tuple[tuple[str, str], ...], histogram: Histogram) -> list[str]:
+    snapshot = histogram.snapshot()
+    lines = [
+        f"{name}_bucket{_labels(list(labels) + [('le', _number(bound))])} {count}"
+        for bound, count in snapshot["buckets"]
+    ]
+    lines.append(f"{name}_sum{_labels(labels)} {_number(snapshot['sum'])}")
+    lines.append(f"{name}_count{_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+def _recent_lines(name: str, labels: tuple[tuple[str, str], ...], histogram: Histogram) -> list[str]:
+    # Quantiles cover the recent window; _sum and _count are cumulative, as a summary's are.
+    snapshot = histogram.snapshot()
+    lines = [
+        f"{name}_recent{_labels(list(labels) + [('quantile', str(pct / 100))])} {_number(snapshot[f'p{pct}'])}"
+        for pct in QUANTILES
+        if snapshot[f"p{pct}"] is not None
+    ]
+    lines.append(f"{name}_recent_sum{_labels(labels)} {_number(snapshot['sum'])}")
+    lines.append(f"{name}_recent_count{_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+def _family(lines: list[str], metric: str, kind: str, samples: list[str]) -> None:
+    """Append a metric family, or nothing at all when it has no samples."""
+    if samples:
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.extend(samples)
+
+
+def render(gauges: dict[str, float | int | None] | None = None) -> str:
+    """All metrics in Prometheus text format; `gauges` adds point-in-time values such as queue depth."""
+    lines: list[str] = []
+
+    by_name: dict[str, list[tuple[tuple[tuple[str, str], ...], Histogram]]] = {}
+    for (name, labels), histogram in sorted(histograms().items()):
+        by_name.setdefault(PREFIX + name, []).append((labels, histogram))
+    for name, series in by_name.items():
+        buckets = [line for labels, histogram in series for line in _histogram_lines(name, labels, histogram)]
+        recent = [line for labels, histogram in series for line in _recent_lines(name, labels, histogram)]
+        _family(lines, name, "histogram", buckets)
+        _family(lines, f"{name}_recent", "summary", recent)
+
+    typed: set[str] = set()
+    for (name, labels), value in sorted(counters().items()):
+        metric = PREFIX + name
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} counter")
+            typed.add(metric)
+        lines.append(f"{metric}{_labels(labels)} {_number(value)}")
+
+    caches = [cache.stats() for cache in all_caches()]
+    for field, kind in (("hits", "counter"), ("misses", "counter"), ("hit_ratio", "gauge"), ("memory_entries", "gauge")):
+        metric = f"{PREFIX}cache_{field}" + ("_total" if kind == "counter" else "")
+        samples = [
+            f"{metric}{_labels([('cache', stats['name'])])} {_number(stats[field])}"
+            for stats in caches
+            if stats[field] is not None
+        ]
+        _family(lines, metric, kind, samples)
+
+    for name, value in sorted((gauges or {}).items()):
+        if value is None:
+            continue
+        metric = PREFIX + name
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def dispatcher_gauges(stats: dict[str, Any]) -> dict[str, float | int | None]:
+    return {
+        "webhook_queue_depth": stats["queue_depth"],
+        "webhook_in_flight": stats["in_flight"],
+        "webhook_active_chats": stats["active_chats"],
+        "webhook_wait_p50_seconds": stats["wait_p50_seconds"],
+        "webhook_wait_p95_seconds": stats["wait_p95_seconds"],
+    }
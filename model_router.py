@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+from config import (
+    DEFAULT_OPENROUTER_MODEL,
+    FALLBACK_OPENROUTER_MODEL,
+    MODEL_CIRCUIT_COOLDOWN,
+    MODEL_CIRCUIT_FAILURES,
+    MODEL_HEDGE_DELAY,
+    MODEL_ROUTING_MODE,
+)
+from utils import percentile
+
+logger = logging.getLogger(__name__)
+
+Prompt = str | Callable[[str], str]
+
+
+class ModelHealth:
+    def __init__(self, window: int = 50):
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+
+class ModelRouter:
+    """
+    Completion calls over an ordered list of models (primary first).
+
+    Modes:
+    - "sequential" (default): try models in order, moving on only after a
+      failure, so the primary's answer is always used when it has one.
+    - "hedge": start the primary; if it has not answered after the hedge
+      delay (its observed p95 latency once known, else MODEL_HEDGE_DELAY),
+      also start the next model. The first successful answer wins, even if
+      it is the fallback's; the losers are cancelled.
+    - "race": start every model at once; the first successful answer wins.
+
+    Models that fail MODEL_CIRCUIT_FAILURES times in a row are skipped for
+    MODEL_CIRCUIT_COOLDOWN seconds, unless every model is in that state.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        models: list[str],
+        mode: str = MODEL_ROUTING_MODE,
+        hedge_delay: float = MODEL_HEDGE_DELAY,
+        failure_threshold: int = MODEL_CIRCUIT_FAILURES,
+        cooldown: float = MODEL_CIRCUIT_COOLDOWN,
+    ):
+        self.client = client
+        self.models = models
+        self.mode = mode
+        self.hedge_delay = hedge_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.health = {model: ModelHealth() for model in models}
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+
+    def candidates(self) -> list[str]:
+        now = time.monotonic()
+        with self._lock:
+            closed = [model for model in self.models if self.health[model].open_until <= now]
+        return closed or list(self.models)
+
+    def delay_for(self, model: str) -> float:
+        with self._lock:
+            samples = list(self.health[model].latencies)
+        if len(samples) < 5:
+            return self.hedge_delay
+        return max(0.5, min(percentile(samples, 95) or self.hedge_delay, self.hedge_delay * 4))
+
+    def record(self, model: str, elapsed: float, ok: bool) -> None:
+        with self._lock:
+            health = self.health[model]
+            if ok:
+                health.latencies.append(elapsed)
+                health.successes += 1
+                health.consecutive_failures = 0
+                health.open_until = 0.0
+                return
+            health.failures += 1
+            health.consecutive_failures += 1
+            if health.consecutive_failures >= self.failure_threshold:
+                health.open_until = time.monotonic() + self.cooldown
+                logger.warning("Circuit open for model=%s for %.0fs", model, self.cooldown)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                model: {
+                    "successes": health.successes,
+                    "failures": health.failures,
+                    "p50_seconds": percentile(list(health.latencies), 50),
+                    "p95_seconds": percentile(list(health.latencies), 95),
+                    "circuit_open": health.open_until > now,
+                }
+                for model, health in self.health.items()
+            }
+
+    def _call(self, model: str, prompt: Prompt, system_prompt: str, kwargs: dict[str, Any]) -> str:
+        text = prompt(model) if callable(prompt) else prompt
+        start = time.monotonic()
+        try:
+            result = self.client.analyze_trends(text, model=model, system_prompt=system_prompt, **kwargs)
+        except Exception:
+            self.record(model, time.monotonic() - start, ok=False)
+            raise
+        self.record(model, time.monotonic() - start, ok=True)
+        return result
+
+    def complete(self, prompt: Prompt, system_prompt: str, **kwargs: Any) -> str:
+        """`prompt` may be a callable taking the model name, for per-model prompt budgets."""
+        models = self.candidates()
+        if self.mode == "sequential" or len(models) == 1:
+            last_exc: Exception | None = None
+            for model in models:
+                try:
+                    return self._call(model, prompt, system_prompt, kwargs)
+                except Exception as exc:
+                    last_exc = exc
+            raise last_exc or RuntimeError("No models configured")
+
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="model")
+        pending: dict[Future, str] = {}
+        remaining = list(models)
+        last_exc = None
+
+        def launch() -> None:
+            model = remaining.pop(0)
+            pending[self._executor.submit(self._call, model, prompt, system_prompt, kwargs)] = model
+
+        launch()
+        if self.mode == "race":
+            while remaining:
+                launch()
+        try:
+            while pending:
+                timeout = self.delay_for(pending[next(iter(pending))]) if remaining else None
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    logger.info("Hedging: %s slow, also trying %s", list(pending.values()), remaining[0])
+                    launch()
+                    continue
+                for future in done:
+                    model = pending.pop(future)
+                    exc = future.exception()
+                    if exc is None:
+                        return future.result()
+                    last_exc = exc
+                    logger.warning("Model %s failed: %s", model, exc)
+                if not pending and remaining:
+                    launch()
+        finally:
+            # A call already running in a worker cannot be interrupted; cancel
+            # what has not started and drop the rest of the answers.
+            for future in pending:
+                future.cancel()
+        raise last_exc or RuntimeError("No models configured")
+
+    async def acomplete(self, prompt: Prompt, system_prompt: str, **kwargs: Any) -> str:
+        """Same routing for an async client whose analyze_trends is a coroutine."""
+        models = self.candidates()
+
+        async def call(model: str) -> str:
+            text = prompt(model) if callable(prompt) else prompt
+            start = time.monotonic()
+            try:
+                result = await self.client.analyze_trends(text, model=model, system_prompt=system_prompt, **kwargs)
+            except Exception:
+                self.record(model, time.monotonic() - start, ok=False)
+                raise
+            self.record(model, time.monotonic() - start, ok=True)
+            return result
+
+        if self.mode == "sequential" or len(models) == 1:
+            last_exc: Exception | None = None
+            for model in models:
+                try:
+                    return await call(model)
+                except Exception as exc:
+                    last_exc = exc
+            raise last_exc or RuntimeError("No models configured")
+
+        pending: dict[asyncio.Task, str] = {}
+        remaining = list(models)
+        last_exc = None
+
+        def launch() -> None:
+            model = remaining.pop(0)
+            pending[asyncio.ensure_future(call(model))] = model
+
+        launch()
+        if self.mode == "race":
+            while remaining:
+                launch()
+        try:
+            while pending:
+                timeout = self.delay_for(pending[next(iter(pending))]) if remaining else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.info("Hedging: %s slow, also trying %s", list(pending.values()), remaining[0])
+                    launch()
+                    continue
+                for task in done:
+                    model = pending.pop(task)
+                    exc = task.exception()
+                    if exc is None:
+                        return task.result()
+                    last_exc = exc
+                    logger.warning("Model %s failed: %s", model, exc)
+                if not pending and remaining:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise last_exc or RuntimeError("No models configured")
+
+
+def default_router(client: Any) -> ModelRouter:
+    return ModelRouter(client, [DEFAULT_OPENROUTER_MODEL, FALLBACK_OPENROUTER_MODEL])
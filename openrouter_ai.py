@@ -1,20 +1,98 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Any, Iterable, Iterator
+
+import httpx
 import requests
 
-BASE_URL = "https://openrouter.ai/api/v1"
+from cache import ResponseCache, get_cache, make_key
+from config import CACHE_DIR, LLM_CACHE_ENABLED, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL, OPENROUTER_BASE_URL
+from tracing import Span, increment, observe, span
+from transport import get_async_client, get_session, retry_count
+
+BASE_URL = OPENROUTER_BASE_URL
+
+
+def iter_sse_content(lines: Iterable[str]) -> Iterator[str]:
+    """Yield content deltas from an OpenAI-style server-sent event stream."""
+    for line in lines:
+        if not line or not line.startswith("data:"):
+            continue  # blank separators and ": keep-alive" comments
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        try:
+            event = json.loads(data)
+        except ValueError:
+            continue
+        if "error" in event:
+            raise RuntimeError(f"OpenRouter stream error: {event['error']}")
+        for choice in event.get("choices", []):
+            content = (choice.get("delta") or {}).get("content")
+            if content:
+                yield content
+
+
+def record_usage(current: Span, model: str, data: dict[str, Any]) -> None:
+    """Copy the token usage OpenRouter reports into the span and the per-model token counters."""
+    usage = data.get("usage") or {}
+    for kind in ("prompt", "completion"):
+        tokens = usage.get(f"{kind}_tokens")
+        if tokens:
+            current.set(**{f"{kind}_tokens": tokens})
+            increment("llm_tokens_total", tokens, model=model, kind=kind)
+
+
+def llm_response_cache() -> ResponseCache | None:
+    if not LLM_CACHE_ENABLED:
+        return None
+    return get_cache(
+        "openrouter",
+        path=os.path.join(CACHE_DIR, "openrouter.sqlite"),
+        max_entries=LLM_CACHE_MAX_ENTRIES,
+    )
 
 
 class OpenRouterClient:
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        session: requests.Session | None = None,
+        cache: ResponseCache | None = None,
+        cache_ttl: int = LLM_CACHE_TTL,
+    ):
         self.api_key = api_key
+        self.session = session or get_session()
+        self.cache = cache if cache is not None else llm_response_cache()
+        self.cache_ttl = cache_ttl
 
-    def analyze_trends(
+    def _cache_key(
         self,
         prompt: str,
         model: str,
         system_prompt: str,
-        max_tokens: int = 3000,
-        temperature: float = 0.7,
-    ) -> str:
+        max_tokens: int,
+        temperature: float,
+        cache_key: str | None,
+    ) -> str | None:
+        # Only deterministic calls are cached: a sampled answer is one draw for
+        # one user and must not be handed to everyone sending similar input.
+        if self.cache is None or self.cache_ttl <= 0 or temperature > 0:
+            return None
+        content_key = cache_key or hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return make_key("openrouter", model, system_prompt, content_key, temperature, max_tokens)
+
+    def _request(
+        self,
+        prompt: str,
+        model: str,
+        system_prompt: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> tuple[str, dict[str, str], dict[str, Any]]:
         url = f"{BASE_URL}/chat/completions"
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -29,7 +107,112 @@ class OpenRouterClient:
             "temperature": temperature,
             "max_tokens": max_tokens,
         }
-        resp = requests.post(url, headers=headers, json=payload, timeout=60)
-        resp.raise_for_status()
-        data = resp.json()
-        return data["choices"][0]["message"]["content"].strip()
+        return url, headers, payload
+
+    def _finish(self, key: str | None, data: dict[str, Any]) -> str:
+        content = data["choices"][0]["message"]["content"].strip()
+        if key is not None and content:
+            self.cache.set(key, content, self.cache_ttl)
+        return content
+
+    def analyze_trends(
+        self,
+        prompt: str,
+        model: str,
+        system_prompt: str,
+        max_tokens: int = 3000,
+        temperature: float = 0.7,
+        cache_key: str | None = None,
+    ) -> str:
+        """
+        Return the completion for `prompt`. Responses are cached by model,
+        system prompt, prompt hash and sampling parameters; pass `cache_key`
+        to key on a normalized form of the request instead of the prompt.
+        """
+        key = self._cache_key(prompt, model, system_prompt, max_tokens, temperature, cache_key)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        with span("upstream", upstream="openrouter", model=model) as current:
+            current.set(prompt_chars=len(prompt))
+            url, headers, payload = self._request(prompt, model, system_prompt, max_tokens, temperature)
+            resp = self.session.post(url, headers=headers, json=payload, timeout=60)
+            current.set(status=resp.status_code, response_bytes=len(resp.content), retries=retry_count(resp))
+            resp.raise_for_status()
+            data = resp.json()
+            record_usage(current, model, data)
+            return self._finish(key, data)
+
+    def stream_completion(
+        self,
+        prompt: str,
+        model: str,
+        system_prompt: str,
+        max_tokens: int = 3000,
+        temperature: float = 0.7,
+    ) -> Iterator[str]:
+        """Yield the completion incrementally as OpenRouter streams it; the full text is cached at the end."""
+        key = self._cache_key(prompt, model, system_prompt, max_tokens, temperature, None)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        url, headers, payload = self._request(prompt, model, system_prompt, max_tokens, temperature)
+        payload["stream"] = True
+        parts = []
+        # Timed by hand: a span's context would leak into the caller between yields.
+        start = time.perf_counter()
+        with self.session.post(url, headers=headers, json=payload, timeout=60, stream=True) as resp:
+            resp.raise_for_status()
+            resp.encoding = "utf-8"
+            for content in iter_sse_content(resp.iter_lines(decode_unicode=True)):
+                parts.append(content)
+                yield content
+        observe("upstream_seconds", time.perf_counter() - start, upstream="openrouter", model=model)
+        text = "".join(parts).strip()
+        if key is not None and text:
+            self.cache.set(key, text, self.cache_ttl)
+
+
+class AsyncOpenRouterClient(OpenRouterClient):
+    def __init__(
+        self,
+        api_key: str,
+        client: httpx.AsyncClient | None = None,
+        cache: ResponseCache | None = None,
+        cache_ttl: int = LLM_CACHE_TTL,
+    ):
+        super().__init__(api_key, cache=cache, cache_ttl=cache_ttl)
+        self.client = client
+
+    async def analyze_trends(
+        self,
+        prompt: str,
+        model: str,
+        system_prompt: str,
+        max_tokens: int = 3000,
+        temperature: float = 0.7,
+        cache_key: str | None = None,
+    ) -> str:
+        key = self._cache_key(prompt, model, system_prompt, max_tokens, temperature, cache_key)
+        if key is not None:
+            # The cache is SQLite: keep its reads and writes off the event loop.
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                return cached
+
+        with span("upstream", upstream="openrouter", model=model) as current:
+            current.set(prompt_chars=len(prompt))
+            url, headers, payload = self._request(prompt, model, system_prompt, max_tokens, temperature)
+            resp = await (self.client or get_async_client()).post(url, headers=headers, json=payload, timeout=60)
+            current.set(status=resp.status_code, response_bytes=len(resp.content), retries=retry_count(resp))
+            resp.raise_for_status()
+            data = resp.json()
+            record_usage(current, model, data)
+            if key is None:
+                return self._finish(key, data)
+            return await asyncio.to_thread(self._finish, key, data)
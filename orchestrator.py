@@ -1,28 +1,61 @@
+import asyncio
+import inspect
 import json
-from typing import Any
+import logging
+import threading
+from functools import partial
+from typing import Annotated, Any, Callable
 
-from langgraph.graph import StateGraph, END
+from langgraph.graph import END, START, StateGraph
 
-from apify_client import ApifyClient
+from apify_client import ApifyClient, AsyncApifyClient
+from apify_ingest import unavailable_result
 from config import (
     APIFY_DATASET_ID,
     DEFAULT_OPENROUTER_MODEL,
-    FALLBACK_OPENROUTER_MODEL,
     COMPETITOR_ACCOUNTS,
+    DATA_FETCH_TIMEOUT,
+    DATA_FETCH_WORKERS,
+    SNAPSHOT_MODE,
 )
-from instagram_api import InstagramClient
-from pinterest_api import PinterestClient
-from mcp_adapters import LocalMCP
-from openrouter_ai import OpenRouterClient
-from prompting import SYSTEM_PROMPT, build_strategy_prompt, build_repair_prompt, validate_result, format_report
-from utils import summarize_user_media
+from instagram_api import AsyncInstagramClient, InstagramClient
+from pinterest_api import AsyncPinterestClient, PinterestClient
+from mcp_adapters import AsyncLocalMCP, LocalMCP
+from media_store import sync_user_media
+from model_router import ModelRouter, default_router
+from openrouter_ai import AsyncOpenRouterClient, OpenRouterClient
+from parallel import run_parallel, run_parallel_async
+from prompt_budget import dumps_compact
+from snapshot import SNAPSHOT_KEYS, load_snapshot
+from tracing import span
+from trend_history import get_trend_history
+from prompting import (
+    SYSTEM_PROMPT,
+    build_chat_prompt,
+    build_summary_prompt,
+    build_strategy_prompt,
+    build_repair_prompt,
+    normalize_intent_message,
+    validate_result,
+    format_report,
+)
+from utils import summarize_competitor, summarize_user_media
+
 
+logger = logging.getLogger(__name__)
 
 State = dict[str, Any]
 
+DEFAULT_INTENT = {
+    "intent_id": "rekomendasi konten hari ini",
+    "intent_en": "content recommendations for today",
+    "constraints": [],
+}
+NO_DATA_TEXT = "Maaf, data tidak tersedia."
+
 
 def build_intent_prompt(user_message: str) -> str:
-    return json.dumps(
+    return dumps_compact(
         {
             "task": "Extract intent and constraints from the user message.",
             "rules": [
@@ -35,108 +68,163 @@ def build_intent_prompt(user_message: str) -> str:
                 "constraints": ["string"],
             },
             "user_message": user_message,
-        },
-        ensure_ascii=False,
-        indent=2,
+        }
     )
 
 
-def build_summary_prompt(state: State) -> str:
-    return json.dumps(
-        {
-            "task": "Summarize signals from data for a content strategist.",
-            "rules": [
-                "Return ONLY valid JSON.",
-                "Bilingual output.",
-                "Use only provided data.",
-            ],
-            "output_schema": {
-                "audience_id": "string",
-                "audience_en": "string",
-                "top_themes_id": ["string"],
-                "top_themes_en": ["string"],
-                "content_formats_id": ["string"],
-                "content_formats_en": ["string"],
-                "risk_notes_id": ["string"],
-                "risk_notes_en": ["string"],
-            },
-            "data": {
-                "profile": state.get("profile"),
-                "user_stats": state.get("user_stats"),
-                "instagram_hashtags": state.get("instagram_hashtags"),
-                "pinterest_trends": state.get("pinterest_trends"),
-                "apify_trends": state.get("apify_trends"),
-                "competitors": state.get("competitors"),
-            },
-        },
-        ensure_ascii=False,
-        indent=2,
-    )
+def intent_cache_key(state: State) -> str:
+    return f"intent:{normalize_intent_message(state['user_message'])}"
 
 
 def intent_node(state: State) -> State:
     client: OpenRouterClient = state["openrouter"]
     prompt = build_intent_prompt(state["user_message"])
     try:
-        raw = client.analyze_trends(prompt, model=DEFAULT_OPENROUTER_MODEL, system_prompt=SYSTEM_PROMPT)
+        raw = client.analyze_trends(
+            prompt,
+            model=DEFAULT_OPENROUTER_MODEL,
+            system_prompt=SYSTEM_PROMPT,
+            temperature=0,
+            cache_key=intent_cache_key(state),
+        )
         intent = json.loads(raw)
     except Exception:
-        intent = {
-            "intent_id": "rekomendasi konten hari ini",
-            "intent_en": "content recommendations for today",
-            "constraints": [],
-        }
+        intent = dict(DEFAULT_INTENT)
     state["intent"] = intent
     return state
 
 
-def data_node(state: State) -> State:
+def load_snapshot_data(state: State) -> bool:
+    snapshot = state.get("snapshot")
+    if not snapshot:
+        return False
+    for key in SNAPSHOT_KEYS:
+        state[key] = snapshot["data"].get(key)
+    return True
+
+
+def collection_tasks(state: State) -> dict[str, Callable[[], Any]]:
+    """Independent fetches for data_node; the callables return coroutines when the clients are async."""
     mcp: LocalMCP = state["mcp"]
     instagram_user_id = state["instagram_user_id"]
+    instagram_client: InstagramClient | None = state.get("instagram_client")
 
-    state["profile"] = mcp.tool_instagram_profile(instagram_user_id)
-    if state.get("instagram_client"):
+    tasks: dict[str, Callable[[], Any]] = {
+        "profile": partial(mcp.tool_instagram_profile, instagram_user_id),
+        "instagram_hashtags": partial(mcp.tool_instagram_hashtags, instagram_user_id),
+        "pinterest_trends": mcp.tool_pinterest_trends,
+        "apify_trends": partial(mcp.tool_apify_trends, state.get("apify_dataset_id", "")),
+    }
+    if instagram_client:
+        tasks["user_media"] = partial(sync_user_media, instagram_client, instagram_user_id)
+        for username in COMPETITOR_ACCOUNTS:
+            tasks[f"competitor:{username}"] = partial(
+                instagram_client.business_discovery, instagram_user_id, username
+            )
+    return tasks
+
+
+def apply_collected(state: State, results: dict[str, Any], errors: dict[str, str]) -> State:
+    def pick(key: str, fallback: Callable[[str], Any]) -> Any:
+        if key in results:
+            return results[key]
+        return fallback(errors.get(key, "unknown error"))
+
+    instagram_configured = bool(state.get("instagram_client"))
+    state["profile"] = pick("profile", lambda err: {"note": "Instagram profile error", "error": err})
+    if not instagram_configured:
+        state["user_stats"] = {"note": "Instagram client not configured"}
+    elif "user_media" in results:
         try:
-            media = state["instagram_client"].get_user_media(instagram_user_id)
-            state["user_stats"] = summarize_user_media(media)
+            state["user_stats"] = summarize_user_media(results["user_media"])
         except Exception as exc:
             state["user_stats"] = {"note": "Instagram media error", "error": str(exc)}
     else:
-        state["user_stats"] = {"note": "Instagram client not configured"}
+        state["user_stats"] = {"note": "Instagram media error", "error": errors.get("user_media", "unknown error")}
+    state["instagram_hashtags"] = pick(
+        "instagram_hashtags", lambda err: [{"note": "Instagram hashtags error", "error": err}]
+    )
+    state["pinterest_trends"] = pick(
+        "pinterest_trends", lambda err: {"trends": [], "note": "Pinterest error", "error": err}
+    )
+    state["apify_trends"] = pick("apify_trends", lambda err: unavailable_result("Apify error", err))
+    competitors = COMPETITOR_ACCOUNTS if instagram_configured else []
+    state["competitors"] = [
+        summarize_competitor(results[f"competitor:{username}"], username)
+        if f"competitor:{username}" in results
+        else {"username": username, "error": errors.get(f"competitor:{username}", "unknown error")}
+        for username in competitors
+    ]
+    return state
 
-    state["instagram_hashtags"] = mcp.tool_instagram_hashtags(instagram_user_id)
-    state["pinterest_trends"] = mcp.tool_pinterest_trends()
-    state["apify_trends"] = mcp.tool_apify_trends(state.get("apify_dataset_id", ""))
-    competitor_data = []
-    if state.get("instagram_client") and COMPETITOR_ACCOUNTS:
-        for username in COMPETITOR_ACCOUNTS:
-            try:
-                raw = state["instagram_client"].business_discovery(instagram_user_id, username)
-                competitor_data.append(raw)
-            except Exception as exc:
-                competitor_data.append({"username": username, "error": str(exc)})
-    state["competitors"] = competitor_data
+
+def data_node(state: State) -> State:
+    if load_snapshot_data(state):
+        load_snapshot_signals(state)
+        return load_trend_momentum(state, record=False)
+    results, errors = run_parallel(
+        collection_tasks(state), max_workers=DATA_FETCH_WORKERS, timeout=DATA_FETCH_TIMEOUT
+    )
+    return load_trend_momentum(apply_collected(state, results, errors))
+
+
+def load_trend_momentum(state: State, record: bool = True) -> State:
+    """
+    Attach growth/rank signals for the prompt. Collected trends are added
+    to the history only if nothing was recorded today yet; the daily job
+    records its own collection regardless.
+    """
+    try:
+        history = get_trend_history()
+        if record and not history.recorded():
+            history.record_collected(state)
+        state["trend_momentum"] = history.momentum()
+    except Exception:
+        logger.warning("Trend history unavailable", exc_info=True)
+        state["trend_momentum"] = None
     return state
 
 
+def has_cached_signals(state: State) -> bool:
+    snapshot = state.get("snapshot")
+    return bool(snapshot and snapshot.get("signals"))
+
+
+def load_snapshot_signals(state: State) -> bool:
+    if not has_cached_signals(state):
+        return False
+    state["signals"] = state["snapshot"]["signals"]
+    return True
+
+
+def state_router(state: State) -> ModelRouter:
+    router = state.get("router")
+    if router is None:
+        router = state["router"] = default_router(state["openrouter"])
+    return router
+
+
 def summary_node(state: State) -> State:
-    client: OpenRouterClient = state["openrouter"]
-    prompt = build_summary_prompt(state)
+    if load_snapshot_signals(state):
+        return state
+
+    router = state_router(state)
     try:
-        raw = client.analyze_trends(prompt, model=DEFAULT_OPENROUTER_MODEL, system_prompt=SYSTEM_PROMPT)
+        raw = router.complete(
+            partial(build_summary_prompt, state), system_prompt=SYSTEM_PROMPT, temperature=0
+        )
         state["signals"] = json.loads(raw)
     except Exception:
-        try:
-            raw = client.analyze_trends(prompt, model=FALLBACK_OPENROUTER_MODEL, system_prompt=SYSTEM_PROMPT)
-            state["signals"] = json.loads(raw)
-        except Exception:
-            state["signals"] = {"note": "summary failed"}
+        state["signals"] = {"note": "summary failed"}
     return state
 
 
-def strategy_node(state: State) -> State:
-    client: OpenRouterClient = state["openrouter"]
-    prompt = build_strategy_prompt(
+def build_state_strategy_prompt(
+    state: State,
+    builder: Callable[..., str] = build_strategy_prompt,
+    model: str | None = None,
+) -> str:
+    return builder(
         user_request=state["user_message"],
         profile={**state.get("profile", {}), "signals": state.get("signals")},
         user_stats=state.get("user_stats", {}),
@@ -144,29 +232,34 @@ def strategy_node(state: State) -> State:
         pinterest_trends=state.get("pinterest_trends", {}),
         apify_trends=state.get("apify_trends", {}),
         competitor_data=state.get("competitors", []),
+        model=model,
+        intent=state.get("intent"),
+        trend_momentum=state.get("trend_momentum"),
+    )
+
+
+def strategy_node(state: State) -> State:
+    router = state_router(state)
+    state["analysis_raw"] = router.complete(
+        lambda model: build_state_strategy_prompt(state, model=model), system_prompt=SYSTEM_PROMPT
     )
-    try:
-        analysis = client.analyze_trends(prompt, model=DEFAULT_OPENROUTER_MODEL, system_prompt=SYSTEM_PROMPT)
-    except Exception:
-        analysis = client.analyze_trends(prompt, model=FALLBACK_OPENROUTER_MODEL, system_prompt=SYSTEM_PROMPT)
-    state["analysis_raw"] = analysis
     return state
 
 
+def parse_result(raw: str) -> dict:
+    parsed = json.loads(raw)
+    validate_result(parsed)
+    return parsed
+
+
 def qa_node(state: State) -> State:
-    client: OpenRouterClient = state["openrouter"]
     raw = state.get("analysis_raw", "")
     try:
-        parsed = json.loads(raw)
-        validate_result(parsed)
-        state["analysis_json"] = parsed
+        state["analysis_json"] = parse_result(raw)
     except Exception:
-        repair_prompt = build_repair_prompt(raw)
-        repaired = client.analyze_trends(repair_prompt, model=DEFAULT_OPENROUTER_MODEL, system_prompt=SYSTEM_PROMPT)
+        repaired = state_router(state).complete(build_repair_prompt(raw), system_prompt=SYSTEM_PROMPT)
         try:
-            parsed = json.loads(repaired)
-            validate_result(parsed)
-            state["analysis_json"] = parsed
+            state["analysis_json"] = parse_result(repaired)
         except Exception:
             state["analysis_json"] = None
     return state
@@ -177,54 +270,402 @@ def render_node(state: State) -> State:
     if isinstance(parsed, dict):
         state["response_text"] = format_report(parsed)
     else:
-        state["response_text"] = state.get("analysis_raw", "Maaf, data tidak tersedia.")
+        state["response_text"] = state.get("analysis_raw", NO_DATA_TEXT)
     return state
 
 
-def build_graph() -> StateGraph:
-    graph = StateGraph(State)
-    graph.add_node("intent", intent_node)
-    graph.add_node("data", data_node)
-    graph.add_node("summary", summary_node)
-    graph.add_node("strategy", strategy_node)
-    graph.add_node("qa", qa_node)
-    graph.add_node("render", render_node)
-
-    graph.set_entry_point("intent")
-    graph.add_edge("intent", "data")
-    graph.add_edge("data", "summary")
-    graph.add_edge("summary", "strategy")
-    graph.add_edge("strategy", "qa")
-    graph.add_edge("qa", "render")
-    graph.add_edge("render", END)
-    return graph
+async def aintent_node(state: State) -> State:
+    client: AsyncOpenRouterClient = state["openrouter"]
+    prompt = build_intent_prompt(state["user_message"])
+    try:
+        raw = await client.analyze_trends(
+            prompt,
+            model=DEFAULT_OPENROUTER_MODEL,
+            system_prompt=SYSTEM_PROMPT,
+            temperature=0,
+            cache_key=intent_cache_key(state),
+        )
+        intent = json.loads(raw)
+    except Exception:
+        intent = dict(DEFAULT_INTENT)
+    state["intent"] = intent
+    return state
 
 
-def run_orchestration(
-    user_message: str,
-    openrouter_api_key: str,
-    instagram_access_token: str,
-    instagram_user_id: str,
-    pinterest_access_token: str | None,
-    apify_token: str | None,
-) -> str:
-    openrouter = OpenRouterClient(api_key=openrouter_api_key)
+async def adata_node(state: State) -> State:
+    # History reads and writes are SQLite work, kept off the event loop.
+    if load_snapshot_data(state):
+        load_snapshot_signals(state)
+        return await asyncio.to_thread(load_trend_momentum, state, record=False)
+    results, errors = await run_parallel_async(
+        collection_tasks(state), max_workers=DATA_FETCH_WORKERS, timeout=DATA_FETCH_TIMEOUT
+    )
+    return await asyncio.to_thread(load_trend_momentum, apply_collected(state, results, errors))
 
-    instagram_client = InstagramClient(instagram_access_token) if instagram_access_token else None
-    pinterest_client = PinterestClient(pinterest_access_token) if pinterest_access_token else None
-    apify_client = ApifyClient(apify_token) if apify_token else None
 
-    mcp = LocalMCP(instagram=instagram_client, pinterest=pinterest_client, apify=apify_client)
+async def asummary_node(state: State) -> State:
+    if load_snapshot_signals(state):
+        return state
 
-    graph = build_graph().compile()
+    router = state_router(state)
+    try:
+        raw = await router.acomplete(
+            partial(build_summary_prompt, state), system_prompt=SYSTEM_PROMPT, temperature=0
+        )
+        state["signals"] = json.loads(raw)
+    except Exception:
+        state["signals"] = {"note": "summary failed"}
+    return state
+
+
+async def astrategy_node(state: State) -> State:
+    router = state_router(state)
+    state["analysis_raw"] = await router.acomplete(
+        lambda model: build_state_strategy_prompt(state, model=model), system_prompt=SYSTEM_PROMPT
+    )
+    return state
+
+
+async def aqa_node(state: State) -> State:
+    raw = state.get("analysis_raw", "")
+    try:
+        state["analysis_json"] = parse_result(raw)
+    except Exception:
+        repaired = await state_router(state).acomplete(build_repair_prompt(raw), system_prompt=SYSTEM_PROMPT)
+        try:
+            state["analysis_json"] = parse_result(repaired)
+        except Exception:
+            state["analysis_json"] = None
+    return state
+
+
+SYNC_NODES = {
+    "intent": intent_node,
+    "data": data_node,
+    "summary": summary_node,
+    "strategy": strategy_node,
+    "qa": qa_node,
+    "render": render_node,
+}
+ASYNC_NODES = {
+    **SYNC_NODES,
+    "intent": aintent_node,
+    "data": adata_node,
+    "summary": asummary_node,
+    "strategy": astrategy_node,
+    "qa": aqa_node,
+}
+
+
+# Each stage runs once all of its dependencies have finished; intent and data
+# collection have none, so they start together.
+DEPENDENCIES: dict[str, list[str]] = {
+    "intent": [],
+    "data": [],
+    "summary": ["data"],
+    "strategy": ["intent", "summary"],
+    "qa": ["strategy"],
+    "render": ["qa"],
+}
+PIPELINE = list(DEPENDENCIES)
+
+
+def merge_state(current: State, update: State) -> State:
+    """Reducer for parallel branches: later keys win, per-node timings accumulate."""
+    merged = {**current, **update}
+    if "timings" in current and "timings" in update:
+        merged["timings"] = {**current["timings"], **update["timings"]}
+    return merged
+
+
+GraphState = Annotated[State, merge_state]
+
+
+def stage_dependencies(skip_summary: bool = False) -> dict[str, list[str]]:
+    if not skip_summary:
+        return {name: list(deps) for name, deps in DEPENDENCIES.items()}
+    skipped = DEPENDENCIES["summary"]
+    return {
+        name: [dep for parent in deps for dep in (skipped if parent == "summary" else [parent])]
+        for name, deps in DEPENDENCIES.items()
+        if name != "summary"
+    }
+
+
+def required_stages(deps: dict[str, list[str]], until: str) -> list[str]:
+    needed = {until}
+    pending = [until]
+    while pending:
+        for parent in deps[pending.pop()]:
+            if parent not in needed:
+                needed.add(parent)
+                pending.append(parent)
+    return [name for name in deps if name in needed]
+
+
+def changed_keys(before: State, after: State) -> State:
+    return {key: value for key, value in after.items() if key not in before or before[key] is not value}
+
+
+def timed_node(name: str, fn: Callable[[State], State]) -> Callable[[State], State]:
+    """Run a node on its own copy of the state and return only what it changed, plus its wall time."""
+
+    def run(state: State) -> State:
+        with span("node", node=name) as current:
+            updated = changed_keys(state, fn(dict(state)))
+        return {**updated, "timings": {name: current.duration}}
+
+    async def arun(state: State) -> State:
+        with span("node", node=name) as current:
+            updated = changed_keys(state, await fn(dict(state)))
+        return {**updated, "timings": {name: current.duration}}
+
+    return arun if inspect.iscoroutinefunction(fn) else run
+
+
+def critical_path(timings: dict[str, float], deps: dict[str, list[str]] = DEPENDENCIES) -> tuple[list[str], float]:
+    """Slowest dependency chain through the stages that ran, and its total time."""
+    best: dict[str, tuple[list[str], float]] = {}
+    for name in deps:
+        if name not in timings:
+            continue
+        parents = [best[parent] for parent in deps[name] if parent in best]
+        path, total = max(parents, key=lambda item: item[1], default=([], 0.0))
+        best[name] = (path + [name], total + timings[name])
+    return max(reversed(best.values()), key=lambda item: item[1], default=([], 0.0))
+
+
+def log_timings(timings: dict[str, float]) -> None:
+    path, total = critical_path(timings)
+    logger.info(
+        "orchestration stages %s critical_path=%s (%.2fs)",
+        " ".join(f"{name}={seconds:.2f}s" for name, seconds in timings.items()),
+        ">".join(path),
+        total,
+    )
+
+
+def build_graph(asynchronous: bool = False, until: str = "render", skip_summary: bool = False) -> StateGraph:
+    """
+    Build the stages needed for `until` as a DAG; the async graph must be run
+    with `ainvoke`. With `skip_summary`, strategy reads signals that are
+    already in the state (e.g. from the daily snapshot) instead of waiting
+    for the summary call.
+    """
+    nodes = ASYNC_NODES if asynchronous else SYNC_NODES
+    deps = stage_dependencies(skip_summary)
+    if until not in deps:
+        until = DEPENDENCIES[until][-1]
+    stages = required_stages(deps, until)
+    graph = StateGraph(GraphState)
+    for name in stages:
+        graph.add_node(name, timed_node(name, nodes[name]))
+
+    for name in stages:
+        parents = deps[name]
+        if not parents:
+            graph.add_edge(START, name)
+        elif len(parents) == 1:
+            graph.add_edge(parents[0], name)
+        else:
+            graph.add_edge(parents, name)
+    for name in stages:
+        if not any(name in deps[child] for child in stages):
+            graph.add_edge(name, END)
+    return graph
+
+
+def initial_state(
+    user_message: str,
+    openrouter: OpenRouterClient,
+    instagram_client: InstagramClient | None,
+    instagram_user_id: str,
+    mcp: LocalMCP,
+    router: ModelRouter | None = None,
+) -> State:
     state: State = {
         "user_message": user_message,
         "openrouter": openrouter,
+        "router": router or default_router(openrouter),
         "instagram_client": instagram_client,
         "instagram_user_id": instagram_user_id,
         "mcp": mcp,
         "apify_dataset_id": APIFY_DATASET_ID,
         "competitors": [],
     }
-    final_state = graph.invoke(state)
-    return final_state.get("response_text", "Maaf, data tidak tersedia.")
+    if SNAPSHOT_MODE == "auto":
+        state["snapshot"] = load_snapshot(instagram_user_id)
+    return state
+
+
+class OrchestrationRuntime:
+    """
+    Compiled graph plus long-lived API clients, built once per process and
+    shared by every message. Safe to use from several threads: each call
+    gets its own state dict.
+    """
+
+    def __init__(
+        self,
+        openrouter: OpenRouterClient,
+        instagram_client: InstagramClient | None,
+        instagram_user_id: str,
+        mcp: LocalMCP,
+        asynchronous: bool = False,
+    ):
+        self.openrouter = openrouter
+        self.instagram_client = instagram_client
+        self.instagram_user_id = instagram_user_id
+        self.mcp = mcp
+        self.asynchronous = asynchronous
+        self.router = default_router(openrouter)
+        self.graphs = {
+            (until, skip_summary): build_graph(asynchronous, until=until, skip_summary=skip_summary).compile()
+            for until in ("render", "summary")
+            for skip_summary in (False, True)
+        }
+        self.graph = self.graphs["render", False]
+        self.collect_graph = self.graphs["summary", False]
+
+    @classmethod
+    def from_credentials(
+        cls,
+        openrouter_api_key: str,
+        instagram_access_token: str,
+        instagram_user_id: str,
+        pinterest_access_token: str | None,
+        apify_token: str | None,
+        asynchronous: bool = False,
+    ) -> "OrchestrationRuntime":
+        if asynchronous:
+            openrouter = AsyncOpenRouterClient(api_key=openrouter_api_key)
+            instagram_client = AsyncInstagramClient(instagram_access_token) if instagram_access_token else None
+            pinterest_client = AsyncPinterestClient(pinterest_access_token) if pinterest_access_token else None
+            apify_client = AsyncApifyClient(apify_token) if apify_token else None
+            mcp = AsyncLocalMCP(instagram=instagram_client, pinterest=pinterest_client, apify=apify_client)
+        else:
+            openrouter = OpenRouterClient(api_key=openrouter_api_key)
+            instagram_client = InstagramClient(instagram_access_token) if instagram_access_token else None
+            pinterest_client = PinterestClient(pinterest_access_token) if pinterest_access_token else None
+            apify_client = ApifyClient(apify_token) if apify_token else None
+            mcp = LocalMCP(instagram=instagram_client, pinterest=pinterest_client, apify=apify_client)
+        return cls(openrouter, instagram_client, instagram_user_id, mcp, asynchronous=asynchronous)
+
+    def _state(self, user_message: str) -> State:
+        return initial_state(
+            user_message, self.openrouter, self.instagram_client, self.instagram_user_id, self.mcp, self.router
+        )
+
+    def graph_for(self, state: State, until: str = "render") -> Any:
+        """The compiled graph for this state; the summary stage is left out when snapshot signals exist."""
+        return self.graphs[until, has_cached_signals(state)]
+
+    def run(self, user_message: str) -> str:
+        state = self._state(user_message)
+        final_state = self.graph_for(state).invoke(state)
+        log_timings(final_state.get("timings", {}))
+        return final_state.get("response_text", NO_DATA_TEXT)
+
+    async def arun(self, user_message: str) -> str:
+        state = self._state(user_message)
+        final_state = await self.graph_for(state).ainvoke(state)
+        log_timings(final_state.get("timings", {}))
+        return final_state.get("response_text", NO_DATA_TEXT)
+
+    def stream_reply(self, user_message: str, on_text: Callable[[str], None]) -> str:
+        """
+        Collect data and signals as usual, then stream a plain-text answer
+        through `on_text` chunk by chunk instead of waiting for the JSON report.
+        """
+        state = self._state(user_message)
+        state = self.graph_for(state, until="summary").invoke(state)
+        prompt = build_state_strategy_prompt(state, builder=build_chat_prompt, model=DEFAULT_OPENROUTER_MODEL)
+        parts: list[str] = []
+        try:
+            for chunk in self.openrouter.stream_completion(
+                prompt, model=DEFAULT_OPENROUTER_MODEL, system_prompt=SYSTEM_PROMPT
+            ):
+                parts.append(chunk)
+                on_text(chunk)
+        except Exception:
+            if parts:
+                raise
+            prompt = build_state_strategy_prompt(state, builder=build_chat_prompt, model=FALLBACK_OPENROUTER_MODEL)
+            text = self.openrouter.analyze_trends(prompt, model=FALLBACK_OPENROUTER_MODEL, system_prompt=SYSTEM_PROMPT)
+            parts.append(text)
+            on_text(text)
+        return "".join(parts)
+
+
+_runtimes: dict[tuple, OrchestrationRuntime] = {}
+_runtimes_lock = threading.Lock()
+
+
+def get_runtime(
+    openrouter_api_key: str,
+    instagram_access_token: str,
+    instagram_user_id: str,
+    pinterest_access_token: str | None,
+    apify_token: str | None,
+    asynchronous: bool = False,
+) -> OrchestrationRuntime:
+    """Return the process-wide runtime for these credentials, building it on first use."""
+    key = (
+        openrouter_api_key,
+        instagram_access_token,
+        instagram_user_id,
+        pinterest_access_token,
+        apify_token,
+        asynchronous,
+    )
+    with _runtimes_lock:
+        runtime = _runtimes.get(key)
+        if runtime is None:
+            runtime = OrchestrationRuntime.from_credentials(*key)
+            _runtimes[key] = runtime
+        return runtime
+
+
+def runtime_for_env(env: Any, asynchronous: bool = False) -> OrchestrationRuntime:
+    """get_runtime for the credentials in an EnvConfig."""
+    return get_runtime(
+        openrouter_api_key=env.openrouter_api_key,
+        instagram_access_token=env.instagram_access_token,
+        instagram_user_id=env.instagram_user_id,
+        pinterest_access_token=env.pinterest_access_token,
+        apify_token=env.apify_token,
+        asynchronous=asynchronous,
+    )
+
+
+def run_orchestration(
+    user_message: str,
+    openrouter_api_key: str,
+    instagram_access_token: str,
+    instagram_user_id: str,
+    pinterest_access_token: str | None,
+    apify_token: str | None,
+) -> str:
+    runtime = get_runtime(
+        openrouter_api_key, instagram_access_token, instagram_user_id, pinterest_access_token, apify_token
+    )
+    return runtime.run(user_message)
+
+
+async def arun_orchestration(
+    user_message: str,
+    openrouter_api_key: str,
+    instagram_access_token: str,
+    instagram_user_id: str,
+    pinterest_access_token: str | None,
+    apify_token: str | None,
+) -> str:
+    runtime = get_runtime(
+        openrouter_api_key,
+        instagram_access_token,
+        instagram_user_id,
+        pinterest_access_token,
+        apify_token,
+        asynchronous=True,
+    )
+    return await runtime.arun(user_message)
@@ -0,0 +1,95 @@
+import asyncio
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable
+
+
+class _SourceTimeout(Exception):
+    pass
+
+
+def _record(name: str, future: Future | asyncio.Future, results: dict[str, Any], errors: dict[str, str]) -> None:
+    exc = future.exception()
+    if exc is not None:
+        errors[name] = str(exc) or exc.__class__.__name__
+    else:
+        results[name] = future.result()
+
+
+def run_parallel(
+    tasks: dict[str, Callable[[], Any]],
+    max_workers: int,
+    timeout: float,
+) -> tuple[dict[str, Any], dict[str, str]]:
+    """
+    Run independent zero-argument callables concurrently.
+
+    Each task gets `timeout` seconds from the moment it starts running, so
+    one slow source never eats into another's time; tasks that raise or
+    overrun are reported in the errors mapping instead of the results
+    mapping. Late tasks are abandoned, not awaited.
+    """
+    results: dict[str, Any] = {}
+    errors: dict[str, str] = {}
+    if not tasks:
+        return results, errors
+
+    started: dict[str, float] = {}
+
+    def timed(name: str, fn: Callable[[], Any]) -> Any:
+        started[name] = time.monotonic()
+        return fn()
+
+    workers = max(1, min(max_workers, len(tasks)))
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="collect")
+    try:
+        # Each task runs in a copy of the caller's context so its spans nest under the caller's.
+        names = {
+            executor.submit(contextvars.copy_context().run, timed, name, fn): name for name, fn in tasks.items()
+        }
+        pending = set(names)
+        while pending:
+            now = time.monotonic()
+            for future in [future for future in pending if now - started.get(names[future], now) >= timeout]:
+                future.cancel()
+                pending.discard(future)
+                errors[names[future]] = f"timed out after {timeout:g}s"
+            # Sleep until a task finishes or the earliest running task's deadline.
+            deadlines = [started[names[future]] + timeout for future in pending if names[future] in started]
+            done, pending = wait(
+                pending, timeout=max(0.0, min(deadlines) - now) if deadlines else timeout, return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                _record(names[future], future, results, errors)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results, errors
+
+
+async def run_parallel_async(
+    tasks: dict[str, Callable[[], Awaitable[Any]]],
+    max_workers: int,
+    timeout: float,
+) -> tuple[dict[str, Any], dict[str, str]]:
+    """Coroutine counterpart of run_parallel; a task that overruns its `timeout` is cancelled."""
+    results: dict[str, Any] = {}
+    errors: dict[str, str] = {}
+    if not tasks:
+        return results, errors
+
+    semaphore = asyncio.Semaphore(max(1, max_workers))
+
+    async def guarded(fn: Callable[[], Awaitable[Any]]) -> Any:
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(fn(), timeout)
+            except asyncio.TimeoutError:
+                # Told apart from a TimeoutError the task raised itself only by this wrapper.
+                raise _SourceTimeout(f"timed out after {timeout:g}s") from None
+
+    futures = {name: asyncio.ensure_future(guarded(fn)) for name, fn in tasks.items()}
+    await asyncio.wait(futures.values())
+    for name, future in futures.items():
+        _record(name, future, results, errors)
+    return results, errors
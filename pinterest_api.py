@@ -1,18 +1,55 @@
+from functools import partial
+
+import httpx
 import requests
 
-BASE_URL = "https://api.pinterest.com/v5"
+from cache import make_key
+from config import PINTEREST_BASE_URL
+from rate_limit import RateLimiter, get_rate_limiter
+from singleflight import SingleFlight
+from tracing import increment, span
+from transport import get_async_client, get_session, retry_count
+
+BASE_URL = PINTEREST_BASE_URL
+
+# Identical requests in flight at the same time share one call.
+_flights = SingleFlight("pinterest")
 
 
 class PinterestClient:
-    def __init__(self, access_token: str):
+    def __init__(
+        self,
+        access_token: str,
+        session: requests.Session | None = None,
+        limiter: RateLimiter | None = None,
+    ):
         self.access_token = access_token
+        self.session = session or get_session()
+        self.limiter = limiter if limiter is not None else get_rate_limiter("pinterest")
 
     def _get(self, path: str, params: dict) -> dict:
         url = f"{BASE_URL}{path}"
         headers = {"Authorization": f"Bearer {self.access_token}"}
-        resp = requests.get(url, params=params, headers=headers, timeout=30)
-        resp.raise_for_status()
-        return resp.json()
+        data, _ = _flights.do(
+            make_key("pinterest", self.access_token, path, params),
+            partial(self._fetch, url, params, headers),
+            endpoint="trends_keywords",
+        )
+        return data
+
+    def _fetch(self, url: str, params: dict, headers: dict) -> dict:
+        # Waiting for a token is exported as rate_limit_wait_seconds, not upstream latency.
+        throttled = self.limiter.acquire() if self.limiter else 0.0
+        with span("upstream", upstream="pinterest", endpoint="trends_keywords") as current:
+            current.set(throttled=round(throttled, 3))
+            resp = self.session.get(url, params=params, headers=headers, timeout=30)
+            retries = retry_count(resp)
+            current.set(status=resp.status_code, response_bytes=len(resp.content), retries=retries)
+            increment("upstream_retries_total", retries, upstream="pinterest")
+            if self.limiter:
+                self.limiter.observe(resp.headers, resp.status_code, extra_calls=retries)
+            resp.raise_for_status()
+            return resp.json()
 
     def get_trends_keywords(
         self,
@@ -31,3 +68,39 @@ class PinterestClient:
             "limit": limit,
         }
         return self._get(path, params)
+
+
+class AsyncPinterestClient(PinterestClient):
+    """Non-blocking PinterestClient: the same endpoint methods, each returning a coroutine."""
+
+    def __init__(
+        self,
+        access_token: str,
+        client: httpx.AsyncClient | None = None,
+        limiter: RateLimiter | None = None,
+    ):
+        super().__init__(access_token, limiter=limiter)
+        self.client = client
+
+    async def _get(self, path: str, params: dict) -> dict:
+        url = f"{BASE_URL}{path}"
+        headers = {"Authorization": f"Bearer {self.access_token}"}
+        data, _ = await _flights.ado(
+            make_key("pinterest", self.access_token, path, params),
+            partial(self._fetch, url, params, headers),
+            endpoint="trends_keywords",
+        )
+        return data
+
+    async def _fetch(self, url: str, params: dict, headers: dict) -> dict:
+        throttled = await self.limiter.aacquire() if self.limiter else 0.0
+        with span("upstream", upstream="pinterest", endpoint="trends_keywords") as current:
+            current.set(throttled=round(throttled, 3))
+            resp = await (self.client or get_async_client()).get(url, params=params, headers=headers, timeout=30)
+            retries = retry_count(resp)
+            current.set(status=resp.status_code, response_bytes=len(resp.content), retries=retries)
+            increment("upstream_retries_total", retries, upstream="pinterest")
+            if self.limiter:
+                await self.limiter.aobserve(resp.headers, resp.status_code, extra_calls=retries)
+            resp.raise_for_status()
+            return resp.json()
@@ -0,0 +1,151 @@
+import json
+import logging
+from typing import Any
+
+from config import DEFAULT_PROMPT_TOKEN_BUDGET, PROMPT_TOKEN_BUDGETS
+from trend_history import momentum_order
+from utils import summarize_competitor
+
+# Rough average for mixed Indonesian/English JSON; good enough for budgeting.
+CHARS_PER_TOKEN = 4
+
+PINTEREST_TREND_FIELDS = (
+    "keyword",
+    "trend_type",
+    "pct_growth_wow",
+    "pct_growth_mom",
+    "pct_growth_yoy",
+    "volume",
+    "volume_change",
+    "prediction",
+    "source",
+)
+
+# Growth fields in order of preference for ranking Pinterest trends.
+PINTEREST_GROWTH_FIELDS = ("pct_growth_wow", "pct_growth_mom", "pct_growth_yoy")
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def dumps_compact(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def token_budget_for(model: str | None) -> int:
+    return PROMPT_TOKEN_BUDGETS.get(model or "", DEFAULT_PROMPT_TOKEN_BUDGET)
+
+
+def section_tokens(data: dict[str, Any]) -> dict[str, int]:
+    return {key: estimate_tokens(dumps_compact(value)) for key, value in data.items()}
+
+
+def prune_payloads(data: dict[str, Any]) -> dict[str, Any]:
+    """Replace raw API payloads with the fields the model actually uses."""
+    pruned = dict(data)
+
+    apify = pruned.get("apify_trends")
+    if isinstance(apify, dict) and "items" in apify:
+        items = apify.get("items") or []
+        pruned["apify_trends"] = {
+            **{key: value for key, value in apify.items() if key != "items"},
+            "item_count": len(items),
+        }
+
+    pinterest = pruned.get("pinterest_trends")
+    if isinstance(pinterest, dict) and isinstance(pinterest.get("trends"), list):
+        pruned["pinterest_trends"] = {
+            **pinterest,
+            "trends": [
+                {field: trend[field] for field in PINTEREST_TREND_FIELDS if trend.get(field) is not None}
+                for trend in pinterest["trends"]
+                if isinstance(trend, dict)
+            ],
+        }
+
+    competitors = pruned.get("competitors")
+    if isinstance(competitors, list):
+        pruned["competitors"] = [
+            summarize_competitor(entry, entry.get("username", ""))
+            if isinstance(entry, dict) and "business_discovery" in entry
+            else entry
+            for entry in competitors
+        ]
+    return pruned
+
+
+def _trimmable(value: Any) -> list | None:
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict):
+        for key in ("trends", "top_keywords"):
+            if isinstance(value.get(key), list):
+                return value[key]
+    return None
+
+
+def _rank_key(entry: Any) -> tuple[float, ...]:
+    """Sort key, best first: engagement for hashtags and competitors, growth for trends."""
+    if not isinstance(entry, dict):
+        return (0.0,)  # e.g. Apify keywords, already in count order
+    summary = entry.get("top_summary") or entry.get("media_summary")
+    if isinstance(summary, dict):
+        return (-((summary.get("median_likes") or 0) + (summary.get("median_comments") or 0)),)
+    if "wow" in entry or "dod" in entry:
+        return momentum_order(entry)
+    for field in PINTEREST_GROWTH_FIELDS:
+        if isinstance(entry.get(field), (int, float)):
+            return (-entry[field],)
+    return (0.0,)
+
+
+def _copy_section(value: Any) -> Any:
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return {key: list(item) if isinstance(item, list) else item for key, item in value.items()}
+    return value
+
+
+def fit_to_budget(data: dict[str, Any], budget: int) -> dict[str, Any]:
+    """
+    Drop the lowest-ranked entries from the largest list-like section until
+    the compact JSON fits `budget` tokens. A section is sorted by engagement
+    or growth (see _rank_key) the first time it is trimmed; untouched
+    sections keep their order. The input is not mutated and the first entry
+    of each list is always kept.
+    """
+    fitted = {key: _copy_section(value) for key, value in data.items()}
+    # Track exact compact-JSON lengths so each trim is O(entry), not O(section).
+    sizes = {key: len(dumps_compact(value)) for key, value in fitted.items()}
+    ranked: set[str] = set()
+    while sum(sizes.values()) > budget * CHARS_PER_TOKEN:
+        candidates = [key for key, value in fitted.items() if len(_trimmable(value) or []) > 1]
+        if not candidates:
+            break
+        largest = max(candidates, key=lambda key: sizes[key])
+        entries = _trimmable(fitted[largest])
+        if largest not in ranked:
+            entries.sort(key=_rank_key)
+            ranked.add(largest)
+        dropped = entries.pop()
+        sizes[largest] -= len(dumps_compact(dropped)) + 1  # the entry and its separating comma
+    return fitted
+
+
+def compact_sections(data: dict[str, Any], model: str | None = None, budget: int | None = None) -> dict[str, Any]:
+    budget = budget if budget is not None else token_budget_for(model)
+    before = section_tokens(data)
+    compacted = fit_to_budget(prune_payloads(data), budget)
+    after = section_tokens(compacted)
+    logger.debug(
+        "Prompt data compacted %s -> %s est. tokens (budget %s): %s",
+        sum(before.values()),
+        sum(after.values()),
+        budget,
+        after,
+    )
+    return compacted
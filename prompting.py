@@ -1,6 +1,10 @@
-import json
+import re
+import unicodedata
 from typing import Any
 
+from prompt_budget import compact_sections, dumps_compact
+from utils import escape_markdown_v2
+
 SYSTEM_PROMPT = (
     "You are TrendAnalyst, an expert fashion/lifestyle content strategist for Indonesia. "
     "Respond in bilingual format (Bahasa Indonesia and English). Be specific, actionable, "
@@ -8,6 +12,126 @@ SYSTEM_PROMPT = (
 )
 
 
+INTENT_FILLER_WORDS = {
+    "dong", "deh", "nih", "sih", "ya", "yah", "yuk", "aja", "saja", "tolong", "please", "pls",
+    "kak", "min", "gan", "bro", "sis", "lah", "kah", "hi", "halo", "hai", "hello",
+}
+_INTENT_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def normalize_intent_message(user_message: str) -> str:
+    """Collapse casing, punctuation and filler words so phrasing variants share a key; word order is kept."""
+    text = unicodedata.normalize("NFKC", user_message).casefold()
+    return " ".join(token for token in _INTENT_TOKEN_RE.findall(text) if token not in INTENT_FILLER_WORDS)
+
+
+# What a Pinterest keyword tracked in trend_momentum still adds: growth over
+# windows longer than the history, and Pinterest's own forecast.
+PINTEREST_MOMENTUM_FIELDS = ("keyword", "pct_growth_mom", "pct_growth_yoy", "prediction")
+HASHTAG_MOMENTUM_FIELDS = ("count", "median_likes", "median_comments")
+
+
+def without_momentum_inputs(
+    pinterest_trends: dict[str, Any],
+    hashtag_data: list[dict[str, Any]],
+    trend_momentum: dict[str, Any],
+) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """Shrink the raw Pinterest and hashtag entries that trend_momentum already tracks over time."""
+    rows = trend_momentum.get("trends", [])
+    keywords = {row["name"] for row in rows if row["source"].startswith("pinterest_")}
+    hashtags = {row["name"] for row in rows if row["source"] == "instagram_hashtag"}
+    if isinstance(pinterest_trends, dict) and isinstance(pinterest_trends.get("trends"), list):
+        trends = [
+            {field: trend[field] for field in PINTEREST_MOMENTUM_FIELDS if trend.get(field) is not None}
+            if isinstance(trend, dict) and str(trend.get("keyword", "")).lower() in keywords
+            else trend
+            for trend in pinterest_trends["trends"]
+        ]
+        pinterest_trends = {**pinterest_trends, "trends": trends}
+    trimmed = []
+    for entry in hashtag_data:
+        if isinstance(entry, dict) and entry.get("hashtag") in hashtags and isinstance(entry.get("top_summary"), dict):
+            summary = {
+                key: value for key, value in entry["top_summary"].items() if key not in HASHTAG_MOMENTUM_FIELDS
+            }
+            entry = {**entry, "top_summary": summary}
+        trimmed.append(entry)
+    return pinterest_trends, trimmed
+
+
+def prompt_data(
+    user_request: str,
+    profile: dict[str, Any],
+    user_stats: dict[str, Any],
+    hashtag_data: list[dict[str, Any]],
+    pinterest_trends: dict[str, Any],
+    apify_trends: dict[str, Any],
+    competitor_data: list[dict[str, Any]],
+    model: str | None = None,
+    intent: dict[str, Any] | None = None,
+    trend_momentum: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    has_momentum = bool(trend_momentum and trend_momentum.get("trends"))
+    if has_momentum:
+        pinterest_trends, hashtag_data = without_momentum_inputs(pinterest_trends, hashtag_data, trend_momentum)
+    sections = {
+        "influencer_profile": profile,
+        "user_performance": user_stats,
+        "instagram_hashtags": hashtag_data,
+        "pinterest_trends": pinterest_trends,
+        "apify_trends": apify_trends,
+        "competitors": competitor_data,
+    }
+    if has_momentum:
+        sections["trend_momentum"] = trend_momentum
+    context = {
+        "market": "Indonesia",
+        "timezone": "WIB (UTC+7)",
+        "language": "Bahasa Indonesia + English",
+        "user_request": user_request,
+    }
+    if intent:
+        context["intent"] = intent
+    return {"context": context, **compact_sections(sections, model=model)}
+
+
+def build_chat_prompt(
+    user_request: str,
+    profile: dict[str, Any],
+    user_stats: dict[str, Any],
+    hashtag_data: list[dict[str, Any]],
+    pinterest_trends: dict[str, Any],
+    apify_trends: dict[str, Any],
+    competitor_data: list[dict[str, Any]],
+    model: str | None = None,
+    intent: dict[str, Any] | None = None,
+    trend_momentum: dict[str, Any] | None = None,
+) -> str:
+    """Same data as build_strategy_prompt, asking for a plain-text answer that can be streamed to the user."""
+    prompt = {
+        **prompt_data(
+            user_request,
+            profile,
+            user_stats,
+            hashtag_data,
+            pinterest_trends,
+            apify_trends,
+            competitor_data,
+            model=model,
+            intent=intent,
+            trend_momentum=trend_momentum,
+        ),
+        "instructions": [
+            "Answer the user_request directly in plain text. No JSON, no Markdown formatting.",
+            "Bilingual output: write each point in Bahasa Indonesia, then English.",
+            "Use only data provided. Do not invent metrics or sources.",
+            "If data is missing, say 'data tidak tersedia' / 'data not available'.",
+            "Keep it concise: short paragraphs or numbered points.",
+        ],
+    }
+    return dumps_compact(prompt)
+
+
 def build_strategy_prompt(
     user_request: str,
     profile: dict[str, Any],
@@ -16,6 +140,9 @@ def build_strategy_prompt(
     pinterest_trends: dict[str, Any],
     apify_trends: dict[str, Any],
     competitor_data: list[dict[str, Any]],
+    model: str | None = None,
+    intent: dict[str, Any] | None = None,
+    trend_momentum: dict[str, Any] | None = None,
 ) -> str:
     output_schema = {
         "top_trends": [
@@ -70,22 +197,23 @@ def build_strategy_prompt(
     }
 
     prompt = {
-        "context": {
-            "market": "Indonesia",
-            "timezone": "WIB (UTC+7)",
-            "language": "Bahasa Indonesia + English",
-            "user_request": user_request,
-        },
-        "influencer_profile": profile,
-        "user_performance": user_stats,
-        "instagram_hashtags": hashtag_data,
-        "pinterest_trends": pinterest_trends,
-        "apify_trends": apify_trends,
-        "competitors": competitor_data,
+        **prompt_data(
+            user_request,
+            profile,
+            user_stats,
+            hashtag_data,
+            pinterest_trends,
+            apify_trends,
+            competitor_data,
+            model=model,
+            intent=intent,
+            trend_momentum=trend_momentum,
+        ),
         "instructions": [
             "Return ONLY valid JSON. No extra text.",
             "Bilingual output: provide Bahasa Indonesia and English fields.",
             "Use only data provided. Do not invent metrics or sources.",
+            "Prefer trend_momentum (dod/wow growth, volatility, rank_change) over single-day values as evidence.",
             "If data is missing, use null and write 'data tidak tersedia' / 'data not available'.",
             "Urgency score: 1 (low) to 5 (high). Fit score: 1 to 10.",
             "Return exactly 3 top_trends and 5 content_ideas.",
@@ -93,7 +221,42 @@ def build_strategy_prompt(
         ],
         "output_schema": output_schema,
     }
-    return json.dumps(prompt, ensure_ascii=False, indent=2)
+    return dumps_compact(prompt)
+
+
+def build_summary_prompt(data: dict[str, Any], model: str | None = None) -> str:
+    """Prompt for the audience/theme signals of the collected data (chat state or the daily collection)."""
+    return dumps_compact(
+        {
+            "task": "Summarize signals from data for a content strategist.",
+            "rules": [
+                "Return ONLY valid JSON.",
+                "Bilingual output.",
+                "Use only provided data.",
+            ],
+            "output_schema": {
+                "audience_id": "string",
+                "audience_en": "string",
+                "top_themes_id": ["string"],
+                "top_themes_en": ["string"],
+                "content_formats_id": ["string"],
+                "content_formats_en": ["string"],
+                "risk_notes_id": ["string"],
+                "risk_notes_en": ["string"],
+            },
+            "data": compact_sections(
+                {
+                    "profile": data.get("profile"),
+                    "user_stats": data.get("user_stats"),
+                    "instagram_hashtags": data.get("instagram_hashtags"),
+                    "pinterest_trends": data.get("pinterest_trends"),
+                    "apify_trends": data.get("apify_trends"),
+                    "competitors": data.get("competitors"),
+                },
+                model=model,
+            ),
+        }
+    )
 
 
 def build_repair_prompt(bad_response: str) -> str:
@@ -159,7 +322,7 @@ def build_repair_prompt(bad_response: str) -> str:
         },
         "bad_response": bad_response,
     }
-    return json.dumps(repair, ensure_ascii=False, indent=2)
+    return dumps_compact(repair)
 
 
 def validate_result(result: dict) -> None:
@@ -209,9 +372,20 @@ def validate_result(result: dict) -> None:
         raise ValueError("avoid must be a list")
 
 
-def format_report(result: dict) -> str:
+def format_report(result: dict, markdown: bool = False) -> str:
+    """
+    Plain-text report. With `markdown`, the report is ready for
+    parse_mode=MarkdownV2: every value is escaped as plain text (model output
+    never becomes formatting) and only the section titles are made bold.
+    """
+    headers: set[int] = set()
+
+    def header(title: str) -> str:
+        headers.add(len(lines))
+        return title
+
     lines: list[str] = []
-    lines.append("TOP 3 TRENDS")
+    lines.append(header("TOP 3 TRENDS"))
     for idx, trend in enumerate(result.get("top_trends", [])[:3], start=1):
         name_id = trend.get("name_id", "data tidak tersedia")
         name_en = trend.get("name_en", "data not available")
@@ -232,7 +406,7 @@ def format_report(result: dict) -> str:
         lines.append(f"   Angle EN: {trend.get('content_angle_en', '-')}")
 
     lines.append("")
-    lines.append("5 CONTENT IDEAS")
+    lines.append(header("5 CONTENT IDEAS"))
     for idx, idea in enumerate(result.get("content_ideas", [])[:5], start=1):
         lines.append(f"{idx}. ID: {idea.get('title_id', '-')}")
         lines.append(f"   EN: {idea.get('title_en', '-')}")
@@ -247,7 +421,7 @@ def format_report(result: dict) -> str:
             lines.append(f"   Hashtags: {' '.join(hashtags)}")
 
     lines.append("")
-    lines.append("QUICK WIN")
+    lines.append(header("QUICK WIN"))
     quick = result.get("quick_win", {})
     lines.append(f"ID: {quick.get('idea_id', '-')}")
     lines.append(f"EN: {quick.get('idea_en', '-')}")
@@ -257,7 +431,7 @@ def format_report(result: dict) -> str:
     lines.append(f"Steps EN: {quick.get('steps_en', '-')}")
 
     lines.append("")
-    lines.append("AVOID")
+    lines.append(header("AVOID"))
     for item in result.get("avoid", []):
         lines.append(f"ID: {item.get('name_id', '-')}")
         lines.append(f"EN: {item.get('name_en', '-')}")
@@ -265,11 +439,16 @@ def format_report(result: dict) -> str:
         lines.append(f"Reason EN: {item.get('reason_en', '-')}")
 
     lines.append("")
-    lines.append("INSIGHTS")
+    lines.append(header("INSIGHTS"))
     insights = result.get("insights", {})
     lines.append(f"Pattern ID: {insights.get('pattern_id', '-')}")
     lines.append(f"Pattern EN: {insights.get('pattern_en', '-')}")
     lines.append(f"Best Posting Hint ID: {insights.get('best_posting_hint_id', '-')}")
     lines.append(f"Best Posting Hint EN: {insights.get('best_posting_hint_en', '-')}")
 
-    return "\n".join(lines)
+    if not markdown:
+        return "\n".join(lines)
+    return "\n".join(
+        f"*{escape_markdown_v2(line)}*" if index in headers else escape_markdown_v2(line)
+        for index, line in enumerate(lines)
+    )
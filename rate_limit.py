@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Mapping
+
+from config import (
+    CACHE_DIR,
+    INSTAGRAM_CALLS_PER_HOUR,
+    PINTEREST_CALLS_PER_HOUR,
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_MAX_WAIT,
+)
+from tracing import observe
+
+CALLS_PER_HOUR = {
+    "instagram": INSTAGRAM_CALLS_PER_HOUR,
+    "pinterest": PINTEREST_CALLS_PER_HOUR,
+}
+# Pause after a 429 or 100% usage when the response says nothing about how long.
+DEFAULT_BLOCK_SECONDS = 300
+USAGE_FIELDS = ("call_count", "total_cputime", "total_time")
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(RuntimeError):
+    pass
+
+
+def _json_header(headers: Mapping[str, str], name: str) -> Any:
+    raw = headers.get(name)
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+
+def usage_from_headers(headers: Mapping[str, str]) -> tuple[float | None, float]:
+    """
+    Highest quota usage (percent) the upstream reported, and seconds until
+    access is regained. Reads Meta's X-App-Usage and
+    X-Business-Use-Case-Usage, and the generic X-RateLimit-Remaining/Limit pair.
+    """
+    percents: list[float] = []
+    regain = 0.0
+    app = _json_header(headers, "X-App-Usage")
+    if isinstance(app, dict):
+        percents += [app[field] for field in USAGE_FIELDS if isinstance(app.get(field), (int, float))]
+    business = _json_header(headers, "X-Business-Use-Case-Usage")
+    if isinstance(business, dict):
+        for entries in business.values():
+            for entry in entries if isinstance(entries, list) else []:
+                if not isinstance(entry, dict):
+                    continue
+                percents += [entry[field] for field in USAGE_FIELDS if isinstance(entry.get(field), (int, float))]
+                regain = max(regain, float(entry.get("estimated_time_to_regain_access") or 0) * 60)
+    try:
+        remaining = float(headers["X-RateLimit-Remaining"])
+        limit = float(headers["X-RateLimit-Limit"])
+        if limit > 0:
+            percents.append(100 * (1 - remaining / limit))
+    except (KeyError, TypeError, ValueError):
+        pass
+    return (max(percents) if percents else None), regain
+
+
+def retry_after(headers: Mapping[str, str]) -> float:
+    try:
+        return max(0.0, float(headers.get("Retry-After") or 0))
+    except ValueError:
+        return 0.0
+
+
+class RateLimiter:
+    """
+    Token bucket shared across processes through SQLite.
+
+    A call takes a token and goes immediately while the bucket has tokens.
+    Once it is empty the bucket goes negative: each caller reserves the next
+    free slot and sleeps until then, so concurrent processes queue up fairly
+    without polling. Usage headers from the upstream shrink the bucket to
+    what the upstream says is left, and 429s or exhausted quotas pause it.
+    """
+
+    def __init__(self, path: str, name: str, calls_per_hour: int, max_wait: float = RATE_LIMIT_MAX_WAIT):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.name = name
+        self.capacity = float(calls_per_hour)
+        self.rate = calls_per_hour / 3600
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, blocked_until REAL NOT NULL)"
+        )
+
+    def _update(self, change) -> Any:
+        """Run change(tokens, blocked_until, now) -> (tokens, blocked_until, result) in one write transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT tokens, updated_at, blocked_until FROM buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                tokens, updated_at, blocked_until = row or (self.capacity, now, 0.0)
+                tokens = min(self.capacity, tokens + max(0.0, now - updated_at) * self.rate)
+                tokens, blocked_until, result = change(tokens, blocked_until, now)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated_at, blocked_until) VALUES (?, ?, ?, ?)",
+                    (self.name, tokens, now, blocked_until),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return result
+
+    def reserve(self, cost: float = 1.0) -> float:
+        """Take `cost` tokens and return how long to wait before calling; raises if that exceeds max_wait."""
+
+        def take(tokens: float, blocked_until: float, now: float) -> tuple[float, float, float]:
+            left = tokens - cost
+            wait = max(blocked_until - now, -left / self.rate if left < 0 else 0.0)
+            if wait > self.max_wait:
+                return tokens, blocked_until, wait
+            return left, blocked_until, wait
+
+        wait = self._update(take)
+        if wait > self.max_wait:
+            raise RateLimitExceeded(f"{self.name} rate limit: next call slot in {wait:.0f}s")
+        return wait
+
+    def acquire(self, cost: float = 1.0) -> float:
+        wait = self.reserve(cost)
+        observe("rate_limit_wait_seconds", wait, upstream=self.name)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, cost: float = 1.0) -> float:
+        # The bucket lives in SQLite; its write transaction runs in a worker thread, off the event loop.
+        wait = await asyncio.to_thread(self.reserve, cost)
+        observe("rate_limit_wait_seconds", wait, upstream=self.name)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def observe(self, headers: Mapping[str, str], status: int, extra_calls: int = 0) -> None:
+        """Fold a response's usage headers, 429s and transport retries back into the bucket."""
+        usage, regain = usage_from_headers(headers)
+        exhausted = status == 429 or (usage is not None and usage >= 100)
+        if usage is None and not exhausted and not extra_calls:
+            return
+        pause = max(regain, retry_after(headers)) or DEFAULT_BLOCK_SECONDS
+
+        def adapt(tokens: float, blocked_until: float, now: float) -> tuple[float, float, None]:
+            tokens -= extra_calls
+            if usage is not None:
+                tokens = min(tokens, self.capacity * (100 - usage) / 100)
+            if exhausted:
+                blocked_until = max(blocked_until, now + pause)
+            return tokens, blocked_until, None
+
+        self._update(adapt)
+        if exhausted:
+            logger.warning("%s quota exhausted (usage %s%%), pausing calls for %.0fs", self.name, usage, pause)
+
+    async def aobserve(self, headers: Mapping[str, str], status: int, extra_calls: int = 0) -> None:
+        await asyncio.to_thread(self.observe, headers, status, extra_calls)
+
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str) -> RateLimiter | None:
+    """The shared limiter for an upstream, or None when rate limiting is disabled."""
+    if not RATE_LIMIT_ENABLED:
+        return None
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = RateLimiter(os.path.join(CACHE_DIR, "ratelimit.sqlite"), name, CALLS_PER_HOUR[name])
+        return _limiters[name]
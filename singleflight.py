@@ -0,0 +1,101 @@
+import asyncio
+import copy
+import threading
+from typing import Any, Awaitable, Callable
+
+from tracing import increment
+
+
+class _Call:
+    __slots__ = ("done", "future", "result", "error", "waiters")
+
+    def __init__(self, future: asyncio.Future | None = None):
+        self.done = threading.Event()
+        self.future = future
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls.
+
+    The first caller for a key runs the call; callers arriving while it is
+    in flight wait for it and get their own deep copy of its result (or its
+    exception) instead of issuing the same request again. Nothing is kept
+    once the call finishes, so this never serves stale data. Coalesced calls
+    are counted in `upstream_coalesced_total`.
+    """
+
+    def __init__(self, upstream: str):
+        self.upstream = upstream
+        self._lock = threading.Lock()
+        self._calls: dict[Any, _Call] = {}
+
+    def _join(self, key: Any, new_call: Callable[[], _Call]) -> tuple[_Call, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = new_call()
+                return call, True
+            call.waiters += 1
+            return call, False
+
+    def _leave(self, key: Any, call: _Call) -> bool:
+        with self._lock:
+            self._calls.pop(key, None)
+            return call.waiters > 0
+
+    def do(self, key: str, fn: Callable[[], Any], **labels: Any) -> tuple[Any, bool]:
+        """Return (result, shared); `shared` is True when another caller's request was reused."""
+        call, leader = self._join(key, _Call)
+        if not leader:
+            increment("upstream_coalesced_total", upstream=self.upstream, **labels)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result), True
+        try:
+            result = fn()
+        except BaseException as exc:
+            call.error = exc
+            self._leave(key, call)
+            call.done.set()
+            raise
+        if self._leave(key, call):
+            # Waiters copy from a private snapshot, never from the object the leader's caller may mutate.
+            call.result = copy.deepcopy(result)
+        call.done.set()
+        return result, False
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]], **labels: Any) -> tuple[Any, bool]:
+        loop = asyncio.get_running_loop()
+        # Futures belong to one event loop, so calls on different loops are not shared.
+        flight = (id(loop), key)
+        call, leader = self._join(flight, lambda: _Call(loop.create_future()))
+        if not leader:
+            increment("upstream_coalesced_total", upstream=self.upstream, **labels)
+            try:
+                result = await asyncio.shield(call.future)
+            except asyncio.CancelledError:
+                # The leader was cancelled, not us: run the call ourselves.
+                if call.future.cancelled() and not asyncio.current_task().cancelling():
+                    return await self.ado(key, fn, **labels)
+                raise
+            return copy.deepcopy(result), True
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            self._leave(flight, call)
+            call.future.cancel()
+            raise
+        except BaseException as exc:
+            shared = self._leave(flight, call)
+            call.future.set_exception(exc)
+            if not shared:
+                call.future.exception()  # retrieved: nobody else is waiting for it
+            raise
+        shared = self._leave(flight, call)
+        call.future.set_result(copy.deepcopy(result) if shared else None)
+        return result, False
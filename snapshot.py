@@ -0,0 +1,71 @@
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any
+
+from config import SNAPSHOT_MAX_AGE_HOURS, SNAPSHOT_PATH, now_wib
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_KEYS = (
+    "profile",
+    "user_stats",
+    "instagram_hashtags",
+    "pinterest_trends",
+    "apify_trends",
+    "competitors",
+)
+
+logger = logging.getLogger(__name__)
+
+
+def save_snapshot(
+    data: dict[str, Any],
+    signals: dict[str, Any] | None,
+    instagram_user_id: str,
+    path: str = SNAPSHOT_PATH,
+) -> dict[str, Any]:
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "created_at": now_wib().isoformat(),
+        "instagram_user_id": instagram_user_id,
+        "data": {key: data.get(key) for key in SNAPSHOT_KEYS},
+        "signals": signals,
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(snapshot, fh, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return snapshot
+
+
+def load_snapshot(
+    instagram_user_id: str,
+    path: str = SNAPSHOT_PATH,
+    max_age_hours: float = SNAPSHOT_MAX_AGE_HOURS,
+) -> dict[str, Any] | None:
+    """Return the stored snapshot, or None if it is missing, stale, or from another version/account."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            snapshot = json.load(fh)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logger.warning("Ignoring unreadable snapshot at %s", path)
+        return None
+
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    if snapshot.get("instagram_user_id") != instagram_user_id:
+        return None
+    try:
+        created_at = datetime.fromisoformat(snapshot["created_at"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    age_hours = (now_wib() - created_at).total_seconds() / 3600
+    if age_hours > max_age_hours:
+        return None
+    return snapshot
@@ -0,0 +1,110 @@
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from config import TELEGRAM_BASE_URL
+from tracing import span
+from transport import get_session
+from utils import TELEGRAM_MAX_UTF16, split_first_part, utf16_len
+
+BASE_URL = TELEGRAM_BASE_URL
+MAX_MESSAGE_LENGTH = TELEGRAM_MAX_UTF16
+ERROR_TEXT = "Maaf, terjadi error saat mengambil data. Coba lagi nanti."
+
+
+def send_text(bot_token: str, chat_id: int, text: str) -> dict[str, Any]:
+    url = f"{BASE_URL}/bot{bot_token}/sendMessage"
+    payload = {"chat_id": chat_id, "text": text, "disable_web_page_preview": True}
+    with span("upstream", upstream="telegram", endpoint="sendMessage"):
+        resp = get_session().post(url, json=payload, timeout=30)
+        resp.raise_for_status()
+        return resp.json().get("result", {})
+
+
+def edit_text(bot_token: str, chat_id: int, message_id: int, text: str) -> None:
+    url = f"{BASE_URL}/bot{bot_token}/editMessageText"
+    payload = {"chat_id": chat_id, "message_id": message_id, "text": text, "disable_web_page_preview": True}
+    with span("upstream", upstream="telegram", endpoint="editMessageText"):
+        resp = get_session().post(url, json=payload, timeout=30)
+        resp.raise_for_status()
+
+
+class StreamingReply:
+    """
+    Deliver a reply while it is being generated: the first chunk is sent as a
+    new message, later chunks edit it at most every `min_interval` seconds,
+    and text beyond `max_len` continues in a fresh message. Plain text only,
+    since partial MarkdownV2 cannot be rendered safely.
+    """
+
+    def __init__(self, bot_token: str, chat_id: int, min_interval: float = 1.0, max_len: int = 3500):
+        self.bot_token = bot_token
+        self.chat_id = chat_id
+        self.min_interval = min_interval
+        self.max_len = min(max_len, MAX_MESSAGE_LENGTH)
+        self.messages_sent = 0
+        self._text = ""
+        self._sent_text = ""
+        self._message_id: int | None = None
+        self._last_flush = 0.0
+
+    def feed(self, chunk: str) -> None:
+        self._text += chunk
+        # Telegram's limit is in UTF-16 units; cut where split_message would.
+        while utf16_len(self._text) > self.max_len:
+            head, self._text = split_first_part(self._text, self.max_len)
+            self._publish(head)
+            self._message_id = None
+            self._sent_text = ""
+        if time.monotonic() - self._last_flush >= self.min_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self._publish(self._text)
+
+    def close(self) -> None:
+        self.flush()
+
+    def _publish(self, text: str) -> None:
+        if not text.strip() or text == self._sent_text:
+            return
+        if self._message_id is None:
+            result = send_text(self.bot_token, self.chat_id, text)
+            self._message_id = result.get("message_id")
+            self.messages_sent += 1
+        else:
+            edit_text(self.bot_token, self.chat_id, self._message_id, text)
+        self._sent_text = text
+        self._last_flush = time.monotonic()
+
+
+def stream_reply(bot_token: str, chat_id: int, produce: Callable[[Callable[[str], None]], Any]) -> int:
+    """
+    Stream what `produce` feeds into a StreamingReply; if it fails, the error
+    text is appended to whatever was already sent. Returns the messages sent.
+    """
+    reply = StreamingReply(bot_token, chat_id)
+    try:
+        produce(reply.feed)
+    except Exception:
+        logging.getLogger(__name__).exception("Streaming orchestration failed")
+        reply.feed("\n\n" + ERROR_TEXT)
+    reply.close()
+    return reply.messages_sent
+
+
+def reply_or_error(produce: Callable[[], str]) -> str:
+    """The reply `produce` returns, or ERROR_TEXT if it fails."""
+    try:
+        return produce()
+    except Exception:
+        logging.getLogger(__name__).exception("Orchestration failed")
+        return ERROR_TEXT
+
+
+async def areply_or_error(produce: Callable[[], Awaitable[str]]) -> str:
+    try:
+        return await produce()
+    except Exception:
+        logging.getLogger(__name__).exception("Orchestration failed")
+        return ERROR_TEXT
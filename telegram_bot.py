@@ -1,16 +1,20 @@
 import time
 import logging
+from functools import partial
 from logging.handlers import RotatingFileHandler
 from typing import Any
 
 import requests
 from dotenv import load_dotenv
 
-from config import load_env_config
-from orchestrator import run_orchestration
+from config import TELEGRAM_BASE_URL, TELEGRAM_STREAMING, load_env_config
+from orchestrator import runtime_for_env
+from telegram_api import reply_or_error, stream_reply
+from tracing import traced
+from transport import get_session
 from utils import escape_markdown_v2, split_message
 
-BASE_URL = "https://api.telegram.org"
+BASE_URL = TELEGRAM_BASE_URL
 LOG_PATH = "logs/telegram_bot.log"
 
 
@@ -35,11 +39,12 @@ def get_updates(bot_token: str, offset: int | None) -> dict[str, Any]:
     params: dict[str, Any] = {"timeout": 30}
     if offset is not None:
         params["offset"] = offset
-    resp = requests.get(url, params=params, timeout=35)
+    resp = get_session().get(url, params=params, timeout=35)
     resp.raise_for_status()
     return resp.json()
 
 
+@traced("upstream", upstream="telegram", endpoint="sendMessage")
 def send_message(bot_token: str, chat_id: int, text: str) -> None:
     url = f"{BASE_URL}/bot{bot_token}/sendMessage"
     payload = {
@@ -48,7 +53,7 @@ def send_message(bot_token: str, chat_id: int, text: str) -> None:
         "parse_mode": "MarkdownV2",
         "disable_web_page_preview": True,
     }
-    resp = requests.post(url, json=payload, timeout=30)
+    resp = get_session().post(url, json=payload, timeout=30)
     resp.raise_for_status()
 
 
@@ -66,23 +71,17 @@ def handle_text(env, message: dict) -> None:
         return
 
     logger.info("Handling message chat_id=%s text=%s", chat_id, text[:200])
-    try:
-        response = run_orchestration(
-            user_message=text,
-            openrouter_api_key=env.openrouter_api_key,
-            instagram_access_token=env.instagram_access_token,
-            instagram_user_id=env.instagram_user_id,
-            pinterest_access_token=env.pinterest_access_token,
-            apify_token=env.apify_token,
-        )
-    except Exception:
-        logger.exception("Orchestration failed")
-        response = "Maaf, terjadi error saat mengambil data. Coba lagi nanti."
-
-    safe = escape_markdown_v2(response)
-    for part in split_message(safe):
+    if TELEGRAM_STREAMING:
+        sent = stream_reply(env.telegram_bot_token, chat_id, partial(runtime_for_env(env).stream_reply, text))
+        logger.info("Streamed response chat_id=%s messages=%s", chat_id, sent)
+        return
+
+    response = reply_or_error(partial(runtime_for_env(env).run, text))
+
+    parts = split_message(escape_markdown_v2(response))
+    for part in parts:
         send_message(env.telegram_bot_token, chat_id, part)
-    logger.info("Sent response chat_id=%s parts=%s", chat_id, len(split_message(safe)))
+    logger.info("Sent response chat_id=%s parts=%s", chat_id, len(parts))
 
 
 def run_bot() -> None:
@@ -98,6 +97,7 @@ def run_bot() -> None:
     if not env.instagram_access_token or not env.instagram_user_id:
         raise SystemExit("Missing INSTAGRAM_ACCESS_TOKEN or INSTAGRAM_USER_ID")
 
+    runtime_for_env(env)
     logger.info("Telegram bot started in long-polling mode")
     offset = None
     while True:
@@ -1,21 +1,52 @@
+import asyncio
 import os
 import threading
 import logging
+from contextlib import asynccontextmanager
+from functools import partial
 from logging.handlers import RotatingFileHandler
 from typing import Any
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, Header, HTTPException, Request
-
-from config import load_env_config
-from orchestrator import run_orchestration
+from fastapi.responses import PlainTextResponse
+
+from config import (
+    TELEGRAM_BASE_URL,
+    TELEGRAM_STREAMING,
+    WEBHOOK_MAX_QUEUE,
+    WEBHOOK_MAX_WORKERS,
+    WEBHOOK_MODE,
+    load_env_config,
+)
+from dispatcher import AsyncChatDispatcher, ChatDispatcher
+from metrics import dispatcher_gauges, render
+from orchestrator import runtime_for_env
+from telegram_api import areply_or_error, reply_or_error, stream_reply
+from tracing import increment, traced
+from transport import aclose_async_client, get_async_client, get_session
 from utils import escape_markdown_v2, split_message
-import requests
 
 load_dotenv()
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the runtime (API clients, compiled graph) at startup, not while the first update waits.
+    env = load_env_config()
+    if env.openrouter_api_key and env.instagram_access_token and env.instagram_user_id:
+        runtime_for_env(env, asynchronous=WEBHOOK_MODE == "async")
+    yield
+    # Async handlers and busy replies share one pooled httpx client on the server's loop.
+    await aclose_async_client()
+
+
+app = FastAPI(lifespan=lifespan)
 LOG_PATH = "logs/telegram_webhook.log"
+BUSY_TEXT = "Bot sedang sibuk, coba lagi sebentar lagi. / The bot is busy, please try again shortly."
+
+_dispatcher: ChatDispatcher | AsyncChatDispatcher | None = None
+_dispatcher_lock = threading.Lock()
 
 
 def setup_logging() -> None:
@@ -26,6 +57,7 @@ def setup_logging() -> None:
     formatter = logging.Formatter(
         "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
     )
+    os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
     file_handler = RotatingFileHandler(LOG_PATH, maxBytes=5_000_000, backupCount=3)
     file_handler.setFormatter(formatter)
     console_handler = logging.StreamHandler()
@@ -34,18 +66,53 @@ def setup_logging() -> None:
     logger.addHandler(console_handler)
 
 
-def send_message(bot_token: str, chat_id: int, text: str) -> None:
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-    payload = {
+def message_payload(chat_id: int, text: str) -> dict[str, Any]:
+    return {
         "chat_id": chat_id,
         "text": text,
         "parse_mode": "MarkdownV2",
         "disable_web_page_preview": True,
     }
-    resp = requests.post(url, json=payload, timeout=30)
+
+
+@traced("upstream", upstream="telegram", endpoint="sendMessage")
+def send_message(bot_token: str, chat_id: int, text: str) -> None:
+    url = f"{TELEGRAM_BASE_URL}/bot{bot_token}/sendMessage"
+    resp = get_session().post(url, json=message_payload(chat_id, text), timeout=30)
     resp.raise_for_status()
 
 
+@traced("upstream", upstream="telegram", endpoint="sendMessage")
+async def asend_message(bot_token: str, chat_id: int, text: str) -> None:
+    url = f"{TELEGRAM_BASE_URL}/bot{bot_token}/sendMessage"
+    resp = await get_async_client().post(url, json=message_payload(chat_id, text), timeout=30)
+    resp.raise_for_status()
+
+
+def get_dispatcher() -> ChatDispatcher | AsyncChatDispatcher:
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            if WEBHOOK_MODE == "async":
+                _dispatcher = AsyncChatDispatcher(
+                    handler=lambda item: ahandle_update(*item),
+                    max_workers=WEBHOOK_MAX_WORKERS,
+                    max_queue=WEBHOOK_MAX_QUEUE,
+                )
+            else:
+                _dispatcher = ChatDispatcher(
+                    handler=lambda item: handle_update(*item),
+                    max_workers=WEBHOOK_MAX_WORKERS,
+                    max_queue=WEBHOOK_MAX_QUEUE,
+                )
+        return _dispatcher
+
+
+def update_chat_id(update: dict) -> int | None:
+    message = update.get("message") or update.get("edited_message") or {}
+    return message.get("chat", {}).get("id")
+
+
 def handle_update(env, update: dict) -> None:
     logger = logging.getLogger(__name__)
     message = update.get("message") or update.get("edited_message") or {}
@@ -58,19 +125,37 @@ def handle_update(env, update: dict) -> None:
         return
 
     logger.info("Handling webhook message chat_id=%s text=%s", chat_id, text[:200])
-    response = run_orchestration(
-        user_message=text,
-        openrouter_api_key=env.openrouter_api_key,
-        instagram_access_token=env.instagram_access_token,
-        instagram_user_id=env.instagram_user_id,
-        pinterest_access_token=env.pinterest_access_token,
-        apify_token=env.apify_token,
-    )
+    if TELEGRAM_STREAMING:
+        sent = stream_reply(env.telegram_bot_token, chat_id, partial(runtime_for_env(env).stream_reply, text))
+        logger.info("Streamed response chat_id=%s messages=%s", chat_id, sent)
+        return
+
+    response = reply_or_error(partial(runtime_for_env(env).run, text))
 
-    safe = escape_markdown_v2(response)
-    for part in split_message(safe):
+    parts = split_message(escape_markdown_v2(response))
+    for part in parts:
         send_message(env.telegram_bot_token, chat_id, part)
-    logger.info("Sent response chat_id=%s parts=%s", chat_id, len(split_message(safe)))
+    logger.info("Sent response chat_id=%s parts=%s", chat_id, len(parts))
+
+
+async def ahandle_update(env, update: dict) -> None:
+    logger = logging.getLogger(__name__)
+    message = update.get("message") or update.get("edited_message") or {}
+    text = message.get("text", "").strip()
+    chat_id = message.get("chat", {}).get("id")
+    if not chat_id or not text:
+        return
+
+    if env.telegram_chat_ids and str(chat_id) not in set(env.telegram_chat_ids):
+        return
+
+    logger.info("Handling webhook message chat_id=%s text=%s", chat_id, text[:200])
+    response = await areply_or_error(partial(runtime_for_env(env, asynchronous=True).arun, text))
+
+    parts = split_message(escape_markdown_v2(response))
+    for part in parts:
+        await asend_message(env.telegram_bot_token, chat_id, part)
+    logger.info("Sent response chat_id=%s parts=%s", chat_id, len(parts))
 
 
 @app.post("/telegram/webhook")
@@ -81,6 +166,7 @@ async def telegram_webhook(
     setup_logging()
     secret = os.getenv("TELEGRAM_WEBHOOK_SECRET", "")
     if secret and x_telegram_bot_api_secret_token != secret:
+        increment("webhook_updates_total", result="unauthorized")
         raise HTTPException(status_code=401, detail="Invalid secret token")
 
     update = await request.json()
@@ -89,12 +175,46 @@ async def telegram_webhook(
     if not env.telegram_bot_token:
         raise HTTPException(status_code=500, detail="Missing TELEGRAM_BOT_TOKEN")
 
-    thread = threading.Thread(target=handle_update, args=(env, update), daemon=True)
-    thread.start()
+    chat_id = update_chat_id(update)
+    dispatcher = get_dispatcher()
+    if dispatcher.submit(chat_id, (env, update)):
+        increment("webhook_updates_total", result="accepted")
+    else:
+        increment("webhook_updates_total", result="rejected")
+        logger = logging.getLogger(__name__)
+        logger.warning("Queue full, rejecting chat_id=%s stats=%s", chat_id, dispatcher.stats())
+        allowed = not env.telegram_chat_ids or str(chat_id) in set(env.telegram_chat_ids)
+        if chat_id and allowed:
+            try:
+                busy = escape_markdown_v2(BUSY_TEXT)
+                if WEBHOOK_MODE == "async":
+                    await asend_message(env.telegram_bot_token, chat_id, busy)
+                else:
+                    await asyncio.to_thread(send_message, env.telegram_bot_token, chat_id, busy)
+            except Exception:
+                logger.exception("Failed to send busy reply chat_id=%s", chat_id)
 
     return {"ok": True}
 
 
+@app.get("/healthz")
+async def healthz() -> dict[str, Any]:
+    stats = get_dispatcher().stats()
+    return {
+        "ok": True,
+        "mode": WEBHOOK_MODE,
+        "queue_depth": stats["queue_depth"],
+        "in_flight": stats["in_flight"],
+        "queue_full": stats["queue_depth"] >= WEBHOOK_MAX_QUEUE,
+    }
+
+
+@app.get("/metrics")
+async def metrics() -> PlainTextResponse:
+    body = render(dispatcher_gauges(get_dispatcher().stats()))
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
 def set_webhook() -> None:
     load_dotenv()
     env = load_env_config()
@@ -105,11 +225,11 @@ def set_webhook() -> None:
     if not webhook_url:
         raise SystemExit("Missing TELEGRAM_WEBHOOK_URL")
 
-    url = f"https://api.telegram.org/bot{env.telegram_bot_token}/setWebhook"
+    url = f"{TELEGRAM_BASE_URL}/bot{env.telegram_bot_token}/setWebhook"
     payload = {"url": webhook_url}
     if secret:
         payload["secret_token"] = secret
-    resp = requests.post(url, json=payload, timeout=30)
+    resp = get_session().post(url, json=payload, timeout=30)
     resp.raise_for_status()
     print(resp.json())
 
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("requests")
+
+from apify_client import ApifyClient, AsyncApifyClient  # noqa: E402
+from apify_ingest import ApifyCheckpoints  # noqa: E402
+from mcp_adapters import LocalMCP  # noqa: E402
+
+
+def dataset(size: int) -> list[dict]:
+    return [{"caption": f"batik modern #batik look {index}"} for index in range(size)]
+
+
+class FakeApify(ApifyClient):
+    def __init__(self, items: list[dict], fail_at: int | None = None):
+        self.items = items
+        self.fail_at = fail_at
+        self.requests = []
+
+    def get_dataset_items(self, dataset_id, limit=20, offset=0, fields=None):
+        self.requests.append((offset, limit))
+        if self.fail_at is not None and offset >= self.fail_at:
+            raise RuntimeError("upstream down")
+        return self.items[offset:offset + limit]
+
+
+class AsyncFakeApify(AsyncApifyClient):
+    def __init__(self, items: list[dict]):
+        self.items = items
+
+    async def get_dataset_items(self, dataset_id, limit=20, offset=0, fields=None):
+        return self.items[offset:offset + limit]
+
+
+def test_iter_dataset_items_pages_until_short_page():
+    client = FakeApify(dataset(250))
+    assert len(list(client.iter_dataset_items("ds", page_size=100))) == 250
+    assert client.requests == [(0, 100), (100, 100), (200, 100)]
+    assert len(list(client.iter_dataset_items("ds", page_size=100, max_items=120))) == 120
+
+
+def test_second_run_reads_only_new_items(tmp_path):
+    checkpoints = ApifyCheckpoints(str(tmp_path / "a.sqlite"))
+    client = FakeApify(dataset(300))
+    first = checkpoints.ingest(client, "ds")
+    assert first["item_count"] == 300 and first["new_items"] == 300
+    assert first["top_keywords"][:2] == ["batik", "modern"]
+
+    client.items += dataset(20)
+    client.requests.clear()
+    second = checkpoints.ingest(client, "ds")
+    assert client.requests[0][0] == 300
+    assert second == {**first, "item_count": 320, "new_items": 20}
+    assert checkpoints.load("ds")[1].unigrams["batik"] == pytest.approx(640)
+
+
+def test_failed_page_keeps_progress_of_completed_batches(tmp_path):
+    checkpoints = ApifyCheckpoints(str(tmp_path / "a.sqlite"))
+    client = FakeApify(dataset(5000), fail_at=1000)
+    result = checkpoints.ingest(client, "ds")
+    assert result["item_count"] == 1000 and result["top_keywords"][0] == "batik"
+    assert result["error"] == "upstream down"
+    assert checkpoints.load("ds")[0] == 1000
+
+
+def test_new_keyword_overtakes_old_ones_as_counts_age(tmp_path):
+    checkpoints = ApifyCheckpoints(str(tmp_path / "a.sqlite"), half_life_days=1)
+    client = FakeApify(dataset(400) + [{"caption": f"old tag{index}"} for index in range(50)])
+    checkpoints.ingest(client, "ds")
+    # Three days later: old counts are worth an eighth, one-off words have aged out.
+    checkpoints._conn.execute("UPDATE checkpoints SET updated_at = updated_at - ?", (3 * 86400,))
+    client.items += [{"caption": "kebaya kebaya"}] * 60
+    result = checkpoints.ingest(client, "ds")
+    assert result["top_keywords"][:2] == ["kebaya", "batik"]
+    counts = checkpoints.load("ds")[1].unigrams
+    assert counts["batik"] == pytest.approx(100, rel=0.01)
+    assert "tag7" not in counts and counts["kebaya"] == pytest.approx(120)
+
+
+def test_lost_race_does_not_double_count(tmp_path):
+    checkpoints = ApifyCheckpoints(str(tmp_path / "a.sqlite"))
+    start, counter = checkpoints.load("ds")
+    checkpoints.ingest(FakeApify(dataset(10)), "ds")
+    counter.update(["stale run"])
+    assert not checkpoints.commit("ds", start, 10, counter)
+    assert checkpoints.load("ds")[1].unigrams["batik"] == 20
+
+
+def test_async_ingest_matches_sync(tmp_path):
+    checkpoints = ApifyCheckpoints(str(tmp_path / "a.sqlite"))
+    result = asyncio.run(checkpoints.aingest(AsyncFakeApify(dataset(450)), "ds"))
+    assert result["item_count"] == 450 and result["top_keywords"][0] == "batik"
+
+
+def test_apify_tool_returns_the_ingest_shape_when_unavailable(tmp_path):
+    checkpoints = ApifyCheckpoints(str(tmp_path / "a.sqlite"))
+    ingested = checkpoints.ingest(FakeApify(dataset(5)), "ds")
+    unavailable = LocalMCP(None, None, None, checkpoints=checkpoints).tool_apify_trends("ds")
+    assert unavailable["note"] == "Apify client not configured"
+    assert set(ingested) <= set(unavailable) and unavailable["top_keywords"] == []
@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+from cache import ResponseCache, make_key
+
+
+def test_make_key_is_order_independent():
+    assert make_key("ig", "/me", {"a": 1, "b": 2}) == make_key("ig", "/me", {"b": 2, "a": 1})
+    assert make_key("ig", "/me", {"a": 1}) != make_key("ig", "/you", {"a": 1})
+
+
+def test_cache_hit_miss_and_expiry():
+    cache = ResponseCache("test")
+    assert cache.get("k") is None
+    cache.set("k", {"v": 1}, ttl=60)
+    assert cache.get("k") == {"v": 1}
+    cache.set("short", 1, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_cache_lru_eviction():
+    cache = ResponseCache("test", max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+
+def test_cache_persists_to_disk(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    ResponseCache("test", path=path).set("k", {"data": [1, 2]}, ttl=60)
+    assert ResponseCache("test", path=path).get("k") == {"data": [1, 2]}
+
+
+def test_cache_disk_eviction(tmp_path):
+    cache = ResponseCache("test", path=str(tmp_path / "c.sqlite"), max_entries=1, max_disk_entries=2)
+    for key in ["a", "b", "c"]:
+        cache.set(key, key, ttl=60)
+        time.sleep(0.01)
+    fresh = ResponseCache("test", path=str(tmp_path / "c.sqlite"))
+    assert fresh.get("a") is None
+    assert fresh.get("c") == "c"
+
+
+def test_only_deterministic_completions_are_cached():
+    pytest.importorskip("httpx")
+    from openrouter_ai import OpenRouterClient
+
+    client = OpenRouterClient("key", session=object(), cache=ResponseCache("llm"))
+    assert client._cache_key("p", "m", "s", 100, 0, None) is not None
+    assert client._cache_key("p", "m", "s", 100, 0.7, None) is None
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+
+from dispatcher import AsyncChatDispatcher, ChatDispatcher
+
+
+def test_dispatcher_serializes_per_chat():
+    seen = []
+    active = set()
+    overlap = []
+    lock = threading.Lock()
+
+    def handler(item):
+        chat, n = item
+        with lock:
+            if chat in active:
+                overlap.append(chat)
+            active.add(chat)
+        time.sleep(0.02)
+        with lock:
+            active.discard(chat)
+            seen.append(item)
+
+    dispatcher = ChatDispatcher(handler, max_workers=4, max_queue=20)
+    for n in range(3):
+        for chat in ("a", "b"):
+            assert dispatcher.submit(chat, (chat, n))
+    deadline = time.monotonic() + 5
+    while dispatcher.stats()["processed"] < 6 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not overlap
+    assert [n for chat, n in seen if chat == "a"] == [0, 1, 2]
+    assert len(seen) == 6
+    dispatcher.shutdown()
+
+
+def test_dispatcher_rejects_when_queue_full():
+    release = threading.Event()
+    dispatcher = ChatDispatcher(lambda item: release.wait(5), max_workers=1, max_queue=1)
+    assert dispatcher.submit(1, "first")
+    time.sleep(0.05)
+    assert dispatcher.submit(2, "second")
+    assert not dispatcher.submit(3, "third")
+    assert dispatcher.stats()["rejected"] == 1
+    release.set()
+    dispatcher.shutdown()
+
+
+def test_async_dispatcher_serializes_and_bounds():
+    async def scenario():
+        seen = []
+        running = []
+        peak = []
+
+        async def handler(item):
+            running.append(item)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(item)
+            seen.append(item)
+
+        dispatcher = AsyncChatDispatcher(handler, max_workers=2, max_queue=5)
+        for item in [("a", 0), ("b", 0), ("a", 1), ("c", 0), ("a", 2)]:
+            assert dispatcher.submit(item[0], item)
+        assert not dispatcher.submit("d", ("d", 0))
+        while dispatcher.stats()["processed"] < 5:
+            await asyncio.sleep(0.01)
+        return seen, peak, dispatcher.stats()
+
+    seen, peak, stats = asyncio.run(scenario())
+    assert [item for item in seen if item[0] == "a"] == [("a", 0), ("a", 1), ("a", 2)]
+    assert max(peak) <= 2
+    assert stats["rejected"] == 1
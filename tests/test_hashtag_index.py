@@ -0,0 +1,36 @@
+import pytest
+
+from hashtag_index import HashtagIndex, HashtagQuotaExceeded
+
+
+def test_resolve_searches_once(tmp_path):
+    index = HashtagIndex(str(tmp_path / "h.sqlite"))
+    calls = []
+
+    def search(name):
+        calls.append(name)
+        return {"data": [{"id": "178"}]}
+
+    assert index.resolve("#OOTD", search) == "178"
+    assert index.resolve("ootd", search) == "178"
+    assert HashtagIndex(str(tmp_path / "h.sqlite")).resolve("ootd", search) == "178"
+    assert calls == ["ootd"]
+
+
+def test_not_found_is_remembered(tmp_path):
+    index = HashtagIndex(str(tmp_path / "h.sqlite"))
+    calls = []
+    assert index.resolve("nothing", lambda name: calls.append(name) or {"data": []}) is None
+    assert index.resolve("nothing", lambda name: calls.append(name) or {"data": []}) is None
+    assert len(calls) == 1
+
+
+def test_weekly_budget(tmp_path):
+    index = HashtagIndex(str(tmp_path / "h.sqlite"), weekly_limit=2)
+    search = lambda name: {"data": [{"id": name}]}
+    index.resolve("a", search)
+    index.resolve("b", search)
+    assert index.remaining_budget() == 0
+    with pytest.raises(HashtagQuotaExceeded):
+        index.resolve("c", search)
+    assert index.resolve("a", search) == "a"
@@ -0,0 +1,46 @@
+from keywords import KeywordCounter, tokenize
+from utils import extract_keywords
+
+
+def test_tokenize_keeps_accents_and_splits_on_emoji():
+    assert tokenize("Café☕Kopi #Jakarta @brand_id") == ["café", "kopi", "jakarta", "@brand", "id"]
+
+
+def test_composed_and_decomposed_accents_count_together():
+    counter = KeywordCounter().update(["café latte", "café susu"])
+    assert counter.unigrams["café"] == 2
+
+
+def test_bigrams_skip_stopwords_and_hashtags():
+    counter = KeywordCounter(bigrams=True)
+    counter.add("Batik modern and batik modern #batik modern style")
+    assert counter.bigrams["batik modern"] == 2
+    assert "modern style" in counter.bigrams
+    assert "batik batik" not in counter.bigrams
+    assert counter.top(1, bigrams=True) == ["batik"]
+
+
+def test_merge_matches_counting_everything_once():
+    left = KeywordCounter(bigrams=True).update(["summer sale today", "summer outfit"])
+    right = KeywordCounter(bigrams=True)
+    right.add("summer sale again")
+    merged = KeywordCounter.from_dict(left.to_dict())
+    merged += right
+    whole = KeywordCounter(bigrams=True).update(
+        ["summer sale today", "summer outfit", "summer sale again"]
+    )
+    assert merged.unigrams == whole.unigrams
+    assert merged.bigrams == whole.bigrams
+    assert merged.documents == 3
+
+
+def test_extract_keywords_ignores_non_strings():
+    assert extract_keywords(["Fashion week", None, "fashion"], top_n=1) == ["fashion"]
+
+
+def test_add_skips_non_strings_like_update():
+    counter = KeywordCounter()
+    counter.add(None)
+    counter.add("batik modern")
+    assert counter.documents == 1
+    assert counter.top(2) == KeywordCounter().update([None, "batik modern"]).top(2)
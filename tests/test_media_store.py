@@ -0,0 +1,164 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("requests")
+
+from media_store import MediaStore, media_epoch  # noqa: E402
+
+HOUR = 3600
+
+
+def stamp(epoch: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S+0000", time.gmtime(epoch))
+
+
+class FakeInstagram:
+    def __init__(self, count: int, newest: float):
+        self.posts = [
+            {"id": str(1000 + i), "timestamp": stamp(newest - i * HOUR), "like_count": i, "caption": "batik"}
+            for i in range(count)
+        ]
+        self.media_calls = []
+        self.batch_calls = []
+        self.deleted: set[str] = set()
+        self.batch_error: Exception | None = None
+        self.media_error_after: int | None = None
+
+    def get_user_media(self, user_id, limit=30, after=None, since=None):
+        self.media_calls.append((after, since))
+        if self.media_error_after is not None and int(after or 0) >= self.media_error_after:
+            raise http_error(500)
+        posts = [p for p in self.posts if not since or media_epoch(p) > since]
+        start = int(after or 0)
+        page = {"data": posts[start:start + limit], "paging": {"cursors": {"after": str(start + limit)}}}
+        if start + limit < len(posts):
+            page["paging"]["next"] = "next"
+        return page
+
+    def get_media_batch(self, media_ids):
+        self.batch_calls.append(list(media_ids))
+        if self.batch_error is not None:
+            raise self.batch_error
+        if self.deleted.intersection(media_ids):
+            raise http_error(400, code=100, subcode=33)
+        return {media_id: {"like_count": 999} for media_id in media_ids}
+
+
+class AsyncFakeInstagram(FakeInstagram):
+    async def get_user_media(self, *args, **kwargs):
+        return super().get_user_media(*args, **kwargs)
+
+    async def get_media_batch(self, media_ids):
+        return super().get_media_batch(media_ids)
+
+
+def http_error(status: int, code: int | None = None, subcode: int | None = None) -> Exception:
+    body = {"error": {"code": code, "error_subcode": subcode}} if code is not None else {}
+    error = RuntimeError(f"{status} error")
+    error.response = SimpleNamespace(status_code=status, json=lambda: body)
+    return error
+
+
+def test_first_sync_walks_every_page(tmp_path):
+    client = FakeInstagram(120, newest=time.time() - HOUR)
+    store = MediaStore(str(tmp_path / "m.sqlite"), page_size=50)
+    result = store.refresh(client, "me")
+    assert len(result["data"]) == 120
+    assert [after for after, _ in client.media_calls] == [None, "50", "100"]
+    assert result["data"][0]["id"] == "1000"
+
+
+def test_delta_sync_fetches_only_newer_posts_and_refreshes_recent_insights(tmp_path):
+    now = time.time()
+    client = FakeInstagram(60, newest=now - 10 * HOUR)
+    store = MediaStore(str(tmp_path / "m.sqlite"), page_size=50, refresh_days=1, refresh_ttl=0)
+    store.refresh(client, "me")
+    client.posts.insert(0, {"id": "2000", "timestamp": stamp(now - 60), "like_count": 1, "caption": "new"})
+    client.media_calls.clear()
+    client.batch_calls.clear()
+
+    result = store.refresh(client, "me")
+    assert len(client.media_calls) == 1 and client.media_calls[0][1] is not None
+    assert len(result["data"]) == 61 and result["data"][0]["id"] == "2000"
+    # Only posts from the last day are refreshed, in one batched request.
+    assert len(client.batch_calls) == 1 and len(client.batch_calls[0]) == 15
+    assert store.media("me", limit=2)[1]["like_count"] == 999
+
+
+def test_failed_delta_serves_stored_media(tmp_path):
+    client = FakeInstagram(5, newest=time.time() - HOUR)
+    store = MediaStore(str(tmp_path / "m.sqlite"))
+    store.refresh(client, "me")
+    client.get_user_media = lambda *args, **kwargs: (_ for _ in ()).throw(RuntimeError("rate limited"))
+    assert len(store.refresh(client, "me")["data"]) == 5
+    with pytest.raises(RuntimeError):
+        store.refresh(client, "someone-else")
+
+
+def test_deleted_post_is_dropped_instead_of_failing_every_refresh(tmp_path):
+    now = time.time()
+    client = FakeInstagram(10, newest=now - HOUR)
+    store = MediaStore(str(tmp_path / "m.sqlite"), refresh_days=1, refresh_ttl=0)
+    store.refresh(client, "me")
+    client.deleted.add("1003")
+    client.batch_calls.clear()
+
+    result = store.refresh(client, "me")
+    # One rejected batch, then one request per ID to find the deleted one.
+    assert len(client.batch_calls) == 11
+    assert [post["id"] for post in result["data"]] == [str(1000 + i) for i in range(10) if i != 3]
+    assert all(post["like_count"] == 999 for post in result["data"])
+    client.batch_calls.clear()
+    store.refresh(client, "me")
+    assert len(client.batch_calls) == 1
+
+
+def test_throttled_refresh_keeps_media_and_still_syncs(tmp_path):
+    client = FakeInstagram(10, newest=time.time() - HOUR)
+    store = MediaStore(str(tmp_path / "m.sqlite"), refresh_days=1, refresh_ttl=0)
+    store.refresh(client, "me")
+    synced = store.last_synced("me")
+    client.batch_error = http_error(429)
+    client.batch_calls.clear()
+
+    assert len(store.refresh(client, "me")["data"]) == 10
+    assert len(client.batch_calls) == 1
+    assert store.last_synced("me") > synced
+
+
+def test_other_graph_errors_keep_media_like_throttling(tmp_path):
+    client = FakeInstagram(10, newest=time.time() - HOUR)
+    store = MediaStore(str(tmp_path / "m.sqlite"), refresh_days=1, refresh_ttl=0)
+    store.refresh(client, "me")
+    for error in (http_error(400, code=190), http_error(400, code=4), http_error(403)):
+        client.batch_error = error
+        client.batch_calls.clear()
+        assert len(store.refresh(client, "me")["data"]) == 10
+        assert len(client.batch_calls) == 1
+
+
+def test_interrupted_first_walk_resumes_before_switching_to_deltas(tmp_path):
+    client = FakeInstagram(120, newest=time.time() - HOUR)
+    store = MediaStore(str(tmp_path / "m.sqlite"), page_size=50)
+    client.media_error_after = 100
+    assert len(store.refresh(client, "me")["data"]) == 100
+    assert store.sync_mode("me") == "resume"
+
+    client.media_error_after = None
+    client.media_calls.clear()
+    assert len(store.refresh(client, "me")["data"]) == 120
+    assert client.media_calls == [("100", None)]
+    assert store.sync_mode("me") == "delta"
+
+
+def test_async_refresh_runs_the_same_sync(tmp_path):
+    client = AsyncFakeInstagram(120, newest=time.time() - HOUR)
+    store = MediaStore(str(tmp_path / "m.sqlite"), page_size=50, refresh_days=1, refresh_ttl=0)
+    client.deleted.add("1003")
+    result = asyncio.run(store.arefresh(client, "me"))
+    assert [after for after, _ in client.media_calls] == [None, "50", "100"]
+    assert len(result["data"]) == 119 and "1003" not in {post["id"] for post in result["data"]}
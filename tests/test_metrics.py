@@ -0,0 +1,50 @@
+import pytest
+
+import tracing
+from metrics import dispatcher_gauges, render
+from tracing import increment, span
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    tracing.reset()
+    yield
+    tracing.reset()
+
+
+def test_render_exposes_histograms_counters_and_gauges():
+    with span("upstream", upstream="openrouter", model="m"):
+        pass
+    increment("llm_tokens_total", 120, model="m", kind="prompt")
+    stats = {
+        "queue_depth": 2,
+        "in_flight": 1,
+        "active_chats": 3,
+        "wait_p50_seconds": None,
+        "wait_p95_seconds": 0.5,
+    }
+    text = render(dispatcher_gauges(stats))
+
+    assert "# TYPE brand_analytics_upstream_seconds histogram" in text
+    assert 'brand_analytics_upstream_seconds_bucket{model="m",upstream="openrouter",le="+Inf"} 1' in text
+    assert 'brand_analytics_upstream_seconds_count{model="m",upstream="openrouter"} 1' in text
+    assert 'brand_analytics_upstream_seconds_recent{model="m",upstream="openrouter",quantile="0.95"}' in text
+    assert 'brand_analytics_llm_tokens_total{kind="prompt",model="m"} 120' in text
+    assert "brand_analytics_webhook_queue_depth 2" in text
+    assert "brand_analytics_webhook_wait_p50_seconds" not in text
+
+
+def test_label_values_are_escaped():
+    increment("odd_total", endpoint='a"b\\c')
+    assert 'brand_analytics_odd_total{endpoint="a\\"b\\\\c"} 1' in render()
+
+
+def test_recent_summary_has_sum_and_count_and_empty_families_are_skipped(monkeypatch):
+    monkeypatch.setattr("metrics.all_caches", lambda: [])
+    with span("upstream", upstream="instagram"):
+        pass
+    text = render()
+
+    assert 'brand_analytics_upstream_seconds_recent_count{upstream="instagram"} 1' in text
+    assert 'brand_analytics_upstream_seconds_recent_sum{upstream="instagram"}' in text
+    assert "cache_" not in text
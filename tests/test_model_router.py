@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import pytest
+
+from model_router import ModelRouter
+
+
+class FakeClient:
+    def __init__(self, delays: dict[str, float], failing: set[str] = frozenset()):
+        self.delays = delays
+        self.failing = failing
+        self.calls: list[tuple[str, str]] = []
+
+    def analyze_trends(self, prompt, model, system_prompt, **kwargs):
+        self.calls.append((model, prompt))
+        time.sleep(self.delays.get(model, 0))
+        if model in self.failing:
+            raise RuntimeError(f"{model} down")
+        return model
+
+
+class AsyncFakeClient(FakeClient):
+    async def analyze_trends(self, prompt, model, system_prompt, **kwargs):
+        self.calls.append((model, prompt))
+        await asyncio.sleep(self.delays.get(model, 0))
+        if model in self.failing:
+            raise RuntimeError(f"{model} down")
+        return model
+
+
+def test_sequential_falls_back_with_per_model_prompt():
+    client = FakeClient({}, failing={"primary"})
+    router = ModelRouter(client, ["primary", "backup"], mode="sequential")
+    assert router.complete(lambda model: f"prompt for {model}", system_prompt="s") == "backup"
+    assert client.calls == [("primary", "prompt for primary"), ("backup", "prompt for backup")]
+
+
+def test_hedge_starts_backup_when_primary_is_slow():
+    client = FakeClient({"primary": 1.0, "backup": 0.0})
+    router = ModelRouter(client, ["primary", "backup"], mode="hedge", hedge_delay=0.1)
+    start = time.monotonic()
+    assert router.complete("p", system_prompt="s") == "backup"
+    assert time.monotonic() - start < 0.5
+
+
+def test_hedge_does_not_start_backup_when_primary_is_fast():
+    client = FakeClient({"primary": 0.0})
+    router = ModelRouter(client, ["primary", "backup"], mode="hedge", hedge_delay=1.0)
+    assert router.complete("p", system_prompt="s") == "primary"
+    assert [model for model, _ in client.calls] == ["primary"]
+
+
+def test_circuit_opens_after_consecutive_failures():
+    client = FakeClient({}, failing={"primary"})
+    router = ModelRouter(client, ["primary", "backup"], mode="sequential", failure_threshold=2, cooldown=60)
+    for _ in range(3):
+        assert router.complete("p", system_prompt="s") == "backup"
+    assert [model for model, _ in client.calls].count("primary") == 2
+    assert router.stats()["primary"]["circuit_open"] is True
+
+
+def test_all_models_failing_raises():
+    router = ModelRouter(FakeClient({}, failing={"a", "b"}), ["a", "b"], mode="race")
+    with pytest.raises(RuntimeError):
+        router.complete("p", system_prompt="s")
+
+
+def test_async_race_returns_first_success():
+    client = AsyncFakeClient({"primary": 1.0, "backup": 0.05})
+    router = ModelRouter(client, ["primary", "backup"], mode="race")
+    start = time.monotonic()
+    assert asyncio.run(router.acomplete("p", system_prompt="s")) == "backup"
+    assert time.monotonic() - start < 0.5
@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("langgraph")
+
+from model_router import ModelRouter  # noqa: E402
+from orchestrator import critical_path, merge_state, qa_node, required_stages, stage_dependencies  # noqa: E402
+
+
+def test_intent_runs_alongside_data():
+    deps = stage_dependencies()
+    assert deps["intent"] == [] and deps["data"] == []
+    assert deps["strategy"] == ["intent", "summary"]
+
+
+def test_skip_summary_rewires_strategy_to_data():
+    deps = stage_dependencies(skip_summary=True)
+    assert "summary" not in deps
+    assert deps["strategy"] == ["intent", "data"]
+    assert required_stages(deps, "data") == ["data"]
+
+
+def test_merge_state_accumulates_timings():
+    merged = merge_state({"a": 1, "timings": {"intent": 0.2}}, {"b": 2, "timings": {"data": 1.5}})
+    assert merged == {"a": 1, "b": 2, "timings": {"intent": 0.2, "data": 1.5}}
+
+
+def test_critical_path_follows_slowest_branch():
+    timings = {"intent": 0.5, "data": 2.0, "summary": 1.0, "strategy": 3.0, "qa": 0.1, "render": 0.0}
+    path, total = critical_path(timings)
+    assert path == ["data", "summary", "strategy", "qa", "render"]
+    assert total == pytest.approx(6.1)
+
+
+def test_qa_repair_goes_through_the_router():
+    class Client:
+        def __init__(self):
+            self.models: list[str] = []
+
+        def analyze_trends(self, prompt, model, system_prompt, **kwargs):
+            self.models.append(model)
+            return "still not json"
+
+    client = Client()
+    router = ModelRouter(client, ["primary", "backup"], mode="sequential", failure_threshold=1)
+    router.record("primary", 1.0, ok=False)  # primary's circuit is open
+    state = qa_node({"openrouter": client, "router": router, "analysis_raw": "not json"})
+    assert client.models == ["backup"]
+    assert state["analysis_json"] is None
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+from parallel import run_parallel, run_parallel_async
+
+
+def test_run_parallel_collects_results_and_errors():
+    def boom():
+        raise RuntimeError("upstream down")
+
+    results, errors = run_parallel({"a": lambda: 1, "b": boom}, max_workers=2, timeout=5)
+    assert results == {"a": 1}
+    assert errors == {"b": "upstream down"}
+
+
+def test_run_parallel_runs_concurrently():
+    tasks = {str(i): (lambda: time.sleep(0.2) or "ok") for i in range(4)}
+    start = time.monotonic()
+    results, errors = run_parallel(tasks, max_workers=4, timeout=5)
+    assert len(results) == 4 and not errors
+    assert time.monotonic() - start < 0.6
+
+
+def test_run_parallel_deadline():
+    results, errors = run_parallel(
+        {"fast": lambda: "ok", "slow": lambda: time.sleep(1)}, max_workers=2, timeout=0.2
+    )
+    assert results == {"fast": "ok"}
+    assert "timed out" in errors["slow"]
+
+
+def test_run_parallel_async_deadline():
+    async def fast():
+        return "ok"
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def boom():
+        raise ValueError("bad")
+
+    results, errors = asyncio.run(
+        run_parallel_async({"fast": fast, "slow": slow, "boom": boom}, max_workers=3, timeout=0.2)
+    )
+    assert results == {"fast": "ok"}
+    assert "timed out" in errors["slow"]
+    assert errors["boom"] == "bad"
+
+
+def test_slow_source_does_not_use_up_the_others_time():
+    # One worker: "b" only starts after "a" took most of the timeout, and still gets its own.
+    results, errors = run_parallel(
+        {"a": lambda: time.sleep(0.3) or "a", "b": lambda: time.sleep(0.3) or "b"}, max_workers=1, timeout=0.5
+    )
+    assert results == {"a": "a", "b": "b"} and not errors
+
+    async def source(delay):
+        await asyncio.sleep(delay)
+        return delay
+
+    results, errors = asyncio.run(
+        run_parallel_async(
+            {"a": lambda: source(0.3), "b": lambda: source(0.3), "c": lambda: source(2)}, max_workers=1, timeout=0.5
+        )
+    )
+    assert results == {"a": 0.3, "b": 0.3} and "timed out" in errors["c"]
@@ -0,0 +1,55 @@
+from prompt_budget import fit_to_budget, prune_payloads, section_tokens
+
+
+def test_prune_payloads_drops_raw_items():
+    data = {
+        "apify_trends": {"items": [{"caption": "x" * 500}] * 10, "top_keywords": ["linen"]},
+        "pinterest_trends": {
+            "trends": [{"keyword": "linen set", "pct_growth_wow": 30, "demographics": {"age": [1] * 50}}],
+            "source": "pinterest_api",
+        },
+        "competitors": [
+            {"business_discovery": {"followers_count": 10, "media": {"data": [{"like_count": 5}]}}},
+            {"username": "other", "error": "boom"},
+        ],
+    }
+    pruned = prune_payloads(data)
+    assert pruned["apify_trends"] == {"top_keywords": ["linen"], "item_count": 10}
+    assert pruned["pinterest_trends"]["trends"] == [{"keyword": "linen set", "pct_growth_wow": 30}]
+    assert pruned["competitors"][0]["followers_count"] == 10
+    assert pruned["competitors"][1] == {"username": "other", "error": "boom"}
+    assert "items" in data["apify_trends"]
+
+
+def test_fit_to_budget_trims_largest_section_tail():
+    data = {
+        "instagram_hashtags": [{"hashtag": f"tag{i}", "note": "x" * 40} for i in range(20)],
+        "profile": {"username": "brand"},
+    }
+    fitted = fit_to_budget(data, budget=120)
+    assert sum(section_tokens(fitted).values()) <= 120 + len(fitted)
+    assert fitted["instagram_hashtags"][0]["hashtag"] == "tag0"
+    assert len(fitted["instagram_hashtags"]) < 20
+    assert fitted["profile"] == {"username": "brand"}
+    assert len(data["instagram_hashtags"]) == 20
+
+
+def test_fit_to_budget_drops_lowest_engagement_and_growth_first():
+    data = {
+        "instagram_hashtags": [
+            {"hashtag": f"tag{likes}", "top_summary": {"median_likes": likes, "median_comments": 1}, "note": "x" * 40}
+            for likes in (5, 300, 40, 120)
+        ],
+        "pinterest_trends": {
+            "trends": [
+                {"keyword": f"kw{growth}", "trend_type": "seasonal", "pct_growth_wow": growth, "note": "x" * 40}
+                for growth in (2, 80, 15)
+            ],
+        },
+    }
+    fitted = fit_to_budget(data, budget=110)
+    hashtags = [entry["hashtag"] for entry in fitted["instagram_hashtags"]]
+    keywords = [entry["keyword"] for entry in fitted["pinterest_trends"]["trends"]]
+    assert hashtags == ["tag300", "tag120", "tag40", "tag5"][: len(hashtags)]
+    assert keywords == ["kw80", "kw15", "kw2"][: len(keywords)]
+    assert len(hashtags) + len(keywords) < 7
@@ -1,4 +1,4 @@
-from prompting import validate_result, format_report
+from prompting import format_report, normalize_intent_message, prompt_data, validate_result
 
 
 def sample_result():
@@ -60,3 +60,52 @@ def test_format_report():
     text = format_report(result)
     assert "TOP 3 TRENDS" in text
     assert "5 CONTENT IDEAS" in text
+
+
+def test_normalize_intent_message():
+    base = normalize_intent_message("ide konten hari ini")
+    assert normalize_intent_message("Ide konten hari ini dong!!") == base
+    assert normalize_intent_message("  Ide, konten -- HARI ini?  ") == base
+    # Word order carries meaning ("bukan hijab, tapi batik" vs "bukan batik, tapi hijab").
+    assert normalize_intent_message("hari ini ide konten") != base
+    assert normalize_intent_message("ide konten minggu depan") != base
+
+
+def test_momentum_replaces_the_raw_values_it_covers():
+    pinterest = {
+        "trends": [
+            {"keyword": "Linen", "trend_type": "growing", "pct_growth_wow": 20, "pct_growth_yoy": 90, "volume": 5},
+            {"keyword": "kebaya", "trend_type": "growing", "pct_growth_wow": 5, "volume": 3},
+        ],
+        "source": "pinterest_api",
+    }
+    hashtags = [
+        {"hashtag": "ootd", "top_summary": {"count": 9, "median_likes": 100, "median_comments": 5, "top_keywords": []}}
+    ]
+    momentum = {
+        "as_of": "2026-10-18",
+        "trends": [
+            {"name": "linen", "source": "pinterest_growing", "value": 40, "wow": 0.2, "days": 8},
+            {"name": "ootd", "source": "instagram_hashtag", "value": 105, "dod": 0.1, "days": 2},
+        ],
+    }
+    data = prompt_data("ide konten", {}, {}, hashtags, pinterest, {}, [], trend_momentum=momentum)
+    # Tracked entries keep only what the history cannot tell; untracked ones stay whole.
+    assert data["pinterest_trends"]["trends"] == [
+        {"keyword": "Linen", "pct_growth_yoy": 90},
+        {"keyword": "kebaya", "trend_type": "growing", "pct_growth_wow": 5, "volume": 3},
+    ]
+    assert data["instagram_hashtags"] == [{"hashtag": "ootd", "top_summary": {"top_keywords": []}}]
+    assert data["trend_momentum"] == momentum
+    # Without momentum the raw values are all the model has, so they stay.
+    plain = prompt_data("ide konten", {}, {}, hashtags, pinterest, {}, [])
+    assert plain["instagram_hashtags"] == hashtags and "trend_momentum" not in plain
+
+
+def test_markdown_report_escapes_model_text_and_bolds_only_titles():
+    result = sample_result()
+    result["top_trends"][0]["name_en"] = "*Bold* _it_ [click](http://x.test)"
+    text = format_report(result, markdown=True)
+    assert text.startswith("*TOP 3 TRENDS*\n")
+    assert "EN: \\*Bold\\* \\_it\\_ \\[click\\]\\(http://x\\.test\\)" in text
+    assert "*5 CONTENT IDEAS*" in text
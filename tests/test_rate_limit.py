@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+import pytest
+
+from rate_limit import RateLimiter, RateLimitExceeded, usage_from_headers
+
+
+def limiter(tmp_path, calls_per_hour=3600, max_wait=30.0):
+    return RateLimiter(str(tmp_path / "r.sqlite"), "instagram", calls_per_hour, max_wait=max_wait)
+
+
+def test_bucket_is_shared_between_instances(tmp_path):
+    first, second = limiter(tmp_path, calls_per_hour=3), limiter(tmp_path, calls_per_hour=3, max_wait=10_000)
+    assert [first.reserve(), second.reserve(), first.reserve()] == [0, 0, 0]
+    # Empty bucket: the next caller in any process reserves the next slot, 20 minutes out.
+    assert second.reserve() == pytest.approx(1200, rel=0.01)
+    assert second.reserve() == pytest.approx(2400, rel=0.01)
+
+
+def test_wait_beyond_max_raises_without_taking_a_token(tmp_path):
+    bucket = limiter(tmp_path, calls_per_hour=1, max_wait=5)
+    assert bucket.reserve() == 0
+    with pytest.raises(RateLimitExceeded):
+        bucket.reserve()
+    with pytest.raises(RateLimitExceeded):
+        bucket.reserve()
+    assert bucket._update(lambda tokens, blocked, now: (tokens, blocked, tokens)) == pytest.approx(0, abs=0.01)
+
+
+def test_usage_headers_shrink_the_bucket_and_429_pauses_it(tmp_path):
+    bucket = limiter(tmp_path)
+    bucket.observe({"X-App-Usage": json.dumps({"call_count": 99.9, "total_time": 10})}, 200)
+    # 0.1% of 3600 calls left: three go now, the fourth waits for the bucket to refill.
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    assert bucket.reserve() == pytest.approx(0.4, abs=0.05)
+
+    bucket.observe({"Retry-After": "20"}, 429)
+    assert bucket.reserve() == pytest.approx(20, abs=0.5)
+
+
+def test_usage_from_business_use_case_header():
+    headers = {
+        "X-Business-Use-Case-Usage": json.dumps(
+            {"1784": [{"type": "instagram", "call_count": 40, "total_cputime": 85, "estimated_time_to_regain_access": 2}]}
+        ),
+        "X-App-Usage": "not json",
+    }
+    assert usage_from_headers(headers) == (85, 120)
+    assert usage_from_headers({"X-RateLimit-Remaining": "250", "X-RateLimit-Limit": "1000"}) == (75, 0)
+    assert usage_from_headers({}) == (None, 0)
+
+
+def test_async_path_shares_the_bucket(tmp_path):
+    bucket = limiter(tmp_path, max_wait=5)
+
+    async def run():
+        assert await bucket.aacquire() == 0
+        await bucket.aobserve({"Retry-After": "20"}, 429)
+        with pytest.raises(RateLimitExceeded):
+            await bucket.aacquire()
+
+    asyncio.run(run())
+    with pytest.raises(RateLimitExceeded):
+        bucket.reserve()
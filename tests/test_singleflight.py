@@ -0,0 +1,85 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import tracing
+from singleflight import SingleFlight
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    tracing.reset()
+    yield
+    tracing.reset()
+
+
+def coalesced() -> float:
+    return tracing.counters().get(("upstream_coalesced_total", (("endpoint", "media"), ("upstream", "test"))), 0)
+
+
+def test_concurrent_identical_calls_share_one_request():
+    flights = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(2)
+        return {"data": [1, 2]}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(flights.do, "key", fetch, endpoint="media") for _ in range(4)]
+        while coalesced() < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert all(data == {"data": [1, 2]} for data, _ in results)
+    assert len({id(data) for data, _ in results}) == 4
+    # Nothing is remembered once the call is done.
+    assert flights.do("key", lambda: "fresh") == ("fresh", False)
+
+
+def test_followers_get_the_leaders_error():
+    flights = SingleFlight("test")
+    release = threading.Event()
+
+    def fail():
+        release.wait(2)
+        raise RuntimeError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(flights.do, "key", fail, endpoint="media") for _ in range(2)]
+        while coalesced() < 1:
+            threading.Event().wait(0.01)
+        release.set()
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result()
+
+
+def test_async_calls_coalesce_and_survive_a_cancelled_leader():
+    flights = SingleFlight("test")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return ["trend"]
+
+    async def scenario():
+        results = await asyncio.gather(*(flights.ado("key", fetch, endpoint="media") for _ in range(3)))
+        assert len(calls) == 1 and [shared for _, shared in results] == [False, True, True]
+
+        leader = asyncio.ensure_future(flights.ado("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.ado("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == (["trend"], False)
+
+    asyncio.run(scenario())
@@ -0,0 +1,27 @@
+import json
+from datetime import timedelta
+
+from config import now_wib
+from snapshot import SNAPSHOT_VERSION, load_snapshot, save_snapshot
+
+
+def test_snapshot_roundtrip(tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    save_snapshot({"profile": {"username": "brand"}, "extra": 1}, {"audience_en": "x"}, "42", path=path)
+    snapshot = load_snapshot("42", path=path)
+    assert snapshot["version"] == SNAPSHOT_VERSION
+    assert snapshot["data"]["profile"] == {"username": "brand"}
+    assert "extra" not in snapshot["data"]
+    assert snapshot["signals"] == {"audience_en": "x"}
+
+
+def test_snapshot_rejects_stale_foreign_and_missing(tmp_path):
+    path = tmp_path / "snapshot.json"
+    assert load_snapshot("42", path=str(path)) is None
+    save_snapshot({}, None, "42", path=str(path))
+    assert load_snapshot("other", path=str(path)) is None
+
+    raw = json.loads(path.read_text())
+    raw["created_at"] = (now_wib() - timedelta(hours=30)).isoformat()
+    path.write_text(json.dumps(raw))
+    assert load_snapshot("42", path=str(path), max_age_hours=26) is None
@@ -0,0 +1,41 @@
+import telegram_api
+from telegram_api import ERROR_TEXT, StreamingReply, stream_reply
+from utils import utf16_len
+
+
+def record_sends(monkeypatch) -> list[str]:
+    messages: list[str] = []
+
+    def send_text(bot_token, chat_id, text):
+        messages.append(text)
+        return {"message_id": len(messages)}
+
+    def edit_text(bot_token, chat_id, message_id, text):
+        messages[message_id - 1] = text
+
+    monkeypatch.setattr(telegram_api, "send_text", send_text)
+    monkeypatch.setattr(telegram_api, "edit_text", edit_text)
+    return messages
+
+
+def test_streaming_reply_limits_messages_in_utf16_units(monkeypatch):
+    messages = record_sends(monkeypatch)
+    reply = StreamingReply("token", 1, min_interval=0, max_len=100)
+    for _ in range(30):
+        reply.feed("🔥🔥 ok ")
+    reply.close()
+
+    assert len(messages) > 1
+    assert all(utf16_len(message) <= 100 for message in messages)
+    assert "".join(message + " " for message in messages).split() == ["🔥🔥", "ok"] * 30
+
+
+def test_stream_reply_appends_the_error_text_after_partial_output(monkeypatch):
+    messages = record_sends(monkeypatch)
+
+    def produce(feed):
+        feed("Partial answer")
+        raise RuntimeError("upstream down")
+
+    assert stream_reply("token", 1, produce) == 1
+    assert messages == ["Partial answer\n\n" + ERROR_TEXT]
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+import tracing
+from parallel import run_parallel
+from tracing import Histogram, current_span, span, traced
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    tracing.reset()
+    yield
+    tracing.reset()
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 4
+    assert snapshot["buckets"] == [(0.1, 1), (1.0, 3), (float("inf"), 4)]
+    assert snapshot["sum"] == pytest.approx(4.25)
+
+
+def test_span_records_duration_and_errors_by_label():
+    with span("upstream", upstream="instagram") as outer:
+        with span("tool", tool="profile") as inner:
+            assert current_span() is inner
+        assert inner.trace_id == outer.trace_id
+    with pytest.raises(ValueError):
+        with span("upstream", upstream="instagram"):
+            raise ValueError("boom")
+
+    histograms = tracing.histograms()
+    assert histograms["upstream_seconds", (("upstream", "instagram"),)].count == 2
+    assert tracing.counters()["upstream_errors_total", (("upstream", "instagram"),)] == 1
+
+
+def test_traced_wraps_coroutines():
+    @traced("node", node="intent")
+    async def intent():
+        return current_span().name
+
+    assert asyncio.run(intent()) == "node"
+    assert tracing.histograms()["node_seconds", (("node", "intent"),)].count == 1
+
+
+def test_parallel_tasks_inherit_the_callers_span():
+    with span("node", node="data") as parent:
+        results, _ = run_parallel({"a": lambda: current_span()}, max_workers=1, timeout=5)
+    assert results["a"] is parent
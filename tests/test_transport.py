@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from transport import AsyncRetryTransport, retry_count
+
+
+def flaky(failures: int, calls: list[str]):
+    def handler(request):
+        calls.append(request.method)
+        if len(calls) <= failures:
+            return httpx.Response(503, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={"ok": True})
+
+    return handler
+
+
+def send(method: str, failures: int, max_retries: int = 3) -> tuple[int, int, list[str]]:
+    calls: list[str] = []
+
+    async def run():
+        transport = AsyncRetryTransport(httpx.MockTransport(flaky(failures, calls)), max_retries=max_retries)
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.request(method, "http://upstream.test/")
+
+    resp = asyncio.run(run())
+    return resp.status_code, retry_count(resp), calls
+
+
+def test_get_is_retried_on_status_like_the_sync_session():
+    assert send("GET", failures=2) == (200, 2, ["GET"] * 3)
+    assert send("GET", failures=5, max_retries=2) == (503, 2, ["GET"] * 3)
+
+
+def test_post_is_not_retried_on_status():
+    assert send("POST", failures=1) == (503, 0, ["POST"])
@@ -0,0 +1,73 @@
+from array import array
+
+from trend_history import NAN, TrendHistory, compute_momentum, hashtag_observations, pinterest_observations
+
+DAY = 740_000
+
+
+def test_growth_volatility_and_rank_change(tmp_path):
+    history = TrendHistory(str(tmp_path / "t.sqlite"), window_days=10)
+    for offset in range(8):
+        history.record("instagram_hashtag", [("ootd", 100 + 10 * offset, 2), ("batik", 50, 1)], DAY + offset)
+    history.record("instagram_hashtag", [("ootd", 200, 1), ("batik", 50, 2)], DAY + 8)
+
+    momentum = history.momentum(DAY + 8)
+    assert momentum["as_of"]
+    ootd, batik = momentum["trends"]
+    assert ootd["name"] == "ootd" and ootd["value"] == 200
+    assert ootd["dod"] == round(200 / 170 - 1, 3)
+    assert ootd["wow"] == round(200 / 110 - 1, 3)
+    assert ootd["rank_change"] == 1 and batik["rank_change"] == -1
+    assert ootd["volatility"] > 0 and batik["volatility"] == 0
+    assert ootd["days"] == 9
+
+
+def test_series_missing_today_are_left_out():
+    keys = [("pinterest_growing", "linen"), ("pinterest_growing", "kebaya")]
+    values = [array("d", [NAN, NAN]), array("d", [NAN, NAN])]
+    ranks = [array("d", [1, 2]), array("d", [3, NAN])]
+    rows = compute_momentum(keys, values, ranks)
+    assert rows == [{"name": "linen", "source": "pinterest_growing", "rank": 3, "rank_change": -2, "days": 2}]
+
+
+def test_observations_from_collected_data():
+    pinterest = pinterest_observations(
+        [
+            {"keyword": "Linen Set", "trend_type": "growing", "time_series": {"2026-10-01": 40, "2026-10-08": 55}},
+            {"keyword": "kebaya", "trend_type": "growing"},
+            {"keyword": "batik", "trend_type": "monthly"},
+        ]
+    )
+    assert pinterest == {
+        "pinterest_growing": [("linen set", 55, 1), ("kebaya", None, 2)],
+        "pinterest_monthly": [("batik", None, 1)],
+    }
+    hashtags = hashtag_observations(
+        [
+            {"hashtag": "ootd", "top_summary": {"median_likes": 100, "median_comments": 5}},
+            {"hashtag": "batik", "top_summary": {"median_likes": 300, "median_comments": None}},
+            {"hashtag": "gone", "note": "not found"},
+        ]
+    )
+    assert hashtags == [("batik", 300, 1), ("ootd", 105, 2)]
+
+
+def test_fallback_trends_are_not_recorded(tmp_path):
+    history = TrendHistory(str(tmp_path / "t.sqlite"))
+    fallback = {"pinterest_trends": {"trends": [{"keyword": "linen"}], "source": "fallback"}}
+    assert history.record_collected(fallback, DAY) == 0
+    assert history.momentum() is None
+
+
+def test_momentum_is_reused_until_the_history_changes(tmp_path):
+    path = str(tmp_path / "t.sqlite")
+    history, other_process = TrendHistory(path), TrendHistory(path)
+    assert not history.recorded(DAY)
+    history.record("instagram_hashtag", [("ootd", 100, 1)], DAY)
+    assert history.recorded(DAY)
+    first = history.momentum(DAY)
+    assert history.momentum(DAY) is first
+    history.record("instagram_hashtag", [("ootd", 120, 1)], DAY)
+    assert history.momentum(DAY)["trends"][0]["value"] == 120
+    other_process.record("instagram_hashtag", [("ootd", 150, 1)], DAY)
+    assert history.momentum(DAY)["trends"][0]["value"] == 150
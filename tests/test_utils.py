@@ -1,4 +1,11 @@
-from utils import escape_markdown_v2, split_message, extract_keywords, summarize_media_items
+from utils import (
+    escape_markdown_v2,
+    extract_keywords,
+    percentile,
+    split_message,
+    summarize_media_items,
+    utf16_len,
+)
 
 
 def test_escape_markdown_v2():
@@ -31,3 +38,37 @@ def test_summarize_media_items():
     assert summary["count"] == 2
     assert summary["median_likes"] == 15
     assert "IMAGE" in summary["media_type_counts"]
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([3, 1, 2], 50) == 2
+    assert percentile([1, 2, 3, 4], 100) == 4
+
+
+def test_escape_markdown_v2_escapes_every_special_character_once():
+    special = "\\_*[]()~`>#+-=|{}.!"
+    assert escape_markdown_v2(special) == "".join("\\" + char for char in special)
+
+
+def test_escape_markdown_v2_entities_keeps_deliberate_formatting():
+    text = "*TOP 3 TRENDS*\n1. snake_case (x) `a.b` [site.id](https://x.id/a_b) 5*"
+    escaped = escape_markdown_v2(text, entities=True)
+    assert escaped == "*TOP 3 TRENDS*\n1\\. snake\\_case \\(x\\) `a.b` [site\\.id](https://x.id/a_b) 5\\*"
+
+
+def test_split_message_keeps_escape_sequences_whole():
+    parts = split_message("x" * 9 + "\\." + "y" * 5, max_len=10)
+    assert parts == ["x" * 9, "\\." + "y" * 5]
+
+
+def test_split_message_counts_utf16_units():
+    text = "\U0001F600" * 3000
+    parts = split_message(text)
+    assert [utf16_len(part) for part in parts] == [4096, 1904]
+    assert "".join(parts) == text
+
+
+def test_split_message_prefers_paragraph_breaks():
+    text = "\n\n".join(["a" * 30] * 4)
+    assert split_message(text, max_len=70) == ["a" * 30 + "\n\n" + "a" * 30] * 2
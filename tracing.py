@@ -0,0 +1,184 @@
+"""
+Lightweight in-process instrumentation.
+
+`span()` times a block and feeds a latency histogram keyed by span name and
+its labels; `increment()` and `observe()` record counters and arbitrary
+distributions (token counts, payload sizes). Labels must stay low-cardinality
+(node, tool, upstream, endpoint, model); per-call details go in span
+attributes, which only appear in the structured log line.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from config import TRACE_LOG_SPANS
+from utils import percentile
+
+logger = logging.getLogger("tracing")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = tuple[str, tuple[tuple[str, str], ...]]
+
+
+class Histogram:
+    """Cumulative bucket counts plus a sliding window of recent samples for percentiles."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS, window: int = 1024):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.recent.append(value)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            counts = list(self.counts)
+            recent = list(self.recent)
+            count, total = self.count, self.sum
+        cumulative, running = [], 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return {
+            "count": count,
+            "sum": total,
+            "buckets": cumulative,
+            "p50": percentile(recent, 50),
+            "p95": percentile(recent, 95),
+            "p99": percentile(recent, 99),
+        }
+
+
+class Span:
+    def __init__(self, name: str, labels: dict[str, str], trace_id: str, parent: "Span | None"):
+        self.name = name
+        self.labels = labels
+        self.trace_id = trace_id
+        self.parent = parent
+        self.attrs: dict[str, Any] = {}
+        self.duration = 0.0
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+_histograms: dict[LabelKey, Histogram] = {}
+_counters: dict[LabelKey, float] = {}
+_lock = threading.Lock()
+
+
+def _key(name: str, labels: dict[str, Any]) -> LabelKey:
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def observe(name: str, value: float, buckets: tuple[float, ...] = LATENCY_BUCKETS, **labels: Any) -> None:
+    key = _key(name, labels)
+    histogram = _histograms.get(key)
+    if histogram is None:
+        with _lock:
+            histogram = _histograms.setdefault(key, Histogram(buckets))
+    histogram.observe(value)
+
+
+def increment(name: str, amount: float = 1, **labels: Any) -> None:
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def histograms() -> dict[LabelKey, Histogram]:
+    with _lock:
+        return dict(_histograms)
+
+
+def counters() -> dict[LabelKey, float]:
+    with _lock:
+        return dict(_counters)
+
+
+def reset() -> None:
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **labels: Any) -> Iterator[Span]:
+    """Time the block as `name`; nested spans share the trace id of the outermost one."""
+    parent = _current.get()
+    trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+    current = Span(name, labels, trace_id, parent)
+    token = _current.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as exc:
+        current.set(error=exc.__class__.__name__)
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+        _current.reset(token)
+        observe(f"{name}_seconds", current.duration, **labels)
+        if "error" in current.attrs:
+            increment(f"{name}_errors_total", **labels)
+        if TRACE_LOG_SPANS:
+            logger.info(
+                json.dumps(
+                    {
+                        "span": name,
+                        "trace": trace_id,
+                        "parent": parent.name if parent else None,
+                        "ms": round(current.duration * 1000, 2),
+                        **labels,
+                        **current.attrs,
+                    },
+                    ensure_ascii=False,
+                    default=str,
+                )
+            )
+
+
+def traced(name: str, **labels: Any) -> Callable[[Callable], Callable]:
+    """Decorator form of span() for plain functions and coroutines."""
+
+    def decorate(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with span(name, **labels):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name, **labels):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+from typing import Any
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import (
+    HTTP_BACKOFF_FACTOR,
+    HTTP_MAX_RETRIES,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+)
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# urllib3's cap on a single backoff sleep.
+MAX_BACKOFF = 120
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def build_session(
+    pool_connections: int = HTTP_POOL_CONNECTIONS,
+    pool_maxsize: int = HTTP_POOL_MAXSIZE,
+    max_retries: int = HTTP_MAX_RETRIES,
+    backoff_factor: float = HTTP_BACKOFF_FACTOR,
+) -> requests.Session:
+    # Status and read retries only apply to GET; POSTs (LLM calls, Telegram
+    # sends) are retried on connection errors only, so nothing is sent twice.
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Process-wide keep-alive session shared by every API client."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """
+    Status retries for httpx, matching the sync session's urllib3 Retry.
+
+    httpx's own `retries` only covers connection errors, so GETs answered
+    with a RETRY_STATUS_CODES status are retried here with the same
+    exponential backoff, honouring Retry-After. POSTs are never retried on
+    status. The number of retries made is left in response.extensions.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        max_retries: int = HTTP_MAX_RETRIES,
+        backoff_factor: float = HTTP_BACKOFF_FACTOR,
+    ):
+        self.transport = transport
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+
+    def _delay(self, response: httpx.Response, retries: int) -> float:
+        try:
+            return max(0.0, float(response.headers.get("Retry-After") or ""))
+        except ValueError:
+            return min(MAX_BACKOFF, self.backoff_factor * 2 ** (retries - 1)) if retries > 1 else 0.0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        retries = 0
+        while True:
+            response = await self.transport.handle_async_request(request)
+            if (
+                request.method != "GET"
+                or response.status_code not in RETRY_STATUS_CODES
+                or retries >= self.max_retries
+            ):
+                response.extensions["retries"] = retries
+                return response
+            retries += 1
+            await response.aclose()
+            await asyncio.sleep(self._delay(response, retries))
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+_async_clients: dict[int, tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Shared httpx.AsyncClient for the running event loop (clients cannot cross loops)."""
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(id(loop))
+    if entry is None or entry[0] is not loop:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_MAXSIZE,
+                max_keepalive_connections=HTTP_POOL_CONNECTIONS,
+            ),
+            transport=AsyncRetryTransport(httpx.AsyncHTTPTransport(retries=HTTP_MAX_RETRIES)),
+        )
+        entry = (loop, client)
+        _async_clients[id(loop)] = entry
+    return entry[1]
+
+
+async def aclose_async_client() -> None:
+    """Close the running loop's shared client; call on shutdown so pooled connections are released."""
+    entry = _async_clients.pop(id(asyncio.get_running_loop()), None)
+    if entry is not None:
+        await entry[1].aclose()
+
+
+def retry_count(resp: Any) -> int:
+    """Status retries made before returning `resp`, by urllib3 or AsyncRetryTransport."""
+    if isinstance(resp, httpx.Response):
+        return resp.extensions.get("retries", 0)
+    retries = getattr(getattr(resp, "raw", None), "retries", None)
+    return len(retries.history) if retries is not None else 0
@@ -0,0 +1,256 @@
+import math
+import os
+import sqlite3
+import threading
+from array import array
+from datetime import date
+from typing import Any, Iterable
+
+from config import CACHE_DIR, TREND_HISTORY_DAYS, TREND_MOMENTUM_TOP, now_wib
+
+NAN = float("nan")
+VOLATILITY_DAYS = 7
+
+# (name, value, rank); value or rank may be None when a source has no such measure.
+Observation = tuple[str, float | None, int | None]
+
+
+def today() -> int:
+    return now_wib().date().toordinal()
+
+
+def growth(current: float, previous: float) -> float:
+    if math.isnan(current) or math.isnan(previous) or previous == 0:
+        return NAN
+    return (current - previous) / abs(previous)
+
+
+def rank_change(current: float, previous: float) -> float:
+    # Positive when the entry climbed (rank 5 -> rank 2 is +3).
+    return previous - current
+
+
+def spread(changes: Iterable[float]) -> float:
+    # Population standard deviation; plain floats, since statistics.pstdev works in exact fractions.
+    values = [value for value in changes if not math.isnan(value)]
+    if len(values) < 2:
+        return NAN
+    mean = sum(values) / len(values)
+    return math.sqrt(sum((value - mean) ** 2 for value in values) / len(values))
+
+
+def pinterest_observations(trends: list[dict[str, Any]]) -> dict[str, list[Observation]]:
+    """Per trend type: each keyword's position and, when Pinterest sent a time series, its latest value."""
+    by_type: dict[str, list[Observation]] = {}
+    for trend in trends:
+        if not isinstance(trend, dict) or not trend.get("keyword"):
+            continue
+        entries = by_type.setdefault(f"pinterest_{trend.get('trend_type', 'trends')}", [])
+        series = trend.get("time_series")
+        value = None
+        if isinstance(series, dict) and series:
+            value = series[max(series)]
+        entries.append((str(trend["keyword"]).lower(), value, len(entries) + 1))
+    return by_type
+
+
+def hashtag_observations(hashtags: list[dict[str, Any]]) -> list[Observation]:
+    """Median likes + comments of each hashtag's top posts, ranked against the other tracked hashtags."""
+    scored = []
+    for entry in hashtags:
+        summary = entry.get("top_summary") if isinstance(entry, dict) else None
+        if not summary or summary.get("median_likes") is None:
+            continue
+        scored.append((entry["hashtag"], summary["median_likes"] + (summary.get("median_comments") or 0)))
+    scored.sort(key=lambda pair: pair[1], reverse=True)
+    return [(name, value, rank) for rank, (name, value) in enumerate(scored, start=1)]
+
+
+def compute_momentum(
+    keys: list[tuple[str, str]],
+    values: list[array],
+    ranks: list[array],
+) -> list[dict[str, Any]]:
+    """
+    Signals for every series present on the last day of a window.
+
+    `values` and `ranks` hold one column per day, oldest first, each with one
+    slot per key (NaN where the series was not observed). Every step works a
+    whole column at a time, so thousands of keywords cost a handful of passes.
+    """
+    days = len(values)
+    if not days or not keys:
+        return []
+    empty = array("d", [NAN]) * len(keys)
+
+    def column(columns: list[array], offset: int) -> array:
+        return columns[days - 1 - offset] if offset < days else empty
+
+    current, current_rank = column(values, 0), column(ranks, 0)
+    dod = list(map(growth, current, column(values, 1)))
+    wow = list(map(growth, current, column(values, 7)))
+    moved = list(map(rank_change, current_rank, column(ranks, 1)))
+    daily = [
+        list(map(growth, column(values, offset), column(values, offset + 1)))
+        for offset in range(min(VOLATILITY_DAYS, days - 1))
+    ]
+    volatility = list(map(spread, zip(*daily))) if daily else [NAN] * len(keys)
+    seen = [0] * len(keys)
+    for day_values, day_ranks in zip(values, ranks):
+        seen = [
+            count + (not (math.isnan(value) and math.isnan(rank)))
+            for count, value, rank in zip(seen, day_values, day_ranks)
+        ]
+
+    rows = []
+    for index, (source, name) in enumerate(keys):
+        if math.isnan(current[index]) and math.isnan(current_rank[index]):
+            continue
+        row: dict[str, Any] = {"name": name, "source": source}
+        for field, value in (
+            ("value", current[index]),
+            ("dod", dod[index]),
+            ("wow", wow[index]),
+            ("volatility", volatility[index]),
+        ):
+            if not math.isnan(value):
+                row[field] = round(value, 3)
+        if not math.isnan(current_rank[index]):
+            row["rank"] = int(current_rank[index])
+        if not math.isnan(moved[index]):
+            row["rank_change"] = int(moved[index])
+        row["days"] = seen[index]
+        rows.append(row)
+    return rows
+
+
+def momentum_order(row: dict[str, Any]) -> tuple[float, float]:
+    # Biggest weekly (else daily) moves first, then the biggest rank jumps.
+    move = row.get("wow", row.get("dod", 0.0))
+    return -abs(move), -abs(row.get("rank_change", 0))
+
+
+class TrendHistory:
+    """
+    Append-only daily history of Pinterest keywords and Instagram hashtags.
+
+    One compact row per series and day (a re-run on the same day replaces
+    that day's point). Reads load a window into per-day columns and derive
+    growth, volatility and rank changes for the prompt from those; the
+    result is kept until the history changes, so chats reuse it.
+    """
+
+    def __init__(self, path: str, window_days: int = TREND_HISTORY_DAYS):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.window_days = window_days
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._momentum: tuple[tuple[int, int, int, int], dict[str, Any]] | None = None
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS series ("
+            "id INTEGER PRIMARY KEY, source TEXT NOT NULL, name TEXT NOT NULL, UNIQUE (source, name))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS points ("
+            "series_id INTEGER NOT NULL, day INTEGER NOT NULL, value REAL, rank INTEGER, "
+            "PRIMARY KEY (day, series_id)) WITHOUT ROWID"
+        )
+
+    def record(self, source: str, observations: list[Observation], day: int | None = None) -> int:
+        day = day or today()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO series (source, name) VALUES (?, ?)",
+                    [(source, name) for name, _, _ in observations],
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO points (series_id, day, value, rank) "
+                    "SELECT id, ?, ?, ? FROM series WHERE source = ? AND name = ?",
+                    [(day, value, rank, source, name) for name, value, rank in observations],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._writes += 1
+        return len(observations)
+
+    def recorded(self, day: int | None = None) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM points WHERE day = ? LIMIT 1", (day or today(),)).fetchone()
+        return row is not None
+
+    def record_collected(self, data: dict[str, Any], day: int | None = None) -> int:
+        """Record live Pinterest trends and hashtag summaries; fallback data is not history."""
+        recorded = 0
+        pinterest = data.get("pinterest_trends") or {}
+        if pinterest.get("source") == "pinterest_api":
+            for source, observations in pinterest_observations(pinterest.get("trends", [])).items():
+                recorded += self.record(source, observations, day)
+        hashtags = hashtag_observations(data.get("instagram_hashtags") or [])
+        if hashtags:
+            recorded += self.record("instagram_hashtag", hashtags, day)
+        return recorded
+
+    def columns(self, day: int) -> tuple[list[tuple[str, str]], list[array], list[array]]:
+        """Keys plus per-day value and rank columns for the window ending on `day`."""
+        first = day - self.window_days + 1
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.source, s.name, p.day, p.value, p.rank FROM points p "
+                "JOIN series s ON s.id = p.series_id WHERE p.day BETWEEN ? AND ?",
+                (first, day),
+            ).fetchall()
+        index: dict[tuple[str, str], int] = {}
+        for source, name, _, _, _ in rows:
+            index.setdefault((source, name), len(index))
+        blank = array("d", [NAN]) * len(index)
+        values = [array("d", blank) for _ in range(self.window_days)]
+        ranks = [array("d", blank) for _ in range(self.window_days)]
+        for source, name, point_day, value, rank in rows:
+            slot = index[source, name]
+            if value is not None:
+                values[point_day - first][slot] = value
+            if rank is not None:
+                ranks[point_day - first][slot] = rank
+        return list(index), values, ranks
+
+    def latest_day(self) -> int | None:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(day) FROM points").fetchone()
+        return row[0]
+
+    def momentum(self, day: int | None = None, top_n: int = TREND_MOMENTUM_TOP) -> dict[str, Any] | None:
+        day = day or self.latest_day()
+        if day is None:
+            return None
+        with self._lock:
+            # data_version moves when another connection commits; our own writes bump _writes.
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            key = (day, top_n, self._writes, version)
+            if self._momentum is not None and self._momentum[0] == key:
+                return self._momentum[1]
+        rows = compute_momentum(*self.columns(day))
+        rows.sort(key=momentum_order)
+        result = {"as_of": date.fromordinal(day).isoformat(), "trends": rows[:top_n]}
+        with self._lock:
+            self._momentum = (key, result)
+        return result
+
+
+_history: TrendHistory | None = None
+_history_lock = threading.Lock()
+
+
+def get_trend_history() -> TrendHistory:
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = TrendHistory(os.path.join(CACHE_DIR, "trends.sqlite"))
+        return _history
@@ -1,17 +1,7 @@
 import re
-from collections import Counter
-from typing import Any
+from typing import Any, Iterator
 
-STOPWORDS = {
-    "the", "and", "for", "with", "that", "this", "you", "your", "are", "but", "not",
-    "have", "has", "had", "was", "were", "from", "they", "their", "our", "out", "about",
-    "into", "what", "when", "where", "why", "how", "its", "it's", "a", "an", "to", "of",
-    "in", "on", "at", "by", "as", "or", "if", "is", "be", "been", "we", "us", "me", "my",
-    "yang", "dan", "untuk", "dengan", "ini", "itu", "kamu", "kalian", "kami", "kita",
-    "mereka", "dari", "ke", "di", "pada", "oleh", "sebagai", "atau", "jika", "adalah",
-    "sudah", "belum", "akan", "bisa", "dapat", "lagi", "juga", "lebih", "kurang",
-    "baru", "lama", "saja", "aja", "nih", "yah", "ya", "nggak", "tidak",
-}
+from keywords import KeywordCounter
 
 
 def median(values: list[int | float]) -> float | None:
@@ -24,17 +14,16 @@ def median(values: list[int | float]) -> float | None:
     return (values[mid - 1] + values[mid]) / 2
 
 
+def percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
 def extract_keywords(captions: list[str], top_n: int = 10) -> list[str]:
-    counter: Counter[str] = Counter()
-    for caption in captions:
-        for token in re.findall(r"[A-Za-z0-9#@]+", caption.lower()):
-            token = token.lstrip("#")
-            if len(token) < 3:
-                continue
-            if token in STOPWORDS:
-                continue
-            counter[token] += 1
-    return [word for word, _ in counter.most_common(top_n)]
+    return KeywordCounter().update(captions).top(top_n)
 
 
 def summarize_media_items(items: list[dict], top_n_keywords: int = 8) -> dict[str, Any]:
@@ -65,6 +54,17 @@ def summarize_media_items(items: list[dict], top_n_keywords: int = 8) -> dict[st
     }
 
 
+def summarize_competitor(raw: dict, username: str) -> dict[str, Any]:
+    business = raw.get("business_discovery", raw)
+    media_items = business.get("media", {}).get("data", []) if isinstance(business, dict) else []
+    return {
+        "username": business.get("username", username) if isinstance(business, dict) else username,
+        "followers_count": business.get("followers_count") if isinstance(business, dict) else None,
+        "media_count": business.get("media_count") if isinstance(business, dict) else None,
+        "media_summary": summarize_media_items(media_items, top_n_keywords=6),
+    }
+
+
 def summarize_user_media(media: dict) -> dict[str, Any]:
     items = media.get("data", [])
     if not items:
@@ -133,55 +133,148 @@ def summarize_user_media(media: dict) -> dict[str, Any]:
     }
 
 
-def escape_markdown_v2(text: str) -> str:
-    replacements = [
-        ("\\", "\\\\"),
-        ("_", "\\_"),
-        ("*", "\\*"),
-        ("[", "\\["),
-        ("]", "\\]"),
-        ("(", "\\("),
-        (")", "\\)"),
-        ("~", "\\~"),
-        ("`", "\\`"),
-        (">", "\\>"),
-        ("#", "\\#"),
-        ("+", "\\+"),
-        ("-", "\\-"),
-        ("=", "\\="),
-        ("|", "\\|"),
-        ("{", "\\{"),
-        ("}", "\\}"),
-        (".", "\\."),
-        ("!", "\\!"),
-    ]
-    for old, new in replacements:
-        text = text.replace(old, new)
+# Backslash first so the escapes added for the other characters are not doubled.
+MARKDOWN_V2_SPECIAL = "\\_*[]()~`>#+-=|{}.!"
+_MARKDOWN_V2_PAIRS = tuple((char, "\\" + char) for char in MARKDOWN_V2_SPECIAL)
+_CODE_PAIRS = (("\\", "\\\\"), ("`", "\\`"))
+_LINK_URL_PAIRS = (("\\", "\\\\"), (")", "\\)"))
+# Deliberate formatting recognised by the entity-aware mode: ```pre```, `code`,
+# [text](url) and *bold*, _italic_, __underline__, ~strike~, ||spoiler|| spans
+# that open and close on the same line at word boundaries.
+_ENTITY_RE = re.compile(
+    r"```(?P<pre>.+?)```"
+    r"|`(?P<code>[^`\n]+)`"
+    r"|\[(?P<link_text>[^\]\n]+)\]\((?P<link_url>[^)\s]+)\)"
+    r"|(?<![\w\\])(?P<mark>\*|__|_|~|\|\|)(?P<body>[^\s*_~|](?:[^\n]*?[^\s\\])?)(?P=mark)(?!\w)",
+    re.DOTALL,
+)
+# Characters an entity can start with; the entity pattern is only tried there,
+# since sre cannot skip ahead through the alternation by itself.
+_ENTITY_START_RE = re.compile(r"[`\[*_~|]")
+
+
+def _escape(text: str, pairs: tuple[tuple[str, str], ...]) -> str:
+    # str.replace runs in C; skipping characters that do not occur is faster
+    # than one translate() or re.sub() pass, which pay Python-level work per
+    # multi-character replacement.
+    for char, escaped in pairs:
+        if char in text:
+            text = text.replace(char, escaped)
     return text
 
 
-def split_message(text: str, max_len: int = 3500) -> list[str]:
-    if len(text) <= max_len:
-        return [text]
+def _escape_entity(match: re.Match) -> str:
+    if match.group("pre") is not None:
+        return "```" + _escape(match.group("pre"), _CODE_PAIRS) + "```"
+    if match.group("code") is not None:
+        return "`" + _escape(match.group("code"), _CODE_PAIRS) + "`"
+    if match.group("link_text") is not None:
+        text = _escape(match.group("link_text"), _MARKDOWN_V2_PAIRS)
+        return f"[{text}]({_escape(match.group('link_url'), _LINK_URL_PAIRS)})"
+    mark = match.group("mark")
+    return mark + _escape(match.group("body"), _MARKDOWN_V2_PAIRS) + mark
+
+
+def escape_markdown_v2(text: str, entities: bool = False) -> str:
+    """
+    Escape `text` for parse_mode=MarkdownV2.
+
+    With `entities=True`, well-formed formatting spans (bold, italic, code,
+    links, ...) are kept and only their contents are escaped, so callers can
+    mark up headers without escaping the pieces separately. Nested entities
+    are not recognised; their inner markers are escaped as text. Use it only
+    on text we write ourselves: in this mode, markup in model output or user
+    input would be rendered as live formatting.
+    """
+    if not entities:
+        return _escape(text, _MARKDOWN_V2_PAIRS)
     parts = []
-    current = []
-    current_len = 0
-    for paragraph in text.split("\n\n"):
-        if len(paragraph) > max_len:
-            if current:
-                parts.append("\n\n".join(current))
-                current = []
-                current_len = 0
-            for i in range(0, len(paragraph), max_len):
-                parts.append(paragraph[i : i + max_len])
+    position = 0
+    for start in _ENTITY_START_RE.finditer(text):
+        if start.start() < position:
+            continue
+        match = _ENTITY_RE.match(text, start.start())
+        if match is None:
             continue
-        if current_len + len(paragraph) + 2 > max_len and current:
-            parts.append("\n\n".join(current))
-            current = [paragraph]
-            current_len = len(paragraph)
-        else:
-            current.append(paragraph)
-            current_len += len(paragraph) + 2
-    if current:
-        parts.append("\n\n".join(current))
-    return parts
+        parts.append(_escape(text[position:match.start()], _MARKDOWN_V2_PAIRS))
+        parts.append(_escape_entity(match))
+        position = match.end()
+    parts.append(_escape(text[position:], _MARKDOWN_V2_PAIRS))
+    return "".join(parts)
+
+
+TELEGRAM_MAX_UTF16 = 4096
+_SEPARATORS = ("\n\n", "\n", " ")
+
+
+def utf16_len(text: str) -> int:
+    """Length as Telegram counts it: UTF-16 code units, so characters outside the BMP count twice."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _fit_end(text: str, start: int, max_units: int) -> int:
+    """Largest end such that text[start:end] is at most `max_units` UTF-16 units."""
+    end = min(len(text), start + max_units)
+    excess = utf16_len(text[start:end]) - max_units
+    while excess > 0:
+        # Each dropped character is worth one or two units, so this converges in a few rounds.
+        end -= (excess + 1) // 2
+        excess = utf16_len(text[start:end]) - max_units
+    return max(end, start + 1)
+
+
+def _safe_cut(text: str, start: int, cut: int) -> int:
+    """Move `cut` left of an escaping backslash so a MarkdownV2 escape like "\\." stays in one part."""
+    backslashes = 0
+    while cut - backslashes - 1 >= start and text[cut - backslashes - 1] == "\\":
+        backslashes += 1
+    if backslashes % 2 == 1 and cut - 1 > start:
+        return cut - 1
+    return cut
+
+
+def iter_message_parts(text: str, max_len: int = TELEGRAM_MAX_UTF16) -> Iterator[str]:
+    """
+    Yield consecutive parts of `text`, each at most `max_len` UTF-16 units
+    (capped at Telegram's 4096), splitting at the last paragraph break, then
+    line break, then space that fits, and only then mid-word. A cut never
+    separates a backslash escape from the character it escapes; Python
+    strings hold whole code points, so surrogate pairs are never split.
+    Runs in time linear in len(text).
+    """
+    max_len = min(max_len, TELEGRAM_MAX_UTF16)
+    position = 0
+    while True:
+        cut, resume = _next_part(text, position, max_len)
+        yield text[position:cut]
+        if cut >= len(text):
+            return
+        position = resume
+
+
+def _next_part(text: str, position: int, max_len: int) -> tuple[int, int]:
+    """(cut, resume): the part starting at `position` ends at cut, the next one starts at resume."""
+    end = _fit_end(text, position, max_len)
+    if end >= len(text):
+        return len(text), len(text)
+    for separator in _SEPARATORS:
+        cut = text.rfind(separator, position + 1, end)
+        if cut != -1:
+            skip = len(separator)
+            break
+    else:
+        cut, skip = end, 0
+    safe = _safe_cut(text, position, cut)
+    if safe != cut:
+        cut, skip = safe, 0
+    return cut, cut + skip
+
+
+def split_first_part(text: str, max_len: int = TELEGRAM_MAX_UTF16) -> tuple[str, str]:
+    """The first part iter_message_parts would yield, and the text left after it."""
+    cut, resume = _next_part(text, 0, min(max_len, TELEGRAM_MAX_UTF16))
+    return text[:cut], text[resume:]
+
+
+def split_message(text: str, max_len: int = TELEGRAM_MAX_UTF16) -> list[str]:
+    return list(iter_message_parts(text, max_len))